@@ -17,17 +17,26 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import absolute_import
 
+import numpy
 import wlmetrics
 from setuptools import setup, find_packages, Extension
 
 madgwick = Extension('wlmetrics.filter.madgwick.madgwick',
-                     include_dirs=['wlmetrics/filter/madgwick/src'],
+                     include_dirs=['wlmetrics/filter/madgwick/src', 'wlmetrics/filter/src', numpy.get_include()],
                      sources=['wlmetrics/filter/madgwick/src/madgwick.c',
-                              'wlmetrics/filter/madgwick/src/MadgwickAHRS.c'])
+                              'wlmetrics/filter/madgwick/src/MadgwickAHRS.c'],
+                     depends=['wlmetrics/filter/src/filter_arrays.h'],
+                     extra_compile_args=['-fno-math-errno'])
 mahony = Extension('wlmetrics.filter.mahony.mahony',
-                   include_dirs=['wlmetrics/filter/mahony/src'],
+                   include_dirs=['wlmetrics/filter/mahony/src', 'wlmetrics/filter/src', numpy.get_include()],
                    sources=['wlmetrics/filter/mahony/src/mahony.c',
-                            'wlmetrics/filter/mahony/src/MahonyAHRS.c'])
+                            'wlmetrics/filter/mahony/src/MahonyAHRS.c'],
+                   depends=['wlmetrics/filter/src/filter_arrays.h'],
+                   extra_compile_args=['-fno-math-errno'])
+ckalman = Extension('wlmetrics.filter.kalman.ckalman',
+                    include_dirs=['wlmetrics/filter/kalman/src', numpy.get_include()],
+                    sources=['wlmetrics/filter/kalman/src/ckalman.c',
+                             'wlmetrics/filter/kalman/src/KalmanFilter.c'])
 
 setup(
     name='wlmetrics',
@@ -55,6 +64,7 @@ setup(
     ext_modules=[
         madgwick,
         mahony,
+        ckalman,
         ],
     entry_points={
         'console_scripts': [
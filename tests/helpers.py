@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`helpers`
+==================
+
+.. module:: helpers
+   :platform: Unix, Windows
+   :synopsis: Shared helpers of the AHRS filter tests.
+
+.. moduleauthor:: hbldh <henrik.blidh@nedomkull.com>
+
+Created on 2026-10-19, 09:10
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import numpy as np
+
+
+def make_observations(n, n_columns):
+    """Noisy observations of a sensor lying still, with gravity along z."""
+    rs = np.random.RandomState(42)
+    observations = rs.randn(n, n_columns) * 0.1
+    observations[:, 2] += 1.0
+    return observations
+
+
+def reference_filter(f, observations):
+    """Run an AHRS filter sample by sample through ``update_filter``."""
+    states = []
+    for observation in observations:
+        if len(observation) == 9:
+            f.update_filter(observation[:3], observation[3:6], observation[6:])
+        else:
+            f.update_filter(observation[:3], observation[3:6])
+        states.append(f.quaternion.to_array())
+    return np.array(states)
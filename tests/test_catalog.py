@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_catalog`
+==================
+
+.. module:: test_catalog
+   :platform: Unix, Windows
+   :synopsis:
+
+.. moduleauthor:: hbldh <henrik.blidh@nedomkull.com>
+
+Created on 2026-10-18, 22:30
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import os
+import time
+import datetime
+import shutil
+import tempfile
+
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
+from wlmetrics import storage
+from wlmetrics.catalog import Catalog, describe
+
+_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'wlmetrics', 'data')
+
+
+class TestSuiteCatalog(object):
+    """Test Suite for the recording catalog."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        shutil.copy(os.path.join(_DATA_DIR, 'rec_1.json'), self.directory)
+        shutil.copy(os.path.join(_DATA_DIR, 'rec_gyro.json'), self.directory)
+        storage.convert_json_to_binary(os.path.join(_DATA_DIR, 'rec_2_1.json'),
+                                       os.path.join(self.directory, 'rec_2_1.wlmb'))
+        with open(os.path.join(self.directory, 'notes.json'), 'wt') as f:
+            f.write('{"comment": "not a recording"}')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    setup_method = setUp
+    teardown_method = tearDown
+
+    def test_update(self):
+        catalog = Catalog(self.directory)
+        assert catalog.update() == 4
+        assert len(catalog) == 3
+        assert [e['file'] for e in catalog] == ['rec_1.json', 'rec_2_1.wlmb', 'rec_gyro.json']
+        entry = catalog.entries[0]
+        assert entry['recorded'] == '2015-07-29 17:48:17'
+        assert entry['n_samples'] == 2929
+        assert abs(entry['duration'] - 29.990937) < 1e-5
+        assert entry['channels'] == ['accelerometer', 'gyroscope', 'magnetometer', 'timestamps']
+        assert catalog.entries[1]['format'] == 'binary'
+
+        catalog = Catalog(self.directory)
+        assert len(catalog) == 3
+        assert catalog.update() == 0
+
+        os.remove(os.path.join(self.directory, 'rec_gyro.json'))
+        time.sleep(0.01)
+        shutil.copy(os.path.join(_DATA_DIR, 'rec_3.json'), os.path.join(self.directory, 'rec_1.json'))
+        assert catalog.update() == 1
+        assert [e['file'] for e in Catalog(self.directory)] == ['rec_2_1.wlmb', 'rec_1.json']
+
+    def test_describe_reads_only_timestamps(self):
+        json_path = os.path.join(_DATA_DIR, 'rec_1.json')
+        expected = describe(json_path)
+        header, data = storage.read_recording(json_path)
+        file_paths = []
+        for compression in (None, 'zlib'):
+            file_path = os.path.join(self.directory, 'rec_1_{0}.wlmb'.format(compression))
+            storage.convert_json_to_binary(json_path, file_path, encode=True, compression=compression)
+            file_paths.append(file_path)
+        file_path = os.path.join(self.directory, 'rec_1.wlmc')
+        with storage.ChunkedWriter(file_path, header, {name: storage.CHANNEL_DTYPES[name] for name in data},
+                                   chunk_size=500) as writer:
+            writer.append(**data)
+        file_paths.append(file_path)
+
+        decoded = []
+        decode = storage._decode
+        storage._decode = lambda values, encoding: decoded.append(1) or decode(values, encoding)
+        try:
+            for file_path in file_paths:
+                del decoded[:]
+                entry = describe(file_path)
+                for key in ('recorded', 'name', 'channels', 'n_samples', 'duration'):
+                    assert entry[key] == expected[key]
+                assert len(decoded) <= 1
+        finally:
+            storage._decode = decode
+        assert describe(file_paths[-1])['format'] == 'chunked'
+
+    def test_truncated_files(self):
+        directory = os.path.join(self.directory, 'truncated')
+        os.mkdir(directory)
+        json_path = os.path.join(_DATA_DIR, 'rec_1.json')
+        compressions = (None, 'zlib', 'lzma') if lzma is not None else (None, 'zlib')
+        for encode in (False, True):
+            for compression in compressions:
+                if compression is not None and not encode:
+                    continue
+                file_path = os.path.join(directory, 'rec_{0}_{1}.wlmb'.format(encode, compression))
+                storage.convert_json_to_binary(json_path, file_path, encode=encode, compression=compression)
+        for file_name in sorted(os.listdir(directory)):
+            with open(os.path.join(directory, file_name), 'rb') as f:
+                raw = f.read()
+            for i, size in enumerate((10, len(raw) // 2, len(raw) - 10)):
+                with open(os.path.join(directory, 'cut_{0}_{1}'.format(i, file_name)), 'wb') as f:
+                    f.write(raw[:size])
+
+        catalog = Catalog(directory)
+        catalog.update()
+        assert all(not file_name.startswith('cut_') for file_name in (e['file'] for e in catalog))
+        assert len(catalog) == len(compressions) + 1
+        n_cut = sum(1 for file_name in catalog._entries if file_name.startswith('cut_'))
+        assert n_cut == 3 * len(catalog)
+
+    def test_find(self):
+        catalog = Catalog(self.directory)
+        catalog.update()
+        assert [e['file'] for e in catalog.find(recorded_after='2015-08')] == ['rec_gyro.json']
+        assert [e['file'] for e in catalog.find(recorded_before='2015-07-29 17:50')] == ['rec_1.json']
+        assert [e['file'] for e in catalog.find(recorded_after=datetime.datetime(2015, 7, 29, 17, 50),
+                                                recorded_before='2015-08')] == ['rec_2_1.wlmb']
+        assert len(catalog.find(min_samples=2929)) == 2
+        assert len(catalog.find(channels=['pressure'])) == 0
+        assert os.path.exists(catalog.find()[0]['path'])
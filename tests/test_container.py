@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_container`
+==================
+
+.. module:: test_container
+   :platform: Unix, Windows
+   :synopsis:
+
+.. moduleauthor:: hbldh <henrik.blidh@nedomkull.com>
+
+Created on 2026-10-19, 11:20
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import os
+import sys
+import types
+import shutil
+import datetime
+import tempfile
+
+import numpy as np
+from numpy.testing import assert_raises
+
+try:
+    import pyberryimu
+except ImportError:
+    # The container only takes the version string from pyberryimu.
+    pyberryimu = types.ModuleType(str('pyberryimu'))
+    pyberryimu.version = '0.0.0'
+    sys.modules[str('pyberryimu')] = pyberryimu
+
+from wlmetrics import storage
+from wlmetrics.container import BerryIMUDataContainer
+
+
+def _recording(n=100):
+    recording = BerryIMUDataContainer(datetime.datetime(2015, 7, 29, 17, 48, 17), {'frequency': 100})
+    recording.recording_name = 'test'
+    recording.timestamps = np.arange(n, dtype='float') / 100
+    recording.accelerometer = np.arange(n * 3, dtype='float').reshape(n, 3)
+    recording.gyroscope = np.arange(n * 3, dtype='float').reshape(n, 3) * 0.5
+    recording.pressure = np.arange(n, dtype='float') + 1000
+    return recording
+
+
+class TestSuiteContainerSlicing(object):
+    """Test Suite for slicing recordings by time and by index."""
+
+    def test_time_slice(self):
+        recording = _recording()
+        part = recording[0.1:0.2]
+        np.testing.assert_array_equal(part.timestamps, recording.timestamps[10:20])
+        np.testing.assert_array_equal(part.accelerometer, recording.accelerometer[10:20])
+        assert part.start_time == recording.start_time
+        assert part.recording_name == 'test'
+        assert part.magnetometer is None
+
+    def test_time_slice_half_open(self):
+        recording = _recording()
+        # The start bound is included, the stop bound is not.
+        assert recording[0.1:0.11].timestamps.tolist() == [0.1]
+        assert len(recording[0.105:0.11]) == 0
+        assert len(recording.time_slice(0.1, 0.1)) == 0
+
+    def test_time_slice_open_ends(self):
+        recording = _recording()
+        np.testing.assert_array_equal(recording[:0.05].timestamps, recording.timestamps[:5])
+        np.testing.assert_array_equal(recording[0.95:].timestamps, recording.timestamps[95:])
+        np.testing.assert_array_equal(recording[0.5:None].timestamps, recording.timestamps[50:])
+        assert len(recording.time_slice()) == len(recording)
+        assert len(recording[-1.0:10.0]) == len(recording)
+
+    def test_index_slice(self):
+        recording = _recording()
+        part = recording[10:50:4]
+        np.testing.assert_array_equal(part.timestamps, recording.timestamps[10:50:4])
+        np.testing.assert_array_equal(part.gyroscope, recording.gyroscope[10:50:4])
+        np.testing.assert_array_equal(recording[::-1].pressure, recording.pressure[::-1])
+        assert len(recording[:]) == len(recording)
+
+    def test_time_slice_with_step(self):
+        assert_raises(ValueError, _recording().__getitem__, slice(0.1, 0.5, 2))
+
+    def test_not_a_slice(self):
+        recording = _recording()
+        for item in (3, 0.5, 'timestamps', [1, 2]):
+            assert_raises(TypeError, recording.__getitem__, item)
+
+    def test_slices_are_views(self):
+        recording = _recording()
+        for part in (recording[0.1:0.5], recording[10:50:2]):
+            for name in ('timestamps', 'accelerometer', 'gyroscope', 'pressure'):
+                assert np.may_share_memory(getattr(part, name), getattr(recording, name))
+        part = recording[10:20]
+        part.accelerometer[0, 0] = -1.0
+        assert recording.accelerometer[10, 0] == -1.0
+
+    def test_slice_of_lazy_channel(self):
+        recording = _recording()
+        calls = []
+
+        def decode():
+            calls.append(1)
+            return np.arange(300, dtype='float').reshape(100, 3) * 2
+
+        recording._decoders['magnetometer'] = decode
+        part = recording[20:40]
+        assert not calls
+        assert 'magnetometer' in part._decoders
+        np.testing.assert_array_equal(part.magnetometer, np.arange(60, 120).reshape(20, 3) * 2)
+        assert len(calls) == 1
+        assert np.may_share_memory(part.magnetometer, recording.magnetometer)
+        assert len(calls) == 1
+
+    def test_slice_of_lazy_missing_channel(self):
+        recording = _recording()
+        recording._decoders['temperature'] = lambda: None
+        assert recording[0.1:0.2].temperature is None
+
+
+class TestSuiteContainerChannels(object):
+    """Test Suite for setting the channels of recordings."""
+
+    def test_setter_does_not_copy(self):
+        recording = _recording()
+        values = np.zeros((100, 3))
+        recording.magnetometer = values
+        assert recording.magnetometer is values
+
+    def test_setter_converts_lists(self):
+        recording = _recording()
+        recording.temperature = [20.5, 21.0]
+        assert isinstance(recording.temperature, np.ndarray)
+        assert recording.temperature.tolist() == [20.5, 21.0]
+
+    def test_setter_replaces_decoder(self):
+        recording = _recording()
+        recording._decoders['magnetometer'] = lambda: np.ones((100, 3))
+        values = np.zeros((100, 3))
+        recording.magnetometer = values
+        assert 'magnetometer' not in recording._decoders
+        assert recording.magnetometer is values
+
+    def test_setter_ignores_none(self):
+        recording = _recording()
+        accelerometer = recording.accelerometer
+        recording.accelerometer = None
+        assert recording.accelerometer is accelerometer
+
+    def test_setter_resets_records(self):
+        recording = _recording()
+        recording._records = np.zeros((100, ), [(str('timestamps'), 'float')])
+        recording.timestamps = np.arange(100, dtype='float')
+        assert recording.records is None
+
+
+class TestSuiteContainerPacking(object):
+    """Test Suite for packing recordings into one structured array."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    setup_method = setUp
+    teardown_method = tearDown
+
+    def test_compact_dtypes(self):
+        recording = _recording()
+        recording.magnetometer = np.arange(300, dtype='float').reshape(100, 3) * 1000
+        recording.temperature = np.arange(100, dtype='int32') - 50
+        records = recording.pack()
+        assert records.dtype['timestamps'].base == np.dtype('float64')
+        # Integer counts within range.
+        assert records.dtype['accelerometer'].base == np.dtype('int16')
+        assert records.dtype['temperature'].base == np.dtype('int16')
+        # Non-integral values and integers out of range.
+        assert records.dtype['gyroscope'].base == np.dtype('float32')
+        assert records.dtype['magnetometer'].base == np.dtype('float32')
+        assert records.dtype['accelerometer'].shape == (3, )
+        assert records.dtype['pressure'].shape == ()
+        assert len(records) == 100
+
+    def test_timestamps_are_float64(self):
+        recording = _recording()
+        recording.timestamps = np.arange(100, dtype='int64')
+        assert recording.pack().dtype['timestamps'].base == np.dtype('float64')
+
+    def test_dtypes_override(self):
+        recording = _recording()
+        records = recording.pack(dtypes={'accelerometer': 'float64', 'pressure': 'int32'})
+        assert records.dtype['accelerometer'].base == np.dtype('float64')
+        assert records.dtype['pressure'].base == np.dtype('int32')
+        assert records.dtype['gyroscope'].base == np.dtype('float32')
+
+    def test_packed_values(self):
+        recording = _recording()
+        expected = {name: getattr(recording, name).copy()
+                    for name in ('timestamps', 'accelerometer', 'gyroscope', 'pressure')}
+        recording.pack()
+        for name, value in expected.items():
+            np.testing.assert_array_equal(getattr(recording, name), value)
+        assert recording.magnetometer is None
+        assert 'magnetometer' not in recording.records.dtype.names
+
+    def test_different_lengths(self):
+        recording = _recording()
+        recording.pressure = np.arange(50, dtype='float')
+        assert_raises(ValueError, recording.pack)
+        assert recording.records is None
+
+    def test_channels_are_views(self):
+        recording = _recording()
+        records = recording.pack()
+        assert recording.records is records
+        for name in records.dtype.names:
+            assert np.may_share_memory(getattr(recording, name), records)
+        recording.accelerometer[0, 0] = 7
+        assert records['accelerometer'][0, 0] == 7
+
+    def test_setting_a_channel_unpacks(self):
+        recording = _recording()
+        records = recording.pack()
+        values = np.ones((100, 3))
+        recording.accelerometer = values
+        assert recording.records is None
+        assert recording.accelerometer is values
+        for name in ('timestamps', 'gyroscope', 'pressure'):
+            assert np.may_share_memory(getattr(recording, name), records)
+
+    def test_slicing_a_packed_recording(self):
+        recording = _recording()
+        records = recording.pack()
+        for part, index in ((recording[10:30:2], slice(10, 30, 2)), (recording[0.1:0.3], slice(10, 30))):
+            np.testing.assert_array_equal(part.records, records[index])
+            assert np.may_share_memory(part.records, records)
+            np.testing.assert_array_equal(part.accelerometer, records['accelerometer'][index])
+
+    def test_load_packed(self):
+        recording = _recording()
+        file_paths = [(os.path.join(self.directory, 'test.json'), {}),
+                      (os.path.join(self.directory, 'test.wlmb'), {'binary': True})]
+        for file_path, kwargs in file_paths:
+            recording.save(file_path, **kwargs)
+        file_path = os.path.join(self.directory, 'test.wlmc')
+        with recording.stream(file_path, channels=('timestamps', 'accelerometer', 'gyroscope', 'pressure'),
+                              chunk_size=32) as writer:
+            writer.append(timestamps=recording.timestamps, accelerometer=recording.accelerometer,
+                          gyroscope=recording.gyroscope, pressure=recording.pressure)
+        file_paths.append((file_path, {}))
+
+        for file_path, _ in file_paths:
+            loaded = BerryIMUDataContainer.load(file_path, packed=True)
+            assert loaded.records is not None
+            assert loaded.records.dtype['accelerometer'].base == np.dtype('int16')
+            assert loaded.records.dtype['gyroscope'].base == np.dtype('float32')
+            assert loaded.start_time == recording.start_time
+            assert loaded.recording_name == 'test'
+            for name in ('timestamps', 'accelerometer', 'gyroscope', 'pressure'):
+                np.testing.assert_array_equal(getattr(loaded, name), getattr(recording, name))
+                assert np.may_share_memory(getattr(loaded, name), loaded.records)
+            assert loaded.magnetometer is None
+
+
+class TestSuiteContainerStorage(object):
+    """Test Suite for saving and loading recordings."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    setup_method = setUp
+    teardown_method = tearDown
+
+    def _assert_equal(self, loaded, recording):
+        assert loaded.start_time == recording.start_time
+        assert loaded.recording_name == recording.recording_name
+        assert loaded.client_settings == recording.client_settings
+        for name in ('timestamps', 'accelerometer', 'gyroscope', 'magnetometer', 'pressure', 'temperature'):
+            value = getattr(recording, name)
+            if value is None:
+                assert getattr(loaded, name) is None
+            else:
+                np.testing.assert_array_equal(getattr(loaded, name), value)
+
+    def test_json_round_trip(self):
+        recording = _recording()
+        file_path = os.path.join(self.directory, 'test.json')
+        recording.save(file_path)
+        self._assert_equal(BerryIMUDataContainer.load(file_path), recording)
+
+    def test_binary_round_trip(self):
+        recording = _recording()
+        file_path = os.path.join(self.directory, 'test.wlmb')
+        for encode in (False, True):
+            for compression in (None, 'zlib', 'lzma') if storage.lzma is not None else (None, 'zlib'):
+                recording.save(file_path, binary=True, encode=encode, compression=compression)
+                for mmap in (True, False):
+                    self._assert_equal(BerryIMUDataContainer.load(file_path, mmap=mmap), recording)
+
+    def test_encoded_is_smaller(self):
+        recording = _recording(1000)
+        sizes = []
+        for i, (encode, compression) in enumerate(((False, None), (True, None), (True, 'zlib'))):
+            file_path = os.path.join(self.directory, 'test_{0}.wlmb'.format(i))
+            recording.save(file_path, binary=True, encode=encode, compression=compression)
+            sizes.append(os.path.getsize(file_path))
+        assert sizes[0] > sizes[1] > sizes[2]
+
+    def test_json_channels_decoded_on_access(self):
+        recording = _recording()
+        file_path = os.path.join(self.directory, 'test.json')
+        recording.save(file_path)
+        loaded = BerryIMUDataContainer.load(file_path)
+        assert sorted(loaded._decoders) == ['accelerometer', 'gyroscope', 'pressure', 'timestamps']
+        assert all(value is None for value in loaded._data.values())
+
+        np.testing.assert_array_equal(loaded.gyroscope, recording.gyroscope)
+        assert sorted(loaded._decoders) == ['accelerometer', 'pressure', 'timestamps']
+        assert loaded._data['accelerometer'] is None
+        assert loaded._data['timestamps'] is None
+
+        np.testing.assert_array_equal(loaded[10:20].accelerometer, recording.accelerometer[10:20])
+        # An index slice does not need the timestamps either.
+        assert sorted(loaded._decoders) == ['pressure', 'timestamps']
+        assert loaded._data['pressure'] is None
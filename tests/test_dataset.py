@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_dataset`
+==================
+
+.. module:: test_dataset
+   :platform: Unix, Windows
+   :synopsis:
+
+.. moduleauthor:: hbldh <henrik.blidh@nedomkull.com>
+
+Created on 2026-10-18, 23:10
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from wlmetrics import storage
+from wlmetrics.catalog import Catalog
+from wlmetrics import dataset as dataset_module
+from wlmetrics.dataset import load_dataset
+
+_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'wlmetrics', 'data')
+
+
+class TestSuiteDataset(object):
+    """Test Suite for the parallel dataset loader."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        shutil.copy(os.path.join(_DATA_DIR, 'rec_1.json'), self.directory)
+        shutil.copy(os.path.join(_DATA_DIR, 'rec_gyro.json'), self.directory)
+        storage.convert_json_to_binary(os.path.join(_DATA_DIR, 'rec_2_1.json'),
+                                       os.path.join(self.directory, 'rec_2_1.wlmb'))
+        self.paths = [os.path.join(self.directory, f) for f in ('rec_1.json', 'rec_2_1.wlmb', 'rec_gyro.json')]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    setup_method = setUp
+    teardown_method = tearDown
+
+    def _check(self, dataset, channels):
+        assert len(dataset) == 3
+        assert dataset.offsets[-1] == len(dataset.channels['timestamps'])
+        for i, path in enumerate(self.paths):
+            header, data = storage.read_recording(path)
+            assert dataset.headers[i]['recorded'] == header['recorded']
+            recording = dataset[i]
+            for name in channels:
+                np.testing.assert_array_equal(recording[name], data[name])
+
+    def test_load(self):
+        channels = ('timestamps', 'accelerometer', 'gyroscope')
+        for processes in (1, 2):
+            self._check(load_dataset(self.paths, channels, processes=processes), channels)
+
+    def test_load_with_catalog(self):
+        catalog = Catalog(self.directory)
+        catalog.update()
+        dataset = load_dataset(self.paths, processes=2, catalog=catalog)
+        self._check(dataset, ('timestamps', 'magnetometer'))
+        assert list(dataset.n_samples) == [e['n_samples'] for e in catalog.entries]
+
+    def test_processes(self):
+        processes = []
+        map_ = dataset_module._map
+
+        def recording_map(function, items, n, *args, **kwargs):
+            processes.append(n)
+            return map_(function, items, 1, *args, **kwargs)
+
+        dataset_module._map = recording_map
+        try:
+            load_dataset(self.paths[:2], processes=8)
+            assert processes == [2, 2]
+            del processes[:]
+            catalog = Catalog(self.directory)
+            catalog.update()
+            os.utime(self.paths[0], (0, 0))
+            load_dataset(self.paths, processes=8, catalog=catalog)
+            # Only the changed recording is counted.
+            assert processes == [1, 3]
+        finally:
+            dataset_module._map = map_
+
+    def test_missing_channel(self):
+        dataset = load_dataset(self.paths[:1], ('timestamps', 'pressure'), processes=1)
+        assert np.all(np.isnan(dataset.channels['pressure']))
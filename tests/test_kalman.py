@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_kalman`
+==================
+
+.. module:: test_kalman
+   :platform: Unix, Windows
+   :synopsis: 
+
+.. moduleauthor:: hbldh <henrik.blidh@nedomkull.com>
+
+Created on 2026-10-18, 15:02
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import os
+
+from unittest import SkipTest
+
+import numpy as np
+
+from wlmetrics.filter.kalman import KalmanFilter, StaticDetectingPositionKalmanFilter, \
+    DecoupledPositionKalmanFilter, MultiStreamPositionKalmanFilter, detect_static_periods
+from wlmetrics.filter.kalman.kalman import ckalman
+
+
+def _test_data():
+    observations = np.load(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                        'wlmetrics', 'filter', 'test_data.npy'))[:, 1:]
+    observations[:, 2] *= -1.0
+    return observations
+
+
+def _reference_static_periods(observations, static_threshold, static_limit, static_counter):
+    static_array, gravity = [], []
+    current_gravity, static_since = observations[0, :], 0
+    for i, observation in enumerate(observations):
+        if np.abs(1 - np.linalg.norm(observation)) < static_threshold:
+            if static_counter <= static_limit:
+                static_counter += 1
+                static_since = i
+            if static_counter > static_limit:
+                current_gravity = np.mean(observations[static_since:i + 1, :], 0)
+                static_array.append(1)
+            else:
+                static_array.append(0.5)
+        else:
+            static_counter = 0
+            static_array.append(0)
+        gravity.append(current_gravity)
+    return np.array(static_array), np.array(gravity), static_counter
+
+
+class TestSuiteKalman(object):
+    """Test Suite for the Kalman filters."""
+
+    def test_steady_state_gain(self):
+        kf = StaticDetectingPositionKalmanFilter(200)
+        K, IS = kf.steady_state_gain()
+        X, P = kf.X, kf.P
+        for i in range(1000):
+            X, P = kf.kf_predict(X, P)
+            X, P, K_i, IM, IS_i = kf.kf_update(X, P, np.zeros((3, )))
+        np.testing.assert_allclose(K, K_i, rtol=1e-10)
+        np.testing.assert_allclose(IS, IS_i, rtol=1e-10)
+
+    def test_steady_state_gain_cached(self):
+        K_1, IS_1 = StaticDetectingPositionKalmanFilter(200).steady_state_gain()
+        K_2, IS_2 = StaticDetectingPositionKalmanFilter(200).steady_state_gain()
+        K_3, IS_3 = StaticDetectingPositionKalmanFilter(100).steady_state_gain()
+        assert K_1 is K_2
+        assert K_1 is not K_3
+
+    def test_steady_state_filter(self):
+        observations = _test_data()
+        kf = StaticDetectingPositionKalmanFilter(200, 0.025, 0.2)
+        states, static, gravity = kf.filter(observations)
+        kf = StaticDetectingPositionKalmanFilter(200, 0.025, 0.2, steady_state=True)
+        states_ss, static_ss, gravity_ss = kf.filter(observations)
+        np.testing.assert_array_equal(static, static_ss)
+        np.testing.assert_allclose(states[200:, :], states_ss[200:, :], atol=1e-6)
+
+    def test_decoupled_filter(self):
+        observations = _test_data()
+        states, static, gravity = StaticDetectingPositionKalmanFilter(200, 0.025, 0.2).filter(observations)
+        kf = DecoupledPositionKalmanFilter(200, 0.025, 0.2)
+        states_d, static_d, gravity_d = kf.filter(observations)
+        np.testing.assert_array_equal(static, static_d)
+        np.testing.assert_allclose(states, states_d, atol=1e-12)
+        assert kf.P.shape == (3, 3, 3)
+
+    def test_extension_decoupled_filter(self):
+        if ckalman is None:
+            raise SkipTest("The ckalman extension is not built.")
+        observations = _test_data()
+        for steady_state in (False, True):
+            kf = DecoupledPositionKalmanFilter(200, 0.025, 0.2, steady_state, use_extension=False)
+            kf_c = DecoupledPositionKalmanFilter(200, 0.025, 0.2, steady_state)
+            assert kf_c.use_extension
+            for a, b in zip(kf.filter(observations), kf_c.filter(observations)):
+                np.testing.assert_allclose(a, b, atol=1e-12)
+
+    def test_extension_filter(self):
+        if ckalman is None:
+            raise SkipTest("The ckalman extension is not built.")
+        kf = StaticDetectingPositionKalmanFilter(200)
+        kf.set_initial_state(np.zeros((9, )), np.eye(9))
+        observations = _test_data()
+        states = KalmanFilter(kf.transition_matrix, kf.transition_covariance, kf.observation_matrix,
+                              kf.observation_covariance, use_extension=False)
+        states.set_initial_state(kf.X, kf.P)
+        states_c = KalmanFilter(kf.transition_matrix, kf.transition_covariance, kf.observation_matrix,
+                                kf.observation_covariance)
+        states_c.set_initial_state(kf.X, kf.P)
+        np.testing.assert_allclose(states.filter(observations), states_c.filter(observations), atol=1e-12)
+
+    def test_extension_static_filter(self):
+        if ckalman is None:
+            raise SkipTest("The ckalman extension is not built.")
+        observations = _test_data()
+        for steady_state in (False, True):
+            kf = StaticDetectingPositionKalmanFilter(200, 0.025, 0.2, steady_state, use_extension=False)
+            kf_c = StaticDetectingPositionKalmanFilter(200, 0.025, 0.2, steady_state)
+            assert kf_c.use_extension
+            for a, b in zip(kf.filter(observations), kf_c.filter(observations)):
+                np.testing.assert_allclose(a, b, atol=1e-12)
+            assert kf._static_counter == kf_c._static_counter
+            np.testing.assert_array_equal(kf_c.X, np.zeros((9, )))
+
+    def test_detect_static_periods(self):
+        observations = _test_data()
+        for static_threshold, static_limit, static_counter in [(0.025, 40, 200), (0.1, 50, 0), (0.05, 9.5, 3)]:
+            static_array, gravity, counter = detect_static_periods(
+                observations, static_threshold, static_limit, static_counter)
+            static_ref, gravity_ref, counter_ref = _reference_static_periods(
+                observations, static_threshold, static_limit, static_counter)
+            np.testing.assert_array_equal(static_array, static_ref)
+            np.testing.assert_allclose(gravity, gravity_ref, atol=1e-12)
+            assert counter == counter_ref
+
+    def test_log_likelihood(self):
+        observations = _test_data()[:500, :] - [0, 0, 1]
+        kf = StaticDetectingPositionKalmanFilter(200)
+        kf = KalmanFilter(kf.transition_matrix, kf.transition_covariance, kf.observation_matrix,
+                          kf.observation_covariance, use_extension=False)
+        kf.set_initial_state(np.zeros((9, )), np.eye(9))
+        X, P = kf.X, kf.P
+        log_likelihood = 0.0
+        for observation in observations:
+            X, P = kf.kf_predict(X, P)
+            IM = kf.observation_matrix.dot(X)
+            IS = kf.observation_matrix.dot(P.dot(kf.observation_matrix.T)) + kf.observation_covariance
+            log_likelihood -= kf.gauss_pdf(observation, IM, IS, np.linalg.inv(IS))[1]
+            X, P, K, IM, IS = kf.kf_update(X, P, observation)
+        np.testing.assert_allclose(kf.log_likelihood(observations, chunk_size=128), log_likelihood, rtol=1e-10)
+
+    def test_log_likelihood_candidates(self):
+        observations = _test_data()
+        kf = StaticDetectingPositionKalmanFilter(200, 0.025, 0.2)
+        candidates = np.array([np.eye(3) * r for r in (1.0, 20.0, 100.0)])
+        log_likelihoods = kf.log_likelihood(observations, observation_covariance=candidates)
+        assert log_likelihoods.shape == (3, )
+        for candidate, log_likelihood in zip(candidates, log_likelihoods):
+            np.testing.assert_allclose(kf.log_likelihood(observations, observation_covariance=candidate),
+                                       log_likelihood, rtol=1e-10)
+        np.testing.assert_allclose(kf.log_likelihood(observations), log_likelihoods[1], rtol=1e-10)
+
+    def test_output_buffers(self):
+        observations = _test_data()
+        n = len(observations)
+        for use_extension in (False, True):
+            kf = StaticDetectingPositionKalmanFilter(200, 0.025, 0.2, use_extension=use_extension)
+            out = (np.empty((n, 9)), np.empty((n, )), np.empty((n, 3)))
+            result = kf.filter(observations, out=out)
+            assert all(r is o for r, o in zip(result, out))
+            kf = StaticDetectingPositionKalmanFilter(200, 0.025, 0.2, use_extension=use_extension)
+            for r, o in zip(kf.filter(observations), out):
+                np.testing.assert_array_equal(r, o)
+            out = np.empty((n, 9))
+            assert KalmanFilter.filter(kf, observations, out=out) is out
+
+    def test_multi_stream_filter(self):
+        observations = _test_data()
+        n = len(observations)
+        stacked = np.array([np.roll(observations, 100 * i, axis=0) for i in range(3)])
+        lengths = [n, n - 50, n - 200]
+        for steady_state in (False, True):
+            kf = MultiStreamPositionKalmanFilter(200, 3, 0.025, 0.2, steady_state=steady_state)
+            states, static, gravity = kf.filter(stacked, lengths)
+            assert states.shape == (3, n, 9)
+            for j, length in enumerate(lengths):
+                kf_j = StaticDetectingPositionKalmanFilter(200, 0.025, 0.2, steady_state, use_extension=False)
+                reference = kf_j.filter(stacked[j, :length, :])
+                np.testing.assert_allclose(states[j, :length, :], reference[0], atol=1e-12)
+                np.testing.assert_array_equal(static[j, :length], reference[1])
+                np.testing.assert_allclose(gravity[j, :length, :], reference[2], atol=1e-12)
+                assert np.isnan(states[j, length:, :]).all()
+                assert kf._static_counter[j] == kf_j._static_counter
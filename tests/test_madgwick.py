@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_madgwick`
+==================
+
+.. module:: test_madgwick
+   :platform: Unix, Windows
+   :synopsis: 
+
+.. moduleauthor:: hbldh <henrik.blidh@nedomkull.com>
+
+Created on 2026-10-18, 10:12
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import numpy as np
+
+from wlmetrics.filter.madgwick import MadgwickAHRSFilter, MultiStreamMadgwickAHRSFilter
+
+from tests.helpers import make_observations, reference_filter
+
+
+class TestSuiteMadgwick(object):
+    """Test Suite for the Madgwick AHRS filter wrapper."""
+
+    def test_batch_imu(self):
+        observations = make_observations(500, 6)
+        states = MadgwickAHRSFilter(100).filter(observations)
+        reference = reference_filter(MadgwickAHRSFilter(100), observations)
+        assert states.shape == (500, 4)
+        np.testing.assert_allclose(states, reference)
+
+    def test_batch_ahrs(self):
+        observations = make_observations(500, 9)
+        states = MadgwickAHRSFilter(100).filter(observations)
+        reference = reference_filter(MadgwickAHRSFilter(100), observations)
+        np.testing.assert_allclose(states, reference)
+
+    def test_batch_keeps_quaternion(self):
+        observations = make_observations(200, 6)
+        f = MadgwickAHRSFilter(100)
+        states = f.filter(observations[:100, :])
+        states = np.vstack([states, f.filter(observations[100:, :])])
+        np.testing.assert_allclose(states, MadgwickAHRSFilter(100).filter(observations))
+        np.testing.assert_allclose(f.quaternion.to_array(), states[-1, :])
+
+    def test_gain_per_instance(self):
+        observations = make_observations(300, 6)
+        states_1 = MadgwickAHRSFilter(100, beta=0.01).filter(observations)
+        states_2 = MadgwickAHRSFilter(100, beta=1.0).filter(observations)
+        assert np.abs(states_1 - states_2).max() > 1e-3
+        np.testing.assert_allclose(states_1, MadgwickAHRSFilter(100, beta=0.01).filter(observations))
+
+    def test_multi_stream(self):
+        for n_columns in (6, 9):
+            observations = np.array([make_observations(300, n_columns) * (1 + 0.1 * i) for i in range(5)])
+            observations[1, 50:100, :3] = 0.0
+            if n_columns == 9:
+                observations[2, 150:200, 6:] = 0.0
+            f = MultiStreamMadgwickAHRSFilter(100, 5, beta=0.2)
+            states = f.filter(observations)
+            reference = np.array([MadgwickAHRSFilter(100, beta=0.2).filter(o) for o in observations])
+            assert states.shape == (5, 300, 4)
+            np.testing.assert_allclose(states, reference, atol=1e-6)
+            np.testing.assert_allclose(f.quaternions, reference[:, -1, :], atol=1e-6)
+
+    def test_output_buffer(self):
+        observations = make_observations(300, 6)
+        out = np.empty((300, 4), 'float')
+        states = MadgwickAHRSFilter(100).filter(observations, out=out)
+        assert states is out
+        np.testing.assert_array_equal(out, MadgwickAHRSFilter(100).filter(observations))
+        out = np.empty((2, 300, 4), 'float')
+        states = MultiStreamMadgwickAHRSFilter(100, 2).filter(np.array([observations] * 2), out=out)
+        assert states is out
+        np.testing.assert_array_equal(out[1], MadgwickAHRSFilter(100).filter(observations).astype('float32'))
+        try:
+            MadgwickAHRSFilter(100).filter(observations, out=np.empty((299, 4)))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Wrong output shape was accepted.")
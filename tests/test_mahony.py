@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_mahony`
+==================
+
+.. module:: test_mahony
+   :platform: Unix, Windows
+   :synopsis: 
+
+.. moduleauthor:: hbldh <henrik.blidh@nedomkull.com>
+
+Created on 2026-10-18, 11:05
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import numpy as np
+
+from wlmetrics.filter.mahony import MahonyAHRSFilter
+
+from tests.helpers import make_observations, reference_filter
+
+
+class TestSuiteMahony(object):
+    """Test Suite for the Mahony AHRS filter wrapper."""
+
+    def test_batch_imu(self):
+        observations = make_observations(500, 6)
+        states = MahonyAHRSFilter(100).filter(observations)
+        reference = reference_filter(MahonyAHRSFilter(100), observations)
+        assert states.shape == (500, 4)
+        np.testing.assert_allclose(states, reference)
+
+    def test_batch_ahrs(self):
+        observations = make_observations(500, 9)
+        states = MahonyAHRSFilter(100).filter(observations)
+        reference = reference_filter(MahonyAHRSFilter(100), observations)
+        np.testing.assert_allclose(states, reference)
+
+    def test_batch_keeps_quaternion(self):
+        observations = make_observations(200, 6)
+        f = MahonyAHRSFilter(100)
+        states = f.filter(observations[:100, :])
+        states = np.vstack([states, f.filter(observations[100:, :])])
+        np.testing.assert_allclose(states, MahonyAHRSFilter(100).filter(observations))
+        np.testing.assert_allclose(f.quaternion.to_array(), states[-1, :])
+
+    def test_instances_are_independent(self):
+        observations = make_observations(200, 6)
+        f_1 = MahonyAHRSFilter(100)
+        f_2 = MahonyAHRSFilter(100)
+        states_1 = f_1.filter(observations)
+        f_2.filter(observations[::-1, :])
+        np.testing.assert_allclose(f_1.filter(observations),
+                                   MahonyAHRSFilter(100).filter(np.vstack([observations, observations]))[200:, :])
+        assert f_1.integral_feedback is not f_2.integral_feedback
+        assert states_1.shape == (200, 4)
+
+    def test_integral_gain(self):
+        observations = make_observations(300, 6)
+        f = MahonyAHRSFilter(100, kp=0.5, ki=0.1)
+        states = f.filter(observations)
+        reference = reference_filter(MahonyAHRSFilter(100, kp=0.5, ki=0.1), observations)
+        np.testing.assert_allclose(states, reference, atol=1e-6)
+        assert np.abs(f.integral_feedback).max() > 0
+        assert np.abs(states - MahonyAHRSFilter(100).filter(observations)).max() > 1e-4
+
+    def test_output_buffer(self):
+        observations = make_observations(300, 6)
+        out = np.empty((300, 4), 'float')
+        states = MahonyAHRSFilter(100, ki=0.1).filter(observations, out=out)
+        assert states is out
+        np.testing.assert_array_equal(out, MahonyAHRSFilter(100, ki=0.1).filter(observations))
+
+    def test_wrong_integral_feedback(self):
+        f = MahonyAHRSFilter(100, ki=0.1)
+        f.integral_feedback = np.zeros((4, ), 'float')
+        np.testing.assert_raises(ValueError, f.filter, make_observations(10, 6))
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_orientation`
+==================
+
+.. module:: test_orientation
+   :platform: Unix, Windows
+   :synopsis:
+
+.. moduleauthor:: hbldh <henrik.blidh@nedomkull.com>
+
+Created on 2026-10-18, 19:30
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import numpy as np
+
+from wlmetrics.quaternion import Quaternion, QuaternionArray
+from wlmetrics.orientation import rotate_vectors, to_rotation_matrices, from_rotation_matrices, \
+    to_euler_angles, from_euler_angles, to_rotation_vectors, from_rotation_vectors, slerp, nlerp, resample
+
+
+class TestSuiteOrientation(object):
+    """Test Suite for the orientation stream operations."""
+
+    @staticmethod
+    def _quaternions(n=100):
+        rs = np.random.RandomState(7)
+        q = rs.randn(n, 4)
+        return q / np.sqrt(np.sum(q ** 2, axis=1))[:, np.newaxis]
+
+    def test_rotate_vectors(self):
+        q = self._quaternions()
+        v = np.random.RandomState(8).randn(len(q), 3)
+        reference = np.array([(Quaternion(qi) * Quaternion([0, vi[0], vi[1], vi[2]]) *
+                               Quaternion(qi).conjugate()).imag for qi, vi in zip(q, v)])
+        np.testing.assert_allclose(rotate_vectors(q, v), reference, atol=1e-12)
+        np.testing.assert_allclose(rotate_vectors(QuaternionArray(q), v), reference, atol=1e-12)
+        np.testing.assert_allclose(rotate_vectors(q, reference, inverse=True), v, atol=1e-12)
+
+    def test_rotate_vectors_gravity(self):
+        # A rotation of 90 degrees around the x axis takes the sensor y axis to the world z axis.
+        q = np.tile([np.cos(np.pi / 4), np.sin(np.pi / 4), 0, 0], (3, 1))
+        v = np.array([[0, 1.0, 0], [0, 1.5, 0], [1.0, 1.0, 0]])
+        np.testing.assert_allclose(rotate_vectors(q, v, gravity=1.0),
+                                   [[0, 0, 0], [0, 0, 0.5], [1.0, 0, 0]], atol=1e-12)
+        out = np.empty((3, 3))
+        assert rotate_vectors(q, v, gravity=[0, 0, 1.0], out=out) is out
+
+    def test_rotation_matrices_orthonormal(self):
+        matrices = to_rotation_matrices(self._quaternions() * 3.0)
+        np.testing.assert_allclose(np.matmul(matrices, np.swapaxes(matrices, 1, 2)),
+                                   np.tile(np.eye(3), (len(matrices), 1, 1)), atol=1e-12)
+        np.testing.assert_allclose(np.linalg.det(matrices), 1.0)
+
+    def test_rotation_matrices_round_trip(self):
+        q = self._quaternions()
+        q[:10, 0] = 0.0
+        q[10:20, :] = [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1], [0, 0, 0, -1],
+                       [1e-9, 1, 0, 0], [0.5, 0.5, 0.5, 0.5], [0, 0, 1, 1], [-1, 0, 0, 0], [-1, 1e-9, 0, 0]]
+        q /= np.sqrt(np.sum(q ** 2, axis=1))[:, np.newaxis]
+        q_back = from_rotation_matrices(to_rotation_matrices(q))
+        assert np.all(q_back[:, 0] >= 0)
+        np.testing.assert_allclose(np.abs(np.sum(q * q_back, axis=1)), 1.0, atol=1e-12)
+
+    def test_euler_angles(self):
+        q = self._quaternions()
+        angles = to_euler_angles(q)
+        np.testing.assert_allclose(np.abs(np.sum(from_euler_angles(angles) * q, axis=1)), 1.0, atol=1e-12)
+        # Roll, then pitch, then yaw.
+        q = from_euler_angles([[0.1, 0.2, 0.3]])
+        reference = (Quaternion([np.cos(0.15), 0, 0, np.sin(0.15)]) * Quaternion([np.cos(0.1), 0, np.sin(0.1), 0]) *
+                     Quaternion([np.cos(0.05), np.sin(0.05), 0, 0]))
+        np.testing.assert_allclose(q[0], reference.to_array(), atol=1e-15)
+        np.testing.assert_allclose(to_euler_angles(q), [[0.1, 0.2, 0.3]], atol=1e-12)
+
+    def test_euler_angles_gimbal_lock(self):
+        for pitch in (np.pi / 2, -np.pi / 2):
+            q = from_euler_angles([[0.3, pitch, 0.5], [0.0, pitch, -3.0], [2.0, pitch, 2.5]])
+            angles = to_euler_angles(q)
+            np.testing.assert_allclose(angles[:, 0], 0.0)
+            np.testing.assert_allclose(angles[:, 1], pitch)
+            np.testing.assert_allclose(np.abs(np.sum(from_euler_angles(angles) * q, axis=1)), 1.0, atol=1e-12)
+
+    def test_rotation_vectors(self):
+        q = self._quaternions()
+        q[:3, :] = [[1, 0, 0, 0], [1, 1e-12, 0, 0], [0, 0, 1, 0]]
+        q /= np.sqrt(np.sum(q ** 2, axis=1))[:, np.newaxis]
+        vectors = to_rotation_vectors(q)
+        np.testing.assert_allclose(vectors[:3, :], [[0, 0, 0], [2e-12, 0, 0], [0, np.pi, 0]], atol=1e-15)
+        assert np.all(np.sqrt(np.sum(vectors ** 2, axis=1)) <= np.pi + 1e-12)
+        np.testing.assert_allclose(np.abs(np.sum(from_rotation_vectors(vectors) * q, axis=1)), 1.0, atol=1e-12)
+
+    def test_slerp(self):
+        q0 = from_rotation_vectors([[0, 0, 0.0]] * 4)
+        q1 = -from_rotation_vectors([[0, 0, 2.0]] * 4)
+        t = np.array([0.0, 0.25, 0.5, 1.0])
+        np.testing.assert_allclose(to_rotation_vectors(slerp(q0, q1, t)), np.outer(2 * t, [0, 0, 1]), atol=1e-12)
+        np.testing.assert_allclose(slerp(q0, q0, t), q0, atol=1e-15)
+        np.testing.assert_allclose(np.abs(np.sum(nlerp(q0, q1, t) * slerp(q0, q1, t), axis=1)), 1.0, atol=1e-2)
+
+    def test_resample(self):
+        q = self._quaternions(20)
+        timestamps = np.cumsum(np.random.RandomState(9).uniform(0.005, 0.015, 20))
+        np.testing.assert_allclose(np.abs(np.sum(resample(timestamps, q, timestamps) * q, axis=1)), 1.0)
+        new_timestamps = np.linspace(timestamps[0] - 1, timestamps[-1] + 1, 200)
+        for method in ('slerp', 'nlerp'):
+            resampled = resample(timestamps, q, new_timestamps, method=method)
+            np.testing.assert_allclose(resampled[0], q[0])
+            np.testing.assert_allclose(np.abs(np.dot(resampled[-1], q[-1])), 1.0)
+            i = 100
+            j = np.searchsorted(timestamps, new_timestamps[i]) - 1
+            t = (new_timestamps[i] - timestamps[j]) / (timestamps[j + 1] - timestamps[j])
+            expected = (slerp if method == 'slerp' else nlerp)(q[j:j + 1], q[j + 1:j + 2], [t])
+            np.testing.assert_allclose(resampled[i], expected[0])
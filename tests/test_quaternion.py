@@ -23,7 +23,7 @@ import copy
 
 import numpy as np
 
-from wlmetrics.quaternion import Quaternion
+from wlmetrics.quaternion import Quaternion, QuaternionArray
 
 
 class TestSuiteQuaternion(object):
@@ -66,6 +66,15 @@ class TestSuiteQuaternion(object):
         q2 = Quaternion(np.random.rand(4))
         np.testing.assert_allclose((q1 - q2).to_array() - (q1.to_array() - q2.to_array()), 0.0)
 
+    def test_sub_scalar(self):
+        x = np.random.rand(4)
+        expected = x - [1.5, 0, 0, 0]
+        np.testing.assert_allclose((Quaternion(x) - 1.5).to_array(), expected)
+        q = Quaternion(x)
+        q -= 1.5
+        np.testing.assert_allclose(q.to_array(), expected)
+        np.testing.assert_allclose((QuaternionArray(x[np.newaxis, :]) - 1.5).to_array(), [expected])
+
     def test_multiply_1(self):
 
         def test_fcn(q1, q2):
@@ -114,3 +123,75 @@ class TestSuiteQuaternion(object):
         q.normalize()
         np.testing.assert_allclose((q.conjugate() - Quaternion([q.w, -q.x, -q.y, -q.z])).to_array(), 0.0)
 
+    def test_inplace_operators(self):
+        q = Quaternion(np.random.rand(4))
+        q_ref = q
+        x = q.to_array()
+        q += Quaternion.i()
+        q *= Quaternion.j()
+        q -= 1.0
+        q /= 2.0
+        assert q is q_ref
+        expected = (Quaternion(x) + Quaternion.i()) * Quaternion.j()
+        expected = Quaternion(expected.to_array() - [1, 0, 0, 0]) / 2.0
+        np.testing.assert_allclose(q.to_array(), expected.to_array())
+
+    def test_rmul_not_implemented(self):
+        assert Quaternion.i().__rmul__([1]) is NotImplemented
+        np.testing.assert_allclose((2 * Quaternion.i()).to_array(), [0, 2, 0, 0])
+
+
+class TestSuiteQuaternionArray(object):
+    """Test Suite for QuaternionArray class."""
+
+    @staticmethod
+    def _quaternions(n=50):
+        return np.random.randn(n, 4)
+
+    def test_multiply(self):
+        x, y = self._quaternions(), self._quaternions()
+        reference = np.array([(Quaternion(a) * Quaternion(b)).to_array() for a, b in zip(x, y)])
+        np.testing.assert_allclose((QuaternionArray(x) * QuaternionArray(y)).to_array(), reference)
+
+    def test_multiply_broadcast(self):
+        x = self._quaternions()
+        q = Quaternion(np.random.randn(4))
+        np.testing.assert_allclose((q * QuaternionArray(x)).to_array(),
+                                   np.array([(q * Quaternion(a)).to_array() for a in x]))
+        np.testing.assert_allclose((QuaternionArray(x) * q).to_array(),
+                                   np.array([(Quaternion(a) * q).to_array() for a in x]))
+        np.testing.assert_allclose((2 * QuaternionArray(x)).to_array(), 2 * x)
+
+    def test_conjugate_inverse(self):
+        x = self._quaternions()
+        qs = QuaternionArray(x)
+        np.testing.assert_allclose(qs.conjugate().to_array(),
+                                   np.array([Quaternion(a).conjugate().to_array() for a in x]))
+        np.testing.assert_allclose((qs * qs.inverse()).to_array(), np.tile([1.0, 0, 0, 0], (len(x), 1)), atol=1e-12)
+
+    def test_norm_normalize(self):
+        x = self._quaternions()
+        qs = QuaternionArray(x)
+        np.testing.assert_allclose(qs.norm(), np.sqrt(np.sum(x ** 2, axis=1)))
+        qs.normalize()
+        np.testing.assert_allclose(qs.norm(), 1.0)
+        np.testing.assert_allclose(qs[3].to_array(), x[3] / np.linalg.norm(x[3]))
+
+
+    def test_mixed_operations(self):
+        x = self._quaternions()
+        q = Quaternion(np.random.randn(4))
+        qs = QuaternionArray(x)
+        np.testing.assert_allclose((q + qs).to_array(), q.to_array() + x)
+        np.testing.assert_allclose((qs + q).to_array(), x + q.to_array())
+        np.testing.assert_allclose((q - qs).to_array(), q.to_array() - x)
+        np.testing.assert_allclose((qs - q).to_array(), x - q.to_array())
+        np.testing.assert_allclose((q / qs).to_array(),
+                                   np.array([(q / Quaternion(a)).to_array() for a in x]))
+        np.testing.assert_allclose((qs / q).to_array(),
+                                   np.array([(Quaternion(a) / q).to_array() for a in x]))
+        np.testing.assert_allclose((2.0 + qs).to_array()[:, 0], 2.0 + x[:, 0])
+        np.testing.assert_allclose((qs + 2.0).to_array()[:, 1:], x[:, 1:])
+        np.testing.assert_allclose((2.0 - qs).to_array(), np.column_stack([2.0 - x[:, 0], -x[:, 1:]]))
+        np.testing.assert_allclose((2.0 / qs).to_array(), (qs.inverse() * 2).to_array())
+        np.testing.assert_allclose((qs / 2.0).to_array(), x / 2.0)
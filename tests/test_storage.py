@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_storage`
+==================
+
+.. module:: test_storage
+   :platform: Unix, Windows
+   :synopsis:
+
+.. moduleauthor:: hbldh <henrik.blidh@nedomkull.com>
+
+Created on 2026-10-18, 20:40
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import os
+import json
+import shutil
+import tempfile
+
+import numpy as np
+
+from wlmetrics import storage
+
+_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'wlmetrics', 'data')
+
+
+class TestSuiteStorage(object):
+    """Test Suite for the binary storage format."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    setup_method = setUp
+    teardown_method = tearDown
+
+    def test_round_trip(self):
+        channels = {
+            'timestamps': np.arange(100, dtype='float') / 100,
+            'accelerometer': np.random.randn(100, 3),
+            'pressure': np.arange(100, dtype='int16'),
+            'temperature': None,
+        }
+        header = {'recorded': '2015-07-29 17:48:17', 'name': 'test'}
+        file_path = os.path.join(self.directory, 'test.wlmb')
+        storage.write_binary(file_path, header, channels)
+        assert storage.is_binary(file_path)
+        for mmap in (True, False):
+            header_read, data = storage.read_binary(file_path, mmap=mmap)
+            assert header_read == header
+            assert sorted(data) == ['accelerometer', 'pressure', 'timestamps']
+            for name in data:
+                np.testing.assert_array_equal(data[name], channels[name])
+                assert data[name].dtype == channels[name].dtype
+        header_read, data = storage.read_binary(file_path, channels=['accelerometer'])
+        assert list(data) == ['accelerometer']
+        assert not data['accelerometer'].flags.writeable
+
+    def test_convert_json(self):
+        json_path = os.path.join(_DATA_DIR, 'rec_2_1.json')
+        binary_path = storage.convert_json_to_binary(json_path, os.path.join(self.directory, 'rec.wlmb'))
+        assert not storage.is_binary(json_path)
+        with open(json_path, 'rt') as f:
+            doc = json.load(f)
+        header, data = storage.read_binary(binary_path)
+        assert header['recorded'] == doc['recorded']
+        assert header['calibration_parameters'] == doc['calibration_parameters']
+        for name in storage.CHANNELS:
+            if doc['data'].get(name) is None:
+                assert name not in data
+            else:
+                np.testing.assert_array_equal(data[name], doc['data'][name])
+        assert os.path.getsize(binary_path) < os.path.getsize(json_path) / 2
+
+    def test_read_json(self):
+        for file_name in ('rec_1.json', 'rec_2_1.json'):
+            json_path = os.path.join(_DATA_DIR, file_name)
+            with open(json_path, 'rt') as f:
+                doc = json.load(f)
+            data = doc.pop('data')
+            header, decoders = storage.read_json(json_path)
+            assert header == doc
+            assert sorted(decoders) == sorted(name for name in data if data[name] is not None)
+            for name in decoders:
+                np.testing.assert_array_equal(decoders[name](), data[name])
+                # The decoders keep only their own part of the file.
+                assert len(decoders[name].args[0]) < os.path.getsize(json_path) / 2
+
+    def test_read_json_strings(self):
+        doc = {'name': 'a "quoted\\\\" name}', 'data': {'timestamps': [0.0, 0.5], 'note': '[{,}', 'x': None}}
+        json_path = os.path.join(self.directory, 'test.json')
+        for indent in (None, 2):
+            with open(json_path, 'wt') as f:
+                json.dump(doc, f, indent=indent)
+            header, decoders = storage.read_json(json_path)
+            assert header == {'name': doc['name']}
+            np.testing.assert_array_equal(decoders['timestamps'](), [0.0, 0.5])
+            assert decoders['note']() == '[{,}'
+            assert 'x' not in decoders
+
+    def _write_chunked(self, file_path, n, close=True):
+        timestamps = np.arange(n, dtype='float') / 100
+        accelerometer = np.random.randn(n, 3)
+        writer = storage.ChunkedWriter(file_path, {'name': 'test'},
+                                       {'timestamps': 'float', 'accelerometer': ('float32', 3)},
+                                       chunk_size=100, flush_interval=None)
+        for i in range(n // 2):
+            writer.append(timestamps=timestamps[i], accelerometer=accelerometer[i])
+        writer.append(timestamps=timestamps[n // 2:], accelerometer=accelerometer[n // 2:])
+        if close:
+            writer.close()
+        return writer, timestamps, accelerometer.astype('float32')
+
+    def test_chunked(self):
+        file_path = os.path.join(self.directory, 'test.wlmc')
+        writer, timestamps, accelerometer = self._write_chunked(file_path, 1050)
+        assert writer.n_samples == 1050
+        assert storage.is_chunked(file_path)
+        assert not storage.is_binary(file_path)
+        header, data = storage.read_chunked(file_path)
+        assert header == {'name': 'test'}
+        np.testing.assert_array_equal(data['timestamps'], timestamps)
+        np.testing.assert_array_equal(data['accelerometer'], accelerometer)
+        assert data['accelerometer'].dtype == np.dtype('float32')
+
+    def test_chunked_partial(self):
+        file_path = os.path.join(self.directory, 'test.wlmc')
+        writer, timestamps, accelerometer = self._write_chunked(file_path, 1050, close=False)
+        header, data = storage.read_chunked(file_path)
+        np.testing.assert_array_equal(data['timestamps'], timestamps[:1000])
+        writer.flush()
+        header, data = storage.read_chunked(file_path, channels=['accelerometer'])
+        assert list(data) == ['accelerometer']
+        np.testing.assert_array_equal(data['accelerometer'], accelerometer)
+        writer.close()
+
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        with open(file_path, 'wb') as f:
+            f.write(raw[:len(raw) - 1000])
+        header, data = storage.read_chunked(file_path)
+        assert len(data['timestamps']) == 1000
+        np.testing.assert_array_equal(data['accelerometer'], accelerometer[:1000])
+
+    def test_read_layout(self):
+        file_path = os.path.join(self.directory, 'test.wlmc')
+        writer, _, _ = self._write_chunked(file_path, 1050, close=False)
+        assert storage.read_layout(file_path) == ({'name': 'test'},
+                                                  {'timestamps': (1000, ), 'accelerometer': (1000, 3)})
+        writer.close()
+        assert storage.read_layout(file_path)[1]['timestamps'] == (1050, )
+
+        json_path = os.path.join(_DATA_DIR, 'rec_1.json')
+        binary_path = storage.convert_json_to_binary(
+            json_path, os.path.join(self.directory, 'rec.wlmb'), encode=True, compression='zlib')
+        header, shapes = storage.read_layout(binary_path)
+        assert header['recorded'] == '2015-07-29 17:48:17'
+        assert shapes == {'timestamps': (2929, ), 'accelerometer': (2929, 3),
+                          'gyroscope': (2929, 3), 'magnetometer': (2929, 3)}
+
+    def test_count_samples(self):
+        file_path = os.path.join(self.directory, 'test.wlmc')
+        self._write_chunked(file_path, 1050)
+        assert storage.count_samples(file_path) == 1050
+        json_path = os.path.join(_DATA_DIR, 'rec_1.json')
+        assert storage.count_samples(json_path) == 2929
+        binary_path = storage.convert_json_to_binary(
+            json_path, os.path.join(self.directory, 'rec.wlmb'), encode=True)
+        assert storage.count_samples(binary_path) == 2929
+
+        for timestamps, expected in (('[]', 0), ('[ 0.5 ]', 1), ('[0, 1e-3,2]', 3), ('null', None)):
+            file_path = os.path.join(self.directory, 'test.json')
+            with open(file_path, 'wt') as f:
+                f.write('{"name": "a, b", "data": {"timestamps": ' + timestamps + '}}')
+            assert storage.count_samples(file_path) == expected
+        with open(file_path, 'wt') as f:
+            f.write('{"name": "test"}')
+        assert storage.count_samples(file_path) is None
+
+    def test_encoded(self):
+        json_path = os.path.join(_DATA_DIR, 'rec_gyro.json')
+        header, data = storage.read_recording(json_path)
+        sizes = []
+        for encode, compression in ((False, None), (True, None), (True, 'zlib'), (False, 'zlib'), (True, 'lzma')):
+            binary_path = storage.convert_json_to_binary(
+                json_path, os.path.join(self.directory, 'rec.wlmb'), encode=encode, compression=compression)
+            sizes.append(os.path.getsize(binary_path))
+            for mmap in (True, False):
+                _, decoded = storage.read_binary(binary_path, mmap=mmap)
+                for name in data:
+                    np.testing.assert_array_equal(decoded[name], data[name])
+                    assert decoded[name].dtype == np.dtype('float')
+        assert sizes[1] < sizes[0] / 4
+        assert sizes[2] < sizes[1]
+
+    def test_encoded_values(self):
+        file_path = os.path.join(self.directory, 'test.wlmb')
+        channels = {
+            'empty': np.zeros((0, 3)),
+            'floats': np.array([0.1, np.nan, np.inf]),
+            'large': np.array([[-2 ** 62, 2 ** 40], [2 ** 62, 0]], 'int64'),
+            'counts': np.cumsum(np.random.randint(-5, 6, (1000, 3)), axis=0).astype('float32'),
+            'timestamps': 1438192097.518525 + np.round(np.arange(1000) * 0.0101 * 1e6) / 1e6,
+        }
+        storage.write_binary(file_path, {}, channels, encode=True, compression='zlib', chunk_size=100)
+        _, decoded = storage.read_binary(file_path)
+        for name in channels:
+            np.testing.assert_array_equal(decoded[name], channels[name])
+            assert decoded[name].dtype == channels[name].dtype
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_tuning`
+==================
+
+.. module:: test_tuning
+   :platform: Unix, Windows
+   :synopsis: 
+
+.. moduleauthor:: hbldh <henrik.blidh@nedomkull.com>
+
+Created on 2026-10-18, 14:20
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import numpy as np
+
+from wlmetrics.filter.madgwick import MadgwickAHRSFilter
+from wlmetrics.filter.kalman import detect_static_periods
+from wlmetrics.filter.tuning import gain_sweep, static_ranges, static_drift
+
+
+class _Recording(object):
+
+    def __init__(self, seed, n=1000, frequency=100.):
+        rs = np.random.RandomState(seed)
+        self.timestamps = np.arange(n) / frequency
+        self.accelerometer = np.tile([0.0, 0.0, 1.0], (n, 1)) + rs.randn(n, 3) * 0.005
+        self.accelerometer[300:600, :] += rs.randn(300, 3) * 0.5
+        self.gyroscope = rs.randn(n, 3) * 0.01 + 0.02
+        self.magnetometer = None
+
+
+class TestSuiteTuning(object):
+    """Test Suite for the AHRS filter gain sweeps."""
+
+    def test_static_ranges(self):
+        accelerometer = np.tile([0.0, 0.0, 1.0], (100, 1))
+        accelerometer[10:20, :] = 2.0
+        accelerometer[60:62, :] = 2.0
+        ranges = static_ranges(accelerometer, 10., static_time=1.0)
+        # Lying still after more than 10 static samples in a row.
+        np.testing.assert_array_equal(ranges, [[30, 60], [72, 100]])
+        static_array, _, _ = detect_static_periods(accelerometer, 0.1, 10.)
+        expected = np.zeros((100, ), 'bool')
+        for start, stop in ranges:
+            expected[start:stop] = True
+        np.testing.assert_array_equal(static_array == 1, expected)
+
+    def test_static_drift(self):
+        quaternions = np.tile([1.0, 0.0, 0.0, 0.0], (100, 1))
+        angle = 0.1
+        quaternions[50:, :] = [np.cos(angle / 2), np.sin(angle / 2), 0.0, 0.0]
+        np.testing.assert_allclose(static_drift(quaternions, np.array([[0, 100]]), 100.), angle)
+        assert np.isnan(static_drift(quaternions, np.zeros((0, 2), 'int'), 100.))
+
+    def test_gain_sweep(self):
+        recordings = [_Recording(0), _Recording(1)]
+        gains = [{'beta': 0.01}, {'beta': 0.1}, {'beta': 1.0}]
+        scores = gain_sweep(recordings, gains, processes=2)
+        assert scores.shape == (2, 3)
+        np.testing.assert_array_equal(scores, gain_sweep(recordings, gains, processes=1))
+
+        ranges = static_ranges(recordings[1].accelerometer, 100.)
+        observations = np.hstack([recordings[1].accelerometer, recordings[1].gyroscope])
+        np.testing.assert_allclose(
+            scores[1, 2], static_drift(MadgwickAHRSFilter(100., beta=1.0).filter(observations), ranges, 100.))
@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`catalog`
+==================
+
+.. module:: catalog
+   :platform: Unix, Windows
+   :synopsis: Index of the recordings in a directory.
+
+.. moduleauthor:: hbldh <henrik.blidh@nedomkull.com>
+
+Created on 2026-10-18, 22:30
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import os
+import json
+import zlib
+import struct
+import datetime
+
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
+from wlmetrics import storage
+
+__all__ = ['Catalog', 'describe']
+
+INDEX_FILE_NAME = '.wlmetrics-catalog.json'
+INDEX_VERSION = 1
+RECORDING_EXTENSIONS = ('.json', storage.BINARY_EXTENSION, storage.CHUNKED_EXTENSION)
+# Errors of reading files that are not recordings, or are truncated or corrupt.
+_READ_ERRORS = (ValueError, KeyError, IndexError, struct.error, zlib.error) + \
+    ((lzma.LZMAError, ) if lzma is not None else ())
+
+
+def describe(file_path):
+    """Read the metadata of a recording, without reading more of its channels
+    than the timestamps.
+
+    The channels of binary and chunked files are listed from their header,
+    and only the timestamps are decoded, for the duration.
+
+    :param file_path: Path to the recording, in any of the formats of
+        :py:mod:`wlmetrics.storage`.
+    :type file_path: str
+    :return: The metadata entry, or None if the file is not a recording.
+    :rtype: dict
+
+    """
+    if storage.is_binary(file_path):
+        file_format = 'binary'
+        header, shapes = storage.read_layout(file_path)
+        channels = list(shapes)
+        timestamps = storage.read_binary(file_path, channels=['timestamps'])[1].get('timestamps')
+    elif storage.is_chunked(file_path):
+        file_format = 'chunked'
+        header, shapes = storage.read_layout(file_path)
+        channels = list(shapes)
+        timestamps = storage.read_chunked(file_path, channels=['timestamps'])[1].get('timestamps')
+    else:
+        file_format = 'json'
+        header, decoders = storage.read_json(file_path)
+        if 'recorded' not in header:
+            return None
+        channels = list(decoders)
+        timestamps = decoders['timestamps']() if 'timestamps' in decoders else None
+
+    entry = {
+        'format': file_format,
+        'recorded': header.get('recorded'),
+        'name': header.get('name'),
+        'client_settings': header.get('client_settings'),
+        'channels': sorted(name for name in channels if name in storage.CHANNELS),
+        'n_samples': None,
+        'duration': None,
+    }
+    if timestamps is not None:
+        entry['n_samples'] = len(timestamps)
+        entry['duration'] = float(timestamps[-1] - timestamps[0]) if len(timestamps) else 0.0
+    return entry
+
+
+class Catalog(object):
+    """An index of the recordings in a directory.
+
+    The header metadata, sample count, duration and channels of each recording
+    are stored in an index file in the directory, together with the
+    modification time and size of the file. :py:meth:`update` only reads the
+    recordings that are new or changed since the last update, and queries
+    only use the index.
+
+    .. code-block:: python
+
+        catalog = Catalog('recordings')
+        catalog.update()
+        for entry in catalog.find(recorded_after='2015-08-01', channels=['gyroscope']):
+            recording = BerryIMUDataContainer.load(entry['path'])
+
+    :param directory: The directory with recordings.
+    :type directory: str
+    :param index_path: Path to the index file. Defaults to a file
+        ``.wlmetrics-catalog.json`` in the directory.
+    :type index_path: str
+
+    """
+
+    def __init__(self, directory, index_path=None):
+        self.directory = os.path.abspath(directory)
+        self.index_path = os.path.abspath(index_path or os.path.join(self.directory, INDEX_FILE_NAME))
+        self._entries = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'rt') as f:
+                doc = json.load(f)
+            if doc.get('version') == INDEX_VERSION:
+                self._entries = doc.get('entries', {})
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    @property
+    def entries(self):
+        """The entries of all recordings in the index, sorted by recording time."""
+        entries = [self._entry(file_name) for file_name, entry in self._entries.items()
+                   if entry.get('recording')]
+        return sorted(entries, key=lambda e: (e['recorded'] or '', e['file']))
+
+    def _entry(self, file_name):
+        return dict(self._entries[file_name], file=file_name,
+                    path=os.path.join(self.directory, file_name))
+
+    def update(self):
+        """Update the index with the new, changed and removed files of the directory.
+
+        :return: The number of files that were read.
+        :rtype: int
+
+        """
+        entries = {}
+        n_read = 0
+        for file_name in sorted(os.listdir(self.directory)):
+            file_path = os.path.join(self.directory, file_name)
+            if (os.path.splitext(file_name)[1] not in RECORDING_EXTENSIONS or
+                    os.path.abspath(file_path) == self.index_path or not os.path.isfile(file_path)):
+                continue
+            stat = os.stat(file_path)
+            entry = self._entries.get(file_name)
+            if entry is None or entry['mtime'] != stat.st_mtime or entry['size'] != stat.st_size:
+                try:
+                    entry = describe(file_path)
+                except _READ_ERRORS:
+                    entry = None
+                entry = dict(entry or {}, recording=entry is not None,
+                             mtime=stat.st_mtime, size=stat.st_size)
+                n_read += 1
+            entries[file_name] = entry
+
+        if n_read or set(entries) != set(self._entries):
+            self._entries = entries
+            self.save()
+        return n_read
+
+    def save(self):
+        """Write the index file."""
+        temporary_path = self.index_path + '.tmp'
+        with open(temporary_path, 'wt') as f:
+            json.dump({'version': INDEX_VERSION, 'directory': self.directory,
+                       'entries': self._entries}, f, indent=1, sort_keys=True)
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
+        os.rename(temporary_path, self.index_path)
+
+    def find(self, recorded_after=None, recorded_before=None, name=None,
+             min_samples=None, min_duration=None, channels=None):
+        """Find recordings in the index.
+
+        :param recorded_after: Only recordings started at or after this time,
+            as a :py:class:`datetime.datetime` or a ``'%Y-%m-%d %H:%M:%S'``
+            string, or a prefix of one such as ``'2015-08'``.
+        :param recorded_before: Only recordings started before this time.
+        :param name: Only recordings with this name.
+        :type name: str
+        :param min_samples: Only recordings with at least this many samples.
+        :type min_samples: int
+        :param min_duration: Only recordings at least this long, in the unit of the timestamps.
+        :type min_duration: float
+        :param channels: Only recordings with all these channels.
+        :type channels: list
+        :return: The entries of the matching recordings, sorted by recording time.
+            The ``path`` of an entry is the path of the recording file.
+        :rtype: list
+
+        """
+        if isinstance(recorded_after, datetime.datetime):
+            recorded_after = recorded_after.strftime('%Y-%m-%d %H:%M:%S')
+        if isinstance(recorded_before, datetime.datetime):
+            recorded_before = recorded_before.strftime('%Y-%m-%d %H:%M:%S')
+
+        out = []
+        for entry in self.entries:
+            if recorded_after is not None and (entry['recorded'] or '') < recorded_after:
+                continue
+            if recorded_before is not None and (entry['recorded'] or '') >= recorded_before:
+                continue
+            if name is not None and entry['name'] != name:
+                continue
+            if min_samples is not None and (entry['n_samples'] or 0) < min_samples:
+                continue
+            if min_duration is not None and (entry['duration'] or 0.0) < min_duration:
+                continue
+            if channels is not None and not set(channels).issubset(entry['channels']):
+                continue
+            out.append(entry)
+        return out
@@ -21,12 +21,16 @@ from __future__ import absolute_import
 
 import os
 import json
+import numbers
 import datetime
+import functools
 
 import numpy as np
 
 from pyberryimu import version
 
+from wlmetrics import storage
+
 
 class BerryIMUDataContainer(object):
 
@@ -46,92 +50,226 @@ class BerryIMUDataContainer(object):
             'pressure': None,
             'temperature': None
         }
+        # Functions decoding channels not yet read from file, see :py:meth:`load`.
+        self._decoders = {}
+        # Structured array holding all channels, see :py:meth:`pack`.
+        self._records = None
 
     def __str__(self):
-        "{0}, {1} samples".format(self.start_time.strftime('%Y-%m-%d %H:%M:%S'), len(self))
+        return "{0}, {1} samples".format(self.start_time.strftime('%Y-%m-%d %H:%M:%S'), len(self))
 
     def __len__(self):
         return len(self.timestamps) if self.timestamps is not None else 0
 
+    def __getitem__(self, item):
+        """Slice the recording, by time or by sample index.
+
+        ``recording[t0:t1]`` with float bounds gives the samples with
+        timestamps in ``[t0, t1)``, found by binary search in the timestamps,
+        and ``recording[i0:i1:step]`` with integer bounds slices by index.
+
+        The result is a container sharing the metadata and viewing the same
+        channel arrays; nothing is copied. Channels not yet decoded are sliced
+        when first accessed.
+
+        :param item: The slice.
+        :type item: slice
+        :return: A view of the slice of the recording.
+        :rtype: :py:class:`BerryIMUDataContainer`
+
+        """
+        if not isinstance(item, slice):
+            raise TypeError("Recordings can only be sliced, by time or by index.")
+        bounds = [b for b in (item.start, item.stop) if b is not None]
+        if any(not isinstance(b, numbers.Integral) for b in bounds):
+            if item.step is not None:
+                raise ValueError("Slicing by time does not take a step.")
+            return self.time_slice(item.start, item.stop)
+        return self._view(item)
+
+    def time_slice(self, t0=None, t1=None):
+        """The samples with timestamps in ``[t0, t1)``, as a view.
+
+        :param t0: Start time, in the unit of the timestamps. Defaults to the first sample.
+        :type t0: float
+        :param t1: Stop time, in the unit of the timestamps. Defaults to after the last sample.
+        :type t1: float
+        :return: A view of the slice of the recording.
+        :rtype: :py:class:`BerryIMUDataContainer`
+
+        """
+        start, stop = np.searchsorted(self.timestamps, [-np.inf if t0 is None else t0,
+                                                        np.inf if t1 is None else t1])
+        return self._view(slice(int(start), int(stop)))
+
+    def _sliced_channel(self, name, index):
+        value = self._channel(name)
+        return value[index] if value is not None else None
+
+    def _view(self, index):
+        out = self.__class__(self.start_time, self.client_settings, self.calibration_parameters)
+        out.recording_name = self.recording_name
+        out.version = self.version
+        if self._records is not None:
+            out._records = self._records[index]
+        for name, value in self._data.items():
+            if name in self._decoders:
+                out._decoders[name] = functools.partial(self._sliced_channel, name, index)
+            elif value is not None:
+                out._data[name] = value[index]
+        return out
+
+    def _channel(self, name):
+        decoder = self._decoders.pop(name, None)
+        if decoder is not None:
+            value = decoder()
+            if value is not None:
+                self._data[name] = value
+        return self._data.get(name)
+
+    def _set_channel(self, name, value):
+        if value is not None:
+            self._decoders.pop(name, None)
+            self._data[name] = np.asarray(value)
+            self._records = None
+
+    @property
+    def records(self):
+        """The structured array holding all channels of a packed recording,
+        see :py:meth:`pack`, or None if the recording is not packed."""
+        return self._records
+
     @property
     def timestamps(self):
-        return self._data.get('timestamps')
+        return self._channel('timestamps')
 
     @timestamps.setter
     def timestamps(self, value):
-        if value is not None:
-            self._data['timestamps'] = np.array(value)
+        self._set_channel('timestamps', value)
 
     @property
     def accelerometer(self):
-        return self._data.get('accelerometer')
+        return self._channel('accelerometer')
 
     @accelerometer.setter
     def accelerometer(self, value):
-        if value is not None:
-            self._data['accelerometer'] = np.array(value)
+        self._set_channel('accelerometer', value)
 
     @property
     def gyroscope(self):
-        return self._data.get('gyroscope')
+        return self._channel('gyroscope')
 
     @gyroscope.setter
     def gyroscope(self, value):
-        if value is not None:
-            self._data['gyroscope'] = np.array(value)
+        self._set_channel('gyroscope', value)
 
     @property
     def magnetometer(self):
-        return self._data.get('magnetometer')
+        return self._channel('magnetometer')
 
     @magnetometer.setter
     def magnetometer(self, value):
-        if value is not None:
-            self._data['magnetometer'] = np.array(value)
+        self._set_channel('magnetometer', value)
 
     @property
     def pressure(self):
-        return self._data.get('pressure')
+        return self._channel('pressure')
 
     @pressure.setter
     def pressure(self, value):
-        if value is not None:
-            self._data['pressure'] = np.array(value)
+        self._set_channel('pressure', value)
 
     @property
     def temperature(self):
-        return self._data.get('temperature')
+        return self._channel('temperature')
 
     @temperature.setter
     def temperature(self, value):
-        if value is not None:
-            self._data['temperature'] = np.array(value)
-
-    def to_json(self):
+        self._set_channel('temperature', value)
+
+    @staticmethod
+    def _compact_dtype(name, value):
+        if name == 'timestamps':
+            return np.dtype('float64')
+        if value.dtype.kind in 'iub' or np.all(np.mod(value, 1) == 0):
+            if value.size == 0 or (value.min() >= -2 ** 15 and value.max() < 2 ** 15):
+                return np.dtype('int16')
+        return np.dtype('float32')
+
+    def pack(self, dtypes=None):
+        """Pack all channels into one structured array, a record per sample.
+
+        Each channel property is then a view into the records. Unless given,
+        the dtypes are float64 for the timestamps, int16 for channels of raw
+        integer counts within its range and float32 for other values, which
+        makes a sample 40 bytes instead of 96 for six float64 arrays, and keeps
+        all values of a sample together in memory.
+
+        Setting a channel afterwards replaces it with the new array and unpacks
+        the recording, leaving the other channels as views into the records.
+
+        :param dtypes: Dtypes of some or all of the channels, e.g.
+            ``{'accelerometer': 'float64'}``.
+        :type dtypes: dict
+        :return: The records.
+        :rtype: :py:class:`numpy.ndarray`
+
+        """
+        dtypes = dtypes or {}
+        channels = []
+        fields = []
+        for name in storage.CHANNELS:
+            value = self._channel(name)
+            if value is None:
+                continue
+            dtype = np.dtype(dtypes[name]) if name in dtypes else self._compact_dtype(name, value)
+            channels.append((name, value))
+            fields.append((str(name), dtype, value.shape[1:]))
+        n_samples = len(channels[0][1]) if channels else 0
+        if any(len(value) != n_samples for _, value in channels):
+            raise ValueError("All channels must have the same number of samples to be packed.")
+
+        records = np.empty((n_samples, ), np.dtype(fields, align=True))
+        for name, value in channels:
+            records[name] = value
+            self._data[name] = records[name]
+        self._records = records
+        return records
+
+    def _header(self):
         return {
             'name': self.recording_name,
             'version': self.version,
             'recorded': self.start_time.strftime('%Y-%m-%d %H:%M:%S'),
             'client_settings': self.client_settings,
             'calibration_parameters': self.calibration_parameters,
-            'data': {
-                'timestamps': self.timestamps.tolist() if self.timestamps is not None else None,
-                'accelerometer': self.accelerometer.tolist() if self.accelerometer is not None else None,
-                'gyroscope': self.gyroscope.tolist() if self.gyroscope is not None else None,
-                'magnetometer': self.magnetometer.tolist() if self.magnetometer is not None else None,
-                'pressure': self.pressure.tolist() if self.pressure is not None else None,
-                'temperature': self.temperature.tolist() if self.temperature is not None else None,
-            }
         }
 
+    def to_json(self):
+        doc = self._header()
+        doc['data'] = {
+            'timestamps': self.timestamps.tolist() if self.timestamps is not None else None,
+            'accelerometer': self.accelerometer.tolist() if self.accelerometer is not None else None,
+            'gyroscope': self.gyroscope.tolist() if self.gyroscope is not None else None,
+            'magnetometer': self.magnetometer.tolist() if self.magnetometer is not None else None,
+            'pressure': self.pressure.tolist() if self.pressure is not None else None,
+            'temperature': self.temperature.tolist() if self.temperature is not None else None,
+        }
+        return doc
+
     @classmethod
-    def from_json(cls, doc):
+    def _from_header(cls, doc):
         out = cls(datetime.datetime.strptime(doc.get('recorded'), '%Y-%m-%d %H:%M:%S'),
-            doc.get('client_settings'), doc.get('calibration_parameters'))
+                  doc.get('client_settings'), doc.get('calibration_parameters'))
         out.recording_name = doc.get('name')
-        out.version = doc.get('version', version)
+        out.version = doc.get('version') or {}
         if out.version.get('wlmetrics') is None:
             out.version['wlmetrics'] = version
+        return out
+
+    @classmethod
+    def from_json(cls, doc):
+        out = cls._from_header(doc)
 
         out.timestamps = doc.get('data', {}).get('timestamps')
         out.accelerometer = doc.get('data', {}).get('accelerometer')
@@ -142,12 +280,87 @@ class BerryIMUDataContainer(object):
 
         return out
 
-    def save(self, file_path):
-        with open(os.path.abspath(file_path), 'wt') as f:
-            json.dump(self.to_json(), f, indent=2)
+    def save(self, file_path, binary=False, encode=False, compression=None):
+        """Save the recording.
+
+        :param file_path: Path to the file to write.
+        :type file_path: str
+        :param binary: Save in the binary format of :py:mod:`wlmetrics.storage`
+            instead of as JSON.
+        :type binary: bool
+        :param encode: For the binary format, if integer valued channels and
+            timestamps should be stored as compact integers, see
+            :py:func:`wlmetrics.storage.write_binary`.
+        :type encode: bool
+        :param compression: For the binary format, ``'zlib'`` or ``'lzma'`` to
+            compress the channels.
+        :type compression: str
+
+        """
+        if binary:
+            storage.write_binary(file_path, self._header(),
+                                 {name: self._channel(name) for name in storage.CHANNELS},
+                                 encode=encode, compression=compression)
+        else:
+            with open(os.path.abspath(file_path), 'wt') as f:
+                json.dump(self.to_json(), f, indent=2)
+
+    def stream(self, file_path, channels=('timestamps', 'accelerometer', 'gyroscope', 'magnetometer'),
+               chunk_size=1024, flush_interval=1.0):
+        """Open a writer appending samples to a file in the chunked format
+        of :py:mod:`wlmetrics.storage` while they are captured.
+
+        :param file_path: Path to the file to write.
+        :type file_path: str
+        :param channels: Names of the channels to record.
+        :type channels: tuple
+        :param chunk_size: Number of samples per chunk.
+        :type chunk_size: int
+        :param flush_interval: Seconds between writes of the buffered samples.
+        :type flush_interval: float
+        :return: The writer, with samples added by
+            ``writer.append(timestamps=t, accelerometer=acc, ...)``.
+        :rtype: :py:class:`wlmetrics.storage.ChunkedWriter`
+
+        """
+        return storage.ChunkedWriter(file_path, self._header(),
+                                     {name: storage.CHANNEL_DTYPES[name] for name in channels},
+                                     chunk_size, flush_interval)
 
     @classmethod
-    def load(cls, file_path):
-        with open(os.path.abspath(file_path), 'rt') as f:
-            doc = json.load(f)
-        return cls.from_json(doc)
+    def load(cls, file_path, mmap=True, packed=False):
+        """Load a recording saved as JSON, in the binary format or in the
+        chunked format. Chunked files being written, or left unfinished, are
+        read up to their last complete chunk.
+
+        The channels of a JSON file are decoded on first access, and the
+        channels of a memory-mapped binary file are read from disk on access,
+        so channels that are never used are never read.
+
+        :param file_path: Path to the file to read.
+        :type file_path: str
+        :param mmap: For the binary format, if the file should be memory-mapped,
+            making the channels read-only views into the file.
+        :type mmap: bool
+        :param packed: If the channels should be read and packed into one
+            structured array with compact dtypes, see :py:meth:`pack`.
+        :type packed: bool
+        :return: The recording.
+        :rtype: :py:class:`BerryIMUDataContainer`
+
+        """
+        if storage.is_binary(file_path):
+            header, data = storage.read_binary(file_path, mmap=mmap)
+            out = cls._from_header(header)
+            out._data.update(data)
+        elif storage.is_chunked(file_path):
+            header, data = storage.read_chunked(file_path)
+            out = cls._from_header(header)
+            out._data.update(data)
+        else:
+            header, decoders = storage.read_json(file_path)
+            out = cls._from_header(header)
+            out._decoders.update((name, decoders[name]) for name in out._data if name in decoders)
+        if packed:
+            out.pack()
+        return out
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`dataset`
+==================
+
+.. module:: dataset
+   :platform: Unix, Windows
+   :synopsis: Parallel loading of many recordings into one dataset.
+
+.. moduleauthor:: hbldh <henrik.blidh@nedomkull.com>
+
+Created on 2026-10-18, 23:10
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import os
+import multiprocessing
+from multiprocessing.sharedctypes import RawArray
+
+import numpy as np
+
+from wlmetrics import storage
+
+__all__ = ['Dataset', 'load_dataset']
+
+# Shared output of the worker processes, set by :py:func:`_init_worker`.
+_shared = {}
+
+
+class Dataset(object):
+    """Channels of many recordings, concatenated.
+
+    The samples of recording ``i`` are rows ``offsets[i]:offsets[i + 1]`` of
+    each channel array, and ``dataset[i]`` gives views of them.
+
+    :param paths: The paths of the recordings.
+    :type paths: list
+    :param headers: The header metadata of the recordings.
+    :type headers: list
+    :param offsets: The (M + 1, ) array of start rows of the recordings.
+    :type offsets: :py:class:`numpy.ndarray`
+    :param channels: The concatenated channel arrays.
+    :type channels: dict
+
+    """
+
+    def __init__(self, paths, headers, offsets, channels):
+        self.paths = paths
+        self.headers = headers
+        self.offsets = offsets
+        self.channels = channels
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, i):
+        start, stop = self.offsets[i], self.offsets[i + 1]
+        return {name: values[start:stop] for name, values in self.channels.items()}
+
+    @property
+    def n_samples(self):
+        """The number of samples of each recording."""
+        return np.diff(self.offsets)
+
+
+def _count_samples(file_path):
+    n_samples = storage.count_samples(file_path)
+    if n_samples is None:
+        raise ValueError("{0} is not a recording with timestamps.".format(file_path))
+    return n_samples
+
+
+def _init_worker(paths, offsets, buffers, widths):
+    _shared['paths'] = paths
+    _shared['offsets'] = offsets
+    _shared['channels'] = {name: np.frombuffer(buffer, 'float').reshape(-1, widths[name])
+                           for name, buffer in buffers.items()}
+
+
+def _load_recording(i):
+    header, data = storage.read_recording(_shared['paths'][i], channels=list(_shared['channels']))
+    start, stop = _shared['offsets'][i], _shared['offsets'][i + 1]
+    for name, out in _shared['channels'].items():
+        if name not in data:
+            out[start:stop, :] = np.nan
+            continue
+        if len(data[name]) != stop - start:
+            raise ValueError("{0} has {1} samples, not {2} as indexed.".format(
+                _shared['paths'][i], len(data[name]), stop - start))
+        out[start:stop, :] = data[name].reshape(stop - start, -1)
+    return i, header
+
+
+def _map(function, items, processes, initializer=None, initargs=()):
+    if processes == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        return list(map(function, items))
+    pool = multiprocessing.Pool(processes, initializer=initializer, initargs=initargs)
+    try:
+        return pool.map(function, items)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def load_dataset(paths, channels=('timestamps', 'accelerometer', 'gyroscope', 'magnetometer'),
+                 processes=None, catalog=None):
+    """Load many recordings in parallel into one :py:class:`Dataset`.
+
+    The sample counts of the recordings give the offsets of each recording
+    in one shared memory float64 array per channel. The recordings are then
+    decoded in a process pool, where each worker writes its channels directly
+    into the shared arrays, so only the headers are sent back between the
+    processes.
+
+    The sample counts are taken from the catalog when given and up to date,
+    and are otherwise read from the files with
+    :py:func:`wlmetrics.storage.count_samples`, without decoding any channels.
+
+    :param paths: Paths to recordings in any format of :py:mod:`wlmetrics.storage`.
+    :type paths: list
+    :param channels: The channels to load. Channels missing from a recording are NaN.
+    :type channels: tuple
+    :param processes: Number of worker processes, at most one per recording.
+        Defaults to the number of CPUs.
+    :type processes: int
+    :param catalog: A catalog indexing the recordings, to take the sample counts from.
+    :type catalog: :py:class:`wlmetrics.catalog.Catalog`
+    :return: The dataset.
+    :rtype: :py:class:`Dataset`
+
+    """
+    paths = [os.path.abspath(p) for p in paths]
+    processes = max(min(processes or multiprocessing.cpu_count(), len(paths)), 1)
+
+    n_samples = [None] * len(paths)
+    if catalog is not None:
+        indexed = {entry['path']: entry for entry in catalog.entries}
+        for i, path in enumerate(paths):
+            entry = indexed.get(path)
+            stat = os.stat(path)
+            if entry is not None and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+                n_samples[i] = entry['n_samples']
+    to_count = [path for path, n in zip(paths, n_samples) if n is None]
+    if to_count:
+        counts = iter(_map(_count_samples, to_count, min(processes, len(to_count))))
+        n_samples = [next(counts) if n is None else n for n in n_samples]
+
+    offsets = np.cumsum([0] + n_samples)
+    widths = {}
+    buffers = {}
+    for name in channels:
+        widths[name] = int(np.prod(np.dtype(storage.CHANNEL_DTYPES[name]).shape))
+        buffers[name] = RawArray('d', int(offsets[-1]) * widths[name])
+
+    results = _map(_load_recording, range(len(paths)), processes,
+                   initializer=_init_worker, initargs=(paths, offsets, buffers, widths))
+
+    headers = [None] * len(paths)
+    for i, header in results:
+        headers[i] = header
+    data = {}
+    for name in channels:
+        shape = np.dtype(storage.CHANNEL_DTYPES[name]).shape
+        data[name] = np.frombuffer(buffers[name], 'float').reshape((int(offsets[-1]), ) + shape)
+    return Dataset(paths, headers, offsets, data)
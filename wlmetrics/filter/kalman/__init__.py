@@ -1,5 +1,9 @@
+__author__ = 'Henrik Blidh'
 
 from .kalman import KalmanFilter
-from .static import StaticDetectingPositionKalmanFilter
+from .static import StaticDetectingPositionKalmanFilter, detect_static_periods
+from .decoupled import DecoupledPositionKalmanFilter
+from .batch import MultiStreamPositionKalmanFilter
 
-__all__ = ['KalmanFilter', 'StaticDetectingPositionKalmanFilter']
+__all__ = ['KalmanFilter', 'StaticDetectingPositionKalmanFilter', 'DecoupledPositionKalmanFilter',
+           'MultiStreamPositionKalmanFilter', 'detect_static_periods']
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`batch`
+==================
+
+.. module:: batch
+   :platform: Unix, Windows
+   :synopsis: Position Kalman filtering of many recordings at once.
+
+.. moduleauthor:: hbldh <henrik.blidh@nedomkull.com>
+
+Created on 2026-10-18, 18:05
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import numpy as np
+
+from wlmetrics.filter.kalman.kalman import _output_array
+from wlmetrics.filter.kalman.static import StaticDetectingPositionKalmanFilter, detect_static_periods
+
+
+class MultiStreamPositionKalmanFilter(StaticDetectingPositionKalmanFilter):
+    """A :py:class:`StaticDetectingPositionKalmanFilter` running several
+    recordings at once.
+
+    The recordings are stacked, padded at the end to a common length, and the
+    states and covariances of all streams are advanced together with batched
+    matrix products at each time step, so the per step overhead is shared by
+    all streams. Each stream has its own static counter, kept as an (M, )
+    array. The results are the same as running one filter per recording.
+
+    """
+
+    def __init__(self, data_freq, n_streams, static_threshold=0.1, static_time=0.25,
+                 steady_state=False):
+        super(MultiStreamPositionKalmanFilter, self).__init__(
+            data_freq, static_threshold, static_time, steady_state=steady_state, use_extension=False)
+        self.n_streams = n_streams
+        self._static_counter = np.full((n_streams, ), self._static_counter, 'float')
+
+    def filter(self, observations, lengths=None, out=None):
+        """Run the filter over M recordings.
+
+        :param observations: A (M, N, 3) array of accelerometer values, in g.
+        :type observations: :py:class:`numpy.ndarray`
+        :param lengths: The number of samples of each recording, for recordings
+            padded at the end. Defaults to N for all.
+        :type lengths: list
+        :param out: Optional (M, N, 9), (M, N) and (M, N, 3) float64 arrays to
+            write the states, static flags and gravity vectors to.
+        :type out: tuple
+        :return: The states, static flags and gravity vectors. Padding is filled with NaN.
+        :rtype: tuple
+
+        """
+        observations = np.asarray(observations, 'float')
+        if observations.ndim != 3 or observations.shape[0] != self.n_streams or observations.shape[2] != 3:
+            raise ValueError("Observations must be a (M, N, 3) array with M = {0}.".format(self.n_streams))
+        m, n = observations.shape[:2]
+        lengths = np.full((m, ), n, 'int') if lengths is None else np.asarray(lengths, 'int')
+        out = (None, None, None) if out is None else out
+        states = _output_array(out[0], (m, n, 9))
+        static_array = _output_array(out[1], (m, n))
+        gravity = _output_array(out[2], (m, n, 3))
+
+        accelerations = np.zeros((n, m, 3), 'float')
+        lying_still = np.zeros((n, m), 'bool')
+        for j, length in enumerate(lengths):
+            static_array[j, length:] = np.nan
+            gravity[j, length:, :] = np.nan
+            _, _, self._static_counter[j] = detect_static_periods(
+                observations[j, :length, :], self.static_threshold, self.f * self.static_time,
+                self._static_counter[j], out=(static_array[j, :length], gravity[j, :length, :]))
+            lying_still[:length, j] = static_array[j, :length] == 1
+            accelerations[:length, j, :] = (observations[j, :length, :] - gravity[j, :length, :]) * 9.81
+
+        A = self.transition_matrix
+        Q = self.transition_covariance
+        C = self.observation_matrix
+        R = self.observation_covariance
+        K = self._fixed_gain()
+        X = np.tile(np.asarray(self.X, 'float'), (m, 1))
+        P = np.tile(np.asarray(self.P, 'float'), (m, 1, 1))
+        static_position = X[:, 6:].copy()
+
+        for i in range(n):
+            still = lying_still[i]
+            any_still = still.any()
+            if any_still:
+                X[still, 3:6] = 0
+                static_position[still] = X[still, 6:]
+            X = X.dot(A.T)
+            if K is None:
+                P = np.einsum('ij,njk->nik', A, np.einsum('nij,kj->nik', P, A)) + Q
+            if any_still:
+                X[still, 3:6] = 0
+                X[still, 6:] = static_position[still]
+
+            innovations = accelerations[i] - X.dot(C.T)
+            if K is None:
+                PCt = np.einsum('nij,kj->nik', P, C)
+                IS = np.einsum('ij,njk->nik', C, PCt) + R
+                gain = np.swapaxes(np.linalg.solve(IS, np.swapaxes(PCt, 1, 2)), 1, 2)
+                X += np.einsum('nij,nj->ni', gain, innovations)
+                P = P - np.einsum('nij,nkj->nik', gain, PCt)
+            else:
+                X += innovations.dot(K.T)
+            if any_still:
+                X[still, 3:6] = 0
+                X[still, 6:] = static_position[still]
+            states[:, i, :] = X
+
+        for j, length in enumerate(lengths):
+            states[j, length:, :] = np.nan
+
+        return states, static_array, gravity
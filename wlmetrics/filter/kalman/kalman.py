@@ -23,6 +23,22 @@ import time
 
 import numpy as np
 
+try:
+    from . import ckalman
+except ImportError:
+    ckalman = None
+
+# Converged Kalman gains and innovation covariances, keyed on the filter matrices.
+_steady_state_gains = {}
+
+
+def _output_array(out, shape):
+    if out is None:
+        return np.empty(shape, 'float')
+    if out.shape != shape:
+        raise ValueError("Output array must have shape {0}.".format(shape))
+    return out
+
 
 class KalmanFilter(object):
     """A simple Kalman Filter implementation, straight from definition.
@@ -32,38 +48,70 @@ class KalmanFilter(object):
 
     Consider looking at the :py:module:`pykalman` module for a better implementation.
 
+    With ``steady_state`` set, the Kalman gain is solved for once, by iterating
+    the Riccati recursion until the gain has converged, and then used for every
+    sample. The covariance is then not updated, and each step reduces to
+    a few matrix-vector products.
+
+    If the :py:mod:`ckalman` C extension is built, :py:meth:`filter` runs the
+    whole recursion in it, with the GIL released, unless ``use_extension`` is
+    set to False.
+
     """
 
     def __init__(self, transition_matrix, transition_covariance,
-                 observation_matrix, observation_covariance):
+                 observation_matrix, observation_covariance, steady_state=False,
+                 use_extension=True):
 
         self.transition_matrix = transition_matrix
         self.transition_covariance = transition_covariance
         self.observation_matrix = observation_matrix
         self.observation_covariance = observation_covariance
+        self.steady_state = steady_state
+        self.use_extension = use_extension and ckalman is not None
 
         self.X = None
         self.P = None
+        self._steady_state_gain = None
 
     def set_initial_state(self, initial_state, initial_covariance):
         self.X = initial_state
         self.P = initial_covariance
 
-    def filter(self, observations):
-        states = []
+    def filter(self, observations, out=None):
+        """Run the filter over a recording.
+
+        :param observations: A (N, m) array of observations.
+        :type observations: :py:class:`numpy.ndarray`
+        :param out: Optional (N, n) float64 array to write the states to.
+            It must be contiguous if the C extension is used.
+        :type out: :py:class:`numpy.ndarray`
+        :return: A (N, n) array with the state after each observation.
+        :rtype: :py:class:`numpy.ndarray`
+
+        """
+        states = _output_array(out, (len(observations), len(self.X)))
+        if self.use_extension:
+            observations = np.ascontiguousarray(observations, 'float')
+            return ckalman.kalman_filter(
+                observations, self.transition_matrix, self.transition_covariance,
+                self.observation_matrix, self.observation_covariance, self._fixed_gain(),
+                np.array(self.X, 'float'), np.array(self.P, 'float'), states)
 
         X = self.X
         P = self.P
-        for observation in observations:
+        for i, observation in enumerate(observations):
             X, P = self.kf_predict(X, P)
             X, P, K, IM, IS = self.kf_update(X, P, observation)
-            states.append(X)
+            states[i, :] = X
 
-        return np.array(states)
+        return states
 
     def kf_predict(self, X, P):
         # Predict New State, X_k = A * X_{k-1}
         X = self.transition_matrix.dot(X)
+        if self.steady_state:
+            return X, P
         # Predict New Covariance, P_k = A * P_{k-1} * A^T + Sigma_X
         P = self.transition_matrix.dot(P.dot(self.transition_matrix.T)) + \
             self.transition_covariance
@@ -72,6 +120,9 @@ class KalmanFilter(object):
     def kf_update(self, X, P, Y):
         # The Mean of predictive distribution of Y
         IM = self.observation_matrix.dot(X)
+        if self.steady_state:
+            K, IS = self._fixed_gain(), self._steady_state_gain[1]
+            return X + K.dot(Y - IM), P, K, IM, IS
         # The Covariance or predictive mean of Y
         IS = self.observation_matrix.dot(P.dot(self.observation_matrix.T)) + \
             self.observation_covariance
@@ -86,23 +137,152 @@ class KalmanFilter(object):
         #LH = self.gauss_pdf(Y, IM, IS, IS_inv)
         return X, P, K, IM, IS, #LH
 
-    def gauss_pdf(self, X, M, S, S_inv):
-        if M.shape[0] == 1:
-            DX = X - np.tile(M, X.shape()[1])
-            E = 0.5 * sum(DX * (S_inv.dot(DX)), axis=0)
-            E = (E + 0.5 * M.shape()[0] * np.log(2 * np.pi) +
-                 0.5 * np.log(np.linalg.det(S)))
-            P = np.exp(-E)
-        elif X.shape[0] == 1:
-            DX = np.tile(X, M.shape()[1]) - M
-            E = 0.5 * sum(DX * (S_inv.dot(DX)), axis=0)
-            E = (E + 0.5 * M.shape()[0] * np.log(2 * np.pi) +
-                 0.5 * np.log(np.linalg.det(S)))
-            P = np.exp(-E)
+    def _fixed_gain(self):
+        if not self.steady_state:
+            return None
+        if self._steady_state_gain is None:
+            self._steady_state_gain = self.steady_state_gain()
+        return self._steady_state_gain[0]
+
+    def steady_state_gain(self, tolerance=1e-15, max_iterations=100000):
+        """Solve for the steady state Kalman gain of the filter.
+
+        The Riccati recursion is iterated from a zero covariance until the gain has
+        converged. The gain is used instead of the covariance as convergence
+        criterion, since the covariance of states not observed, e.g. position from
+        acceleration, grows without bound while their gains still converge.
+
+        The results are cached on the filter matrices, so filters with the same
+        matrices, e.g. position filters with the same data frequency, share them.
+
+        :param tolerance: Relative convergence tolerance of the gain.
+        :type tolerance: float
+        :param max_iterations: Maximal number of iterations.
+        :type max_iterations: int
+        :return: The Kalman gain and the innovation covariance.
+        :rtype: tuple
+
+        """
+        matrices = [np.asarray(m, 'float') for m in (
+            self.transition_matrix, self.transition_covariance,
+            self.observation_matrix, self.observation_covariance)]
+        key = tuple((m.shape, m.tobytes()) for m in matrices)
+        if key in _steady_state_gains:
+            return _steady_state_gains[key]
+
+        A, Q, C, R = matrices
+        P = np.zeros_like(A)
+        K_previous = None
+        for i in range(max_iterations):
+            P = A.dot(P.dot(A.T)) + Q
+            IS = C.dot(P.dot(C.T)) + R
+            K = P.dot(C.T.dot(np.linalg.inv(IS)))
+            P = P - K.dot(IS.dot(K.T))
+            if K_previous is not None and \
+                    np.abs(K - K_previous).max() <= tolerance * max(1.0, np.abs(K).max()):
+                break
+            K_previous = K
         else:
-            DX = X - M
-            E = 0.5 * DX.T.dot(S_inv.dot(DX))
-            E = (E + 0.5 * M.shape[0] * np.log(2 * np.pi) +
-                 0.5 * np.log(np.linalg.det(S)))
-            P = np.exp(-E)
+            raise ValueError("Kalman gain did not converge in {0} iterations.".format(max_iterations))
+
+        _steady_state_gains[key] = K, IS
+        return K, IS
+
+    def log_likelihood(self, observations, transition_covariance=None, observation_covariance=None,
+                       chunk_size=4096):
+        """The innovation log likelihood of a recording.
+
+        The filter recursion is run from the initial state, and the log likelihood is
+        the sum of the Gaussian log densities of the innovations. Several candidate noise
+        covariances can be given stacked, as (K, n, n) and (K, m, m) arrays, and are
+        then all evaluated in the same pass over the data. The innovations and innovation
+        covariances are stored for ``chunk_size`` samples at a time and scored together
+        from their Cholesky factors.
+
+        The full Riccati recursion is used, also for filters in steady state mode.
+
+        :param observations: A (N, m) array of observations.
+        :type observations: :py:class:`numpy.ndarray`
+        :param transition_covariance: Transition covariance, (n, n) or (K, n, n).
+            Defaults to the filter's own.
+        :type transition_covariance: :py:class:`numpy.ndarray`
+        :param observation_covariance: Observation covariance, (m, m) or (K, m, m).
+            Defaults to the filter's own.
+        :type observation_covariance: :py:class:`numpy.ndarray`
+        :return: The log likelihood, or a (K, ) array of them if stacked covariances were given.
+        :rtype: float or :py:class:`numpy.ndarray`
+
+        """
+        Q = np.asarray(self.transition_covariance if transition_covariance is None
+                       else transition_covariance, 'float')
+        R = np.asarray(self.observation_covariance if observation_covariance is None
+                       else observation_covariance, 'float')
+        stacked = Q.ndim == 3 or R.ndim == 3
+        if Q.ndim == 2:
+            Q = Q[np.newaxis, :, :]
+        if R.ndim == 2:
+            R = R[np.newaxis, :, :]
+        n_candidates = max(len(Q), len(R))
+
+        A = np.asarray(self.transition_matrix, 'float')
+        C = np.asarray(self.observation_matrix, 'float')
+        observations = np.asarray(observations, 'float')
+        X = np.tile(np.asarray(self.X, 'float'), (n_candidates, 1))
+        P = np.tile(np.asarray(self.P, 'float'), (n_candidates, 1, 1))
+
+        m = C.shape[0]
+        innovations = np.empty((chunk_size, n_candidates, m), 'float')
+        innovation_covariances = np.empty((chunk_size, n_candidates, m, m), 'float')
+        log_likelihood = np.zeros((n_candidates, ), 'float')
+        for start in range(0, len(observations), chunk_size):
+            chunk = observations[start:start + chunk_size, :]
+            for i, observation in enumerate(chunk):
+                X = X.dot(A.T)
+                P = np.einsum('ij,njk->nik', A, np.einsum('nij,kj->nik', P, A)) + Q
+                PCt = np.einsum('nij,kj->nik', P, C)
+                IS = np.einsum('ij,njk->nik', C, PCt) + R
+                innovations[i] = observation - X.dot(C.T)
+                innovation_covariances[i] = IS
+                K = np.swapaxes(np.linalg.solve(IS, np.swapaxes(PCt, 1, 2)), 1, 2)
+                X = X + np.einsum('nij,nj->ni', K, innovations[i])
+                P = P - np.einsum('nij,nkj->nik', K, PCt)
+            log_likelihood += self._gauss_log_density(innovations[:len(chunk)],
+                                                      innovation_covariances[:len(chunk)])
+
+        return log_likelihood if stacked else log_likelihood[0]
+
+    @staticmethod
+    def _gauss_log_density(innovations, innovation_covariances):
+        # Sum over the first axis of the zero mean Gaussian log densities, using Cholesky factors.
+        L = np.linalg.cholesky(innovation_covariances)
+        z = np.linalg.solve(L, innovations[..., np.newaxis])[..., 0]
+        log_det = 2 * np.sum(np.log(np.diagonal(L, axis1=-2, axis2=-1)), axis=-1)
+        m = innovations.shape[-1]
+        return np.sum(-0.5 * (np.sum(z ** 2, axis=-1) + log_det + m * np.log(2 * np.pi)), axis=0)
+
+    def gauss_pdf(self, X, M, S, S_inv):
+        """The Gaussian density N(X; M, S).
+
+        :param X: The point(s), as a (m, ) vector or (m, k) columns.
+        :type X: :py:class:`numpy.ndarray`
+        :param M: The mean(s), as a (m, ) vector or (m, k) columns.
+        :type M: :py:class:`numpy.ndarray`
+        :param S: The (m, m) covariance.
+        :type S: :py:class:`numpy.ndarray`
+        :param S_inv: The inverse of the covariance.
+        :type S_inv: :py:class:`numpy.ndarray`
+        :return: The density and the negative log density, per column.
+        :rtype: tuple
+
+        """
+        X = np.asarray(X, 'float')
+        M = np.asarray(M, 'float')
+        vectors = X.ndim == 1 and M.ndim == 1
+        DX = (X if X.ndim == 2 else X[:, np.newaxis]) - (M if M.ndim == 2 else M[:, np.newaxis])
+        E = 0.5 * np.sum(DX * S_inv.dot(DX), axis=0)
+        E = (E + 0.5 * DX.shape[0] * np.log(2 * np.pi) +
+             0.5 * np.log(np.linalg.det(S)))
+        if vectors:
+            E = E[0]
+        P = np.exp(-E)
         return P, E
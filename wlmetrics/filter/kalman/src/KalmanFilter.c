@@ -0,0 +1,262 @@
+//=====================================================================================================
+// KalmanFilter.c
+//=====================================================================================================
+//
+// Dense Kalman filter predict and update steps, and the static detecting position filter loop.
+//
+// All matrices are row major doubles. The innovation covariance is solved for with a Cholesky
+// decomposition instead of being inverted.
+//
+// Date			Author          Notes
+// 18/10/2026   hbldh           Initial release
+// 18/10/2026   hbldh           Static detection moved out of the position filter loop
+// 19/10/2026   hbldh           Per axis decoupled position filter loop
+//
+//=====================================================================================================
+
+//---------------------------------------------------------------------------------------------------
+// Header files
+
+#include "KalmanFilter.h"
+#include <math.h>
+#include <string.h>
+
+//=====================================================================================================
+// Functions
+
+//---------------------------------------------------------------------------------------------------
+// Prediction, X = A X and P = A P A^T + Q. The covariance is not predicted if P is NULL.
+// Uses n + n * n doubles of work space.
+
+void KalmanPredict(int n, const double *A, const double *Q, double *X, double *P, double *work) {
+	double *AX = work;
+	double *AP = work + n;
+	double s;
+	int i, j, k;
+
+	for (i = 0; i < n; i++) {
+		s = 0.0;
+		for (k = 0; k < n; k++)
+			s += A[i * n + k] * X[k];
+		AX[i] = s;
+	}
+	memcpy(X, AX, n * sizeof(double));
+	if (P == NULL)
+		return;
+
+	for (i = 0; i < n; i++) {
+		for (j = 0; j < n; j++) {
+			s = 0.0;
+			for (k = 0; k < n; k++)
+				s += A[i * n + k] * P[k * n + j];
+			AP[i * n + j] = s;
+		}
+	}
+	for (i = 0; i < n; i++) {
+		for (j = 0; j < n; j++) {
+			s = Q[i * n + j];
+			for (k = 0; k < n; k++)
+				s += AP[i * n + k] * A[j * n + k];
+			P[i * n + j] = s;
+		}
+	}
+}
+
+//---------------------------------------------------------------------------------------------------
+// Correction with observation Y. If the gain K is not NULL it is used as is and P is left untouched,
+// otherwise the gain is computed from P and P is updated.
+// Returns -1 if the innovation covariance is not positive definite, 0 otherwise.
+
+int KalmanUpdate(int n, int m, const double *C, const double *R, const double *K, const double *Y, double *X, double *P, double *work) {
+	double *innovation = work;
+	double *PCt = work + m;
+	double *S = PCt + n * m;
+	double *gain = S + m * m;
+	double s;
+	int i, j, k;
+
+	for (i = 0; i < m; i++) {
+		s = Y[i];
+		for (k = 0; k < n; k++)
+			s -= C[i * n + k] * X[k];
+		innovation[i] = s;
+	}
+
+	if (K == NULL) {
+		// P C^T and S = C P C^T + R.
+		for (i = 0; i < n; i++) {
+			for (j = 0; j < m; j++) {
+				s = 0.0;
+				for (k = 0; k < n; k++)
+					s += P[i * n + k] * C[j * n + k];
+				PCt[i * m + j] = s;
+			}
+		}
+		for (i = 0; i < m; i++) {
+			for (j = 0; j < m; j++) {
+				s = R[i * m + j];
+				for (k = 0; k < n; k++)
+					s += C[i * n + k] * PCt[k * m + j];
+				S[i * m + j] = s;
+			}
+		}
+
+		// Cholesky decomposition S = L L^T, L stored in the lower triangle of S.
+		for (j = 0; j < m; j++) {
+			s = S[j * m + j];
+			for (k = 0; k < j; k++)
+				s -= S[j * m + k] * S[j * m + k];
+			if (!(s > 0.0))
+				return -1;
+			S[j * m + j] = sqrt(s);
+			for (i = j + 1; i < m; i++) {
+				s = S[i * m + j];
+				for (k = 0; k < j; k++)
+					s -= S[i * m + k] * S[j * m + k];
+				S[i * m + j] = s / S[j * m + j];
+			}
+		}
+
+		// K = P C^T S^-1, one row at a time by forward and backward substitution.
+		for (i = 0; i < n; i++) {
+			double *row = gain + i * m;
+			for (j = 0; j < m; j++) {
+				s = PCt[i * m + j];
+				for (k = 0; k < j; k++)
+					s -= S[j * m + k] * row[k];
+				row[j] = s / S[j * m + j];
+			}
+			for (j = m - 1; j >= 0; j--) {
+				s = row[j];
+				for (k = j + 1; k < m; k++)
+					s -= S[k * m + j] * row[k];
+				row[j] = s / S[j * m + j];
+			}
+		}
+
+		// P = P - K S K^T = P - K (P C^T)^T.
+		for (i = 0; i < n; i++) {
+			for (j = 0; j < n; j++) {
+				s = 0.0;
+				for (k = 0; k < m; k++)
+					s += gain[i * m + k] * PCt[j * m + k];
+				P[i * n + j] -= s;
+			}
+		}
+		K = gain;
+	}
+
+	for (i = 0; i < n; i++) {
+		s = 0.0;
+		for (k = 0; k < m; k++)
+			s += K[i * m + k] * innovation[k];
+		X[i] += s;
+	}
+	return 0;
+}
+
+//---------------------------------------------------------------------------------------------------
+// Filter N observations, writing the state after each update to the rows of states.
+// Returns -1 if the innovation covariance stops being positive definite, 0 otherwise.
+
+int KalmanFilter(long N, int n, int m, const double *observations, const double *A, const double *Q, const double *C, const double *R, const double *K, double *X, double *P, double *states, double *work) {
+	long t;
+
+	for (t = 0; t < N; t++) {
+		KalmanPredict(n, A, Q, X, K == NULL ? P : NULL, work);
+		if (KalmanUpdate(n, m, C, R, K, observations + t * m, X, P, work))
+			return -1;
+		memcpy(states + t * n, X, n * sizeof(double));
+	}
+	return 0;
+}
+
+//---------------------------------------------------------------------------------------------------
+// The static detecting position filter, with states [acceleration, velocity, position] for the
+// three axes. For the samples where static_mask is set the velocity is clamped to zero and the
+// position is held.
+
+static void clampState(double *X, const double *position) {
+	X[3] = X[4] = X[5] = 0.0;
+	X[6] = position[0];
+	X[7] = position[1];
+	X[8] = position[2];
+}
+
+int StaticPositionKalmanFilter(long N, const double *observations, const unsigned char *static_mask, const double *A, const double *Q, const double *C, const double *R, const double *K, double *X, double *P, double *states, double *work) {
+	double position[3] = {X[6], X[7], X[8]};
+	long t;
+
+	for (t = 0; t < N; t++) {
+		if (static_mask[t]) {
+			X[3] = X[4] = X[5] = 0.0;
+			position[0] = X[6];
+			position[1] = X[7];
+			position[2] = X[8];
+		}
+		KalmanPredict(9, A, Q, X, K == NULL ? P : NULL, work);
+		if (static_mask[t])
+			clampState(X, position);
+		if (KalmanUpdate(9, 3, C, R, K, observations + 3 * t, X, P, work))
+			return -1;
+		if (static_mask[t])
+			clampState(X, position);
+		memcpy(states + 9 * t, X, 9 * sizeof(double));
+	}
+	return 0;
+}
+
+//---------------------------------------------------------------------------------------------------
+// The static detecting position filter run as three independent filters, one per axis, each with
+// states [acceleration, velocity, position] and the acceleration observed. F is the (3, 3) per axis
+// transition matrix, Q and P the (3, 3, 3) per axis transition covariances and covariances, and r
+// the per axis observation variances. X and states hold the states in the order of the dense filter.
+// Returns -1 if an innovation variance is not positive, 0 otherwise.
+
+int DecoupledPositionKalmanFilter(long N, const double *observations, const unsigned char *static_mask, const double *F, const double *Q, const double *r, double *X, double *P, double *states) {
+	double position[3] = {X[6], X[7], X[8]};
+	double x[3], work[12], gain[3], innovation, S;
+	double *Pa;
+	long t;
+	int a, i, j;
+
+	for (t = 0; t < N; t++) {
+		for (a = 0; a < 3; a++) {
+			Pa = P + 9 * a;
+			if (static_mask[t]) {
+				X[3 + a] = 0.0;
+				position[a] = X[6 + a];
+			}
+			x[0] = X[a];
+			x[1] = X[3 + a];
+			x[2] = X[6 + a];
+			KalmanPredict(3, F, Q + 9 * a, x, Pa, work);
+			if (static_mask[t]) {
+				x[1] = 0.0;
+				x[2] = position[a];
+			}
+
+			S = Pa[0] + r[a];
+			if (!(S > 0.0))
+				return -1;
+			innovation = observations[3 * t + a] - x[0];
+			for (i = 0; i < 3; i++)
+				gain[i] = Pa[3 * i] / S;
+			for (i = 0; i < 3; i++) {
+				x[i] += gain[i] * innovation;
+				for (j = 0; j < 3; j++)
+					Pa[3 * i + j] -= gain[i] * gain[j] * S;
+			}
+			if (static_mask[t]) {
+				x[1] = 0.0;
+				x[2] = position[a];
+			}
+
+			X[a] = x[0];
+			X[3 + a] = x[1];
+			X[6 + a] = x[2];
+		}
+		memcpy(states + 9 * t, X, 9 * sizeof(double));
+	}
+	return 0;
+}
@@ -0,0 +1,34 @@
+//=====================================================================================================
+// KalmanFilter.h
+//=====================================================================================================
+//
+// Dense Kalman filter predict and update steps, and the static detecting position filter loop.
+//
+// Date			Author          Notes
+// 18/10/2026   hbldh           Initial release
+// 18/10/2026   hbldh           Static detection moved out of the position filter loop
+// 19/10/2026   hbldh           Per axis decoupled position filter loop
+//
+//=====================================================================================================
+#ifndef KalmanFilter_h
+#define KalmanFilter_h
+
+//---------------------------------------------------------------------------------------------------
+// Definitions
+
+// Number of doubles of work space needed for state size n and observation size m.
+#define KALMAN_WORK_SIZE(n, m) ((n) + (n) * (n) + 2 * (n) * (m) + (m) * (m) + (m))
+
+//---------------------------------------------------------------------------------------------------
+// Function declarations
+
+void KalmanPredict(int n, const double *A, const double *Q, double *X, double *P, double *work);
+int KalmanUpdate(int n, int m, const double *C, const double *R, const double *K, const double *Y, double *X, double *P, double *work);
+int KalmanFilter(long N, int n, int m, const double *observations, const double *A, const double *Q, const double *C, const double *R, const double *K, double *X, double *P, double *states, double *work);
+int StaticPositionKalmanFilter(long N, const double *observations, const unsigned char *static_mask, const double *A, const double *Q, const double *C, const double *R, const double *K, double *X, double *P, double *states, double *work);
+int DecoupledPositionKalmanFilter(long N, const double *observations, const unsigned char *static_mask, const double *F, const double *Q, const double *r, double *X, double *P, double *states);
+
+#endif
+//=====================================================================================================
+// End of file
+//=====================================================================================================
@@ -0,0 +1,342 @@
+/**
+ **************************************************************************************
+ * @file    ckalman.c
+ * @author  hbldh
+ * @version 0.1
+ * @date    2026-10-18
+ * @brief   C extension running the Kalman filter recursions for Python.
+ **************************************************************************************
+ */
+
+#include <Python.h>
+#define NPY_NO_DEPRECATED_API NPY_1_7_API_VERSION
+#include <numpy/arrayobject.h>
+#include <stdlib.h>
+#include "KalmanFilter.h"
+
+/* Convert obj to a contiguous float64 array with the given shape, or set an exception and return NULL. */
+static PyArrayObject *input_array(PyObject *obj, npy_intp rows, npy_intp cols, const char *name)
+{
+    PyArrayObject *array = (PyArrayObject *) PyArray_FROM_OTF(obj, NPY_DOUBLE, NPY_ARRAY_IN_ARRAY);
+    if (array == NULL)
+        return NULL;
+    if ((cols < 0 && (PyArray_NDIM(array) != 1 || PyArray_DIM(array, 0) != rows)) ||
+            (cols >= 0 && (PyArray_NDIM(array) != 2 || PyArray_DIM(array, 0) != rows || PyArray_DIM(array, 1) != cols))) {
+        PyErr_Format(PyExc_ValueError, "%s has the wrong shape.", name);
+        Py_DECREF(array);
+        return NULL;
+    }
+    return array;
+}
+
+/* Check that array is a writeable, contiguous float64 array of the given size. */
+static int check_output_array(PyArrayObject *array, npy_intp size, const char *name)
+{
+    if (PyArray_TYPE(array) != NPY_DOUBLE || PyArray_SIZE(array) != size ||
+            !PyArray_IS_C_CONTIGUOUS(array) || !PyArray_ISWRITEABLE(array)) {
+        PyErr_Format(PyExc_ValueError, "%s must be a writeable, contiguous float64 array of size %ld.",
+                     name, (long) size);
+        return -1;
+    }
+    return 0;
+}
+
+/* The arguments shared by both filter functions. */
+typedef struct {
+    PyArrayObject *observations, *A, *Q, *C, *R, *K;
+    npy_intp N;
+    int n, m;
+    double *work;
+} FilterInput;
+
+static void release_input(FilterInput *input)
+{
+    Py_XDECREF(input->observations);
+    Py_XDECREF(input->A);
+    Py_XDECREF(input->Q);
+    Py_XDECREF(input->C);
+    Py_XDECREF(input->R);
+    Py_XDECREF(input->K);
+    free(input->work);
+}
+
+static int prepare_input(FilterInput *input, PyObject *obs_obj, PyObject *A_obj, PyObject *Q_obj,
+                         PyObject *C_obj, PyObject *R_obj, PyObject *K_obj,
+                         PyArrayObject *X, PyArrayObject *P, PyArrayObject *states)
+{
+    memset(input, 0, sizeof(FilterInput));
+    input->observations = (PyArrayObject *) PyArray_FROM_OTF(obs_obj, NPY_DOUBLE, NPY_ARRAY_IN_ARRAY);
+    if (input->observations == NULL)
+        return -1;
+    if (PyArray_NDIM(input->observations) != 2) {
+        PyErr_SetString(PyExc_ValueError, "Observations must be a (N, m) array.");
+        return -1;
+    }
+    input->N = PyArray_DIM(input->observations, 0);
+    input->m = (int) PyArray_DIM(input->observations, 1);
+    input->n = (int) PyArray_SIZE(X);
+
+    if ((input->A = input_array(A_obj, input->n, input->n, "Transition matrix")) == NULL ||
+            (input->Q = input_array(Q_obj, input->n, input->n, "Transition covariance")) == NULL ||
+            (input->C = input_array(C_obj, input->m, input->n, "Observation matrix")) == NULL ||
+            (input->R = input_array(R_obj, input->m, input->m, "Observation covariance")) == NULL)
+        return -1;
+    if (K_obj != Py_None && (input->K = input_array(K_obj, input->n, input->m, "Kalman gain")) == NULL)
+        return -1;
+    if (check_output_array(X, input->n, "State") ||
+            check_output_array(P, (npy_intp) input->n * input->n, "Covariance") ||
+            check_output_array(states, input->N * input->n, "States"))
+        return -1;
+
+    input->work = (double *) malloc(KALMAN_WORK_SIZE(input->n, input->m) * sizeof(double));
+    if (input->work == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    return 0;
+}
+
+static char kalman_filter_docs[] =
+      "Kalman filter recursion\n\n"
+      "Definition:\n"
+      "  kalman_filter(observations, A, Q, C, R, K, X, P, states)\n\n"
+      "Parameters::\n\n"
+      "  observations\n"
+      "    A (N, m) array of observations.\n\n"
+      "  A, Q\n"
+      "    The (n, n) transition matrix and transition covariance.\n\n"
+      "  C, R\n"
+      "    The (m, n) observation matrix and (m, m) observation covariance.\n\n"
+      "  K\n"
+      "    A fixed (n, m) Kalman gain, or None to compute the gain from the covariance.\n\n"
+      "  X, P\n"
+      "    Contiguous float64 arrays with the initial state and covariance.\n"
+      "    They are updated in place to the final state and covariance.\n\n"
+      "  states\n"
+      "    A contiguous float64 (N, n) array the state after each update is written to.\n\n"
+      "Return::\n\n"
+      "  numpy.ndarray\n"
+      "    The states array.\n\n";
+
+static PyObject *kalman_filter_func(PyObject *self, PyObject *args)
+{
+    PyObject *obs_obj, *A_obj, *Q_obj, *C_obj, *R_obj, *K_obj;
+    PyArrayObject *X, *P, *states;
+    FilterInput input;
+    int status;
+
+    /* Parse the input.*/
+    if (!PyArg_ParseTuple(args, "OOOOOOO!O!O!", &obs_obj, &A_obj, &Q_obj, &C_obj, &R_obj, &K_obj,
+                          &PyArray_Type, &X, &PyArray_Type, &P, &PyArray_Type, &states))
+        return NULL;
+    if (prepare_input(&input, obs_obj, A_obj, Q_obj, C_obj, R_obj, K_obj, X, P, states)) {
+        release_input(&input);
+        return NULL;
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    status = KalmanFilter((long) input.N, input.n, input.m,
+                          (const double *) PyArray_DATA(input.observations),
+                          (const double *) PyArray_DATA(input.A), (const double *) PyArray_DATA(input.Q),
+                          (const double *) PyArray_DATA(input.C), (const double *) PyArray_DATA(input.R),
+                          input.K == NULL ? NULL : (const double *) PyArray_DATA(input.K),
+                          (double *) PyArray_DATA(X), (double *) PyArray_DATA(P),
+                          (double *) PyArray_DATA(states), input.work);
+    Py_END_ALLOW_THREADS
+
+    release_input(&input);
+    if (status) {
+        PyErr_SetString(PyExc_ValueError, "Innovation covariance is not positive definite.");
+        return NULL;
+    }
+    Py_INCREF(states);
+    return (PyObject *) states;
+}
+
+static char static_position_filter_docs[] =
+      "Static detecting position Kalman filter recursion\n\n"
+      "Definition:\n"
+      "  static_position_filter(observations, static, A, Q, C, R, K, X, P, states)\n\n"
+      "Parameters::\n\n"
+      "  observations\n"
+      "    A (N, 3) array of accelerations, with gravity removed.\n\n"
+      "  static\n"
+      "    A (N, ) boolean array, set for the samples where the sensor is lying\n"
+      "    still and the velocity is clamped to zero and the position held.\n\n"
+      "  A, Q, C, R, K, X, P, states\n"
+      "    As for kalman_filter, with n = 9 and m = 3.\n\n"
+      "Return::\n\n"
+      "  numpy.ndarray\n"
+      "    The states array.\n\n";
+
+static PyObject *static_position_filter_func(PyObject *self, PyObject *args)
+{
+    PyObject *obs_obj, *static_obj, *A_obj, *Q_obj, *C_obj, *R_obj, *K_obj;
+    PyArrayObject *X, *P, *states, *static_mask;
+    FilterInput input;
+    int status;
+
+    /* Parse the input.*/
+    if (!PyArg_ParseTuple(args, "OOOOOOOO!O!O!", &obs_obj, &static_obj, &A_obj, &Q_obj, &C_obj, &R_obj, &K_obj,
+                          &PyArray_Type, &X, &PyArray_Type, &P, &PyArray_Type, &states))
+        return NULL;
+    if (prepare_input(&input, obs_obj, A_obj, Q_obj, C_obj, R_obj, K_obj, X, P, states)) {
+        release_input(&input);
+        return NULL;
+    }
+    if (input.n != 9 || input.m != 3) {
+        PyErr_SetString(PyExc_ValueError, "The static position filter has 9 states and 3 observations.");
+        release_input(&input);
+        return NULL;
+    }
+    static_mask = (PyArrayObject *) PyArray_FROM_OTF(static_obj, NPY_BOOL, NPY_ARRAY_IN_ARRAY);
+    if (static_mask == NULL) {
+        release_input(&input);
+        return NULL;
+    }
+    if (PyArray_SIZE(static_mask) != input.N) {
+        PyErr_SetString(PyExc_ValueError, "Static must have one value per observation.");
+        Py_DECREF(static_mask);
+        release_input(&input);
+        return NULL;
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    status = StaticPositionKalmanFilter((long) input.N, (const double *) PyArray_DATA(input.observations),
+                                        (const unsigned char *) PyArray_DATA(static_mask),
+                                        (const double *) PyArray_DATA(input.A), (const double *) PyArray_DATA(input.Q),
+                                        (const double *) PyArray_DATA(input.C), (const double *) PyArray_DATA(input.R),
+                                        input.K == NULL ? NULL : (const double *) PyArray_DATA(input.K),
+                                        (double *) PyArray_DATA(X), (double *) PyArray_DATA(P),
+                                        (double *) PyArray_DATA(states), input.work);
+    Py_END_ALLOW_THREADS
+
+    Py_DECREF(static_mask);
+    release_input(&input);
+    if (status) {
+        PyErr_SetString(PyExc_ValueError, "Innovation covariance is not positive definite.");
+        return NULL;
+    }
+    Py_INCREF(states);
+    return (PyObject *) states;
+}
+
+static char decoupled_position_filter_docs[] =
+      "Per axis decoupled static detecting position Kalman filter recursion\n\n"
+      "Definition:\n"
+      "  decoupled_position_filter(observations, static, F, Q, r, X, P, states)\n\n"
+      "Parameters::\n\n"
+      "  observations, static\n"
+      "    As for static_position_filter.\n\n"
+      "  F\n"
+      "    The (3, 3) per axis transition matrix.\n\n"
+      "  Q\n"
+      "    The (3, 3, 3) per axis transition covariances.\n\n"
+      "  r\n"
+      "    The (3, ) per axis observation variances.\n\n"
+      "  X, P\n"
+      "    Contiguous float64 arrays with the initial 9-element state and the\n"
+      "    (3, 3, 3) per axis covariances, updated in place.\n\n"
+      "  states\n"
+      "    A contiguous float64 (N, 9) array the state after each update is written to.\n\n"
+      "Return::\n\n"
+      "  numpy.ndarray\n"
+      "    The states array.\n\n";
+
+static PyObject *decoupled_position_filter_func(PyObject *self, PyObject *args)
+{
+    PyObject *obs_obj, *static_obj, *F_obj, *Q_obj, *r_obj;
+    PyArrayObject *observations = NULL, *static_mask = NULL, *F = NULL, *Q = NULL, *r = NULL;
+    PyArrayObject *X, *P, *states;
+    PyObject *result = NULL;
+    npy_intp N;
+    int status;
+
+    /* Parse the input.*/
+    if (!PyArg_ParseTuple(args, "OOOOOO!O!O!", &obs_obj, &static_obj, &F_obj, &Q_obj, &r_obj,
+                          &PyArray_Type, &X, &PyArray_Type, &P, &PyArray_Type, &states))
+        return NULL;
+    observations = (PyArrayObject *) PyArray_FROM_OTF(obs_obj, NPY_DOUBLE, NPY_ARRAY_IN_ARRAY);
+    if (observations == NULL)
+        goto fail;
+    if (PyArray_NDIM(observations) != 2 || PyArray_DIM(observations, 1) != 3) {
+        PyErr_SetString(PyExc_ValueError, "Observations must be a (N, 3) array.");
+        goto fail;
+    }
+    N = PyArray_DIM(observations, 0);
+    if ((F = input_array(F_obj, 3, 3, "Transition matrix")) == NULL ||
+            (r = input_array(r_obj, 3, -1, "Observation variances")) == NULL)
+        goto fail;
+    Q = (PyArrayObject *) PyArray_FROM_OTF(Q_obj, NPY_DOUBLE, NPY_ARRAY_IN_ARRAY);
+    if (Q == NULL)
+        goto fail;
+    if (PyArray_NDIM(Q) != 3 || PyArray_SIZE(Q) != 27 || PyArray_DIM(Q, 0) != 3 || PyArray_DIM(Q, 1) != 3) {
+        PyErr_SetString(PyExc_ValueError, "Transition covariances has the wrong shape.");
+        goto fail;
+    }
+    if (check_output_array(X, 9, "State") || check_output_array(P, 27, "Covariances") ||
+            check_output_array(states, N * 9, "States"))
+        goto fail;
+    static_mask = (PyArrayObject *) PyArray_FROM_OTF(static_obj, NPY_BOOL, NPY_ARRAY_IN_ARRAY);
+    if (static_mask == NULL)
+        goto fail;
+    if (PyArray_SIZE(static_mask) != N) {
+        PyErr_SetString(PyExc_ValueError, "Static must have one value per observation.");
+        goto fail;
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    status = DecoupledPositionKalmanFilter((long) N, (const double *) PyArray_DATA(observations),
+                                           (const unsigned char *) PyArray_DATA(static_mask),
+                                           (const double *) PyArray_DATA(F), (const double *) PyArray_DATA(Q),
+                                           (const double *) PyArray_DATA(r),
+                                           (double *) PyArray_DATA(X), (double *) PyArray_DATA(P),
+                                           (double *) PyArray_DATA(states));
+    Py_END_ALLOW_THREADS
+
+    if (status) {
+        PyErr_SetString(PyExc_ValueError, "Innovation variance is not positive.");
+        goto fail;
+    }
+    Py_INCREF(states);
+    result = (PyObject *) states;
+
+fail:
+    Py_XDECREF(observations);
+    Py_XDECREF(static_mask);
+    Py_XDECREF(F);
+    Py_XDECREF(Q);
+    Py_XDECREF(r);
+    return result;
+}
+
+static PyMethodDef ckalmanMethods[] = {
+    {"kalman_filter", kalman_filter_func, METH_VARARGS, kalman_filter_docs},
+    {"static_position_filter", static_position_filter_func, METH_VARARGS, static_position_filter_docs},
+    {"decoupled_position_filter", decoupled_position_filter_func, METH_VARARGS, decoupled_position_filter_docs},
+     {NULL, NULL, 0, NULL} /* Sentinel */
+};
+
+static char ckalman_docs[] = "Python C extension of the Kalman filter recursions";
+
+#if PY_MAJOR_VERSION >= 3
+
+static struct PyModuleDef ckalmanModule = {
+    PyModuleDef_HEAD_INIT, "ckalman", ckalman_docs, -1, ckalmanMethods
+};
+
+PyMODINIT_FUNC PyInit_ckalman(void)
+{
+    import_array();
+    return PyModule_Create(&ckalmanModule);
+}
+
+#else
+
+PyMODINIT_FUNC initckalman(void)
+{
+    (void) Py_InitModule3("ckalman", ckalmanMethods, ckalman_docs);
+    import_array();
+}
+
+#endif
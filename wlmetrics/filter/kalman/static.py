@@ -23,12 +23,81 @@ import time
 
 import numpy as np
 
-from wlmetrics.filter.kalman.kalman import KalmanFilter
+from wlmetrics.filter.kalman.kalman import KalmanFilter, ckalman, _output_array
+
+
+def detect_static_periods(observations, static_threshold, static_limit, static_counter=0, out=None):
+    """Find the samples where the sensor is lying still, and the gravity vector.
+
+    A sample is static when the norm of the observation is within ``static_threshold``
+    of 1 g. A static counter is incremented for each static sample and reset on
+    non-static ones, and the sensor is lying still when the counter exceeds
+    ``static_limit``. The gravity vector is then the mean of the observations since
+    the sensor started lying still, and otherwise the last such mean.
+
+    Everything is computed in one vectorised pass, with the running means taken from
+    cumulative sums, so the cost is linear in the number of samples.
+
+    :param observations: A (N, 3) array of accelerometer values, in g.
+    :type observations: :py:class:`numpy.ndarray`
+    :param static_threshold: Maximal deviation from 1 g of a static sample.
+    :type static_threshold: float
+    :param static_limit: The static counter value above which the sensor is lying still.
+    :type static_limit: float
+    :param static_counter: The static counter before the first sample.
+    :type static_counter: float
+    :param out: Optional (N, ) and (N, 3) arrays to write the static flags and
+        gravity vectors to.
+    :type out: tuple
+    :return: A (N, ) array with 1 for samples where the sensor is lying still, 0.5
+        for other static samples and 0 for non-static samples, the (N, 3) array of
+        gravity vectors and the static counter after the last sample.
+    :rtype: tuple
+
+    """
+    observations = np.asarray(observations, 'float')
+    n = len(observations)
+    out = (None, None) if out is None else out
+    static_array = _output_array(out[0], (n, ))
+    gravity = _output_array(out[1], (n, 3))
+    if n == 0:
+        return static_array, gravity, static_counter
+    index = np.arange(n)
+
+    # Start of the run of static samples each static sample belongs to, and the
+    # number of samples into the run where the counter exceeds the limit.
+    static_sample = np.abs(1 - np.sqrt(np.sum(observations ** 2, axis=1))) < static_threshold
+    run_start = np.maximum.accumulate(np.where(static_sample, 0, index + 1))
+    base = np.where(run_start == 0, static_counter, 0)
+    needed = np.where(base > static_limit, 0, np.floor(static_limit - base) + 1)
+    run_length = index - run_start + 1
+    lying_still = static_sample & (run_length >= needed)
+
+    if static_sample[-1]:
+        static_counter = base[-1] + min(run_length[-1], needed[-1])
+    else:
+        static_counter = 0
+    static_array[:] = static_sample
+    static_array[lying_still] = 2
+    static_array *= 0.5
+
+    # Running means of the periods lying still, held until the next one.
+    period_start = lying_still & ~np.concatenate([[False], lying_still[:-1]])
+    period_start = np.maximum.accumulate(np.where(period_start, index, 0))
+    sums = np.zeros((n + 1, 3), 'float')
+    np.cumsum(np.where(lying_still[:, np.newaxis], observations, 0), axis=0, out=sums[1:, :])
+    means = (sums[1:, :] - sums[period_start, :]) / (index - period_start + 1)[:, np.newaxis]
+    last_still = np.maximum.accumulate(np.where(lying_still, index, -1))
+    np.take(means, np.maximum(last_still, 0), axis=0, out=gravity)
+    gravity[last_still < 0, :] = observations[0, :]
+
+    return static_array, gravity, static_counter
 
 
 class StaticDetectingPositionKalmanFilter(KalmanFilter):
 
-    def __init__(self, data_freq, static_threshold=0.1, static_time=0.25):
+    def __init__(self, data_freq, static_threshold=0.1, static_time=0.25, steady_state=False,
+                 use_extension=True):
 
         self.f = data_freq
         self.static_threshold = static_threshold
@@ -46,59 +115,84 @@ class StaticDetectingPositionKalmanFilter(KalmanFilter):
         observation_covariance = np.eye(3) * 20
 
         super(StaticDetectingPositionKalmanFilter, self).__init__(
-            transition_matrix, transition_covariance, observation_matrix, observation_covariance)
+            transition_matrix, transition_covariance, observation_matrix, observation_covariance,
+            steady_state=steady_state, use_extension=use_extension)
 
         self._static_counter = self.f
 
         self.set_initial_state(np.zeros((len(transition_matrix), ), 'float'),
                                np.zeros((len(transition_matrix), len(transition_matrix)), 'float'))
 
-    def filter(self, observations):
-        states = []
-        gravity = []
-        static_array = []
-        static_position = None
+    def filter(self, observations, out=None):
+        """Run the filter over a recording of accelerometer values.
+
+        :param observations: A (N, 3) array of accelerometer values, in g.
+        :type observations: :py:class:`numpy.ndarray`
+        :param out: Optional (N, 9), (N, ) and (N, 3) float64 arrays to write the
+            states, static flags and gravity vectors to. The states array must be
+            contiguous if the C extension is used.
+        :type out: tuple
+        :return: The states, static flags and gravity vectors.
+        :rtype: tuple
+
+        """
+        observations = np.asarray(observations, 'float')
+        out = (None, None, None) if out is None else out
+        states = _output_array(out[0], (len(observations), len(self.X)))
+        static_array, gravity, self._static_counter = detect_static_periods(
+            observations, self.static_threshold, self.f * self.static_time, self._static_counter,
+            out=out[1:])
+        lying_still = static_array == 1
+        accelerations = observations - gravity
+        accelerations *= 9.81
+
+        if self.use_extension:
+            self._extension_filter(accelerations, lying_still, states)
+            return states, static_array, gravity
 
-        current_gravity_vector = observations[0, :]
-        static_since = 0
+        static_position = None
 
-        X = self.X
+        X = self.X.copy()
         P = self.P
 
-        for i, observation in enumerate(observations):
-            if np.abs(1 - np.linalg.norm(observation)) < self.static_threshold and self.is_static():
-                current_gravity_vector = np.mean(observations[static_since:i+1, :], 0)
-                static_array.append(1)
+        for i, observation in enumerate(accelerations):
+            if lying_still[i]:
                 X[3:6] = 0
                 static_position = X[6:].copy()
-            else:
-                if np.abs(1 - np.linalg.norm(observation)) < self.static_threshold:
-                    self._static_counter += 1
-                    if self.is_static():
-                        static_since = i
-                        current_gravity_vector = np.mean(observations[static_since:i + 1, :], 0)
-                        static_array.append(1)
-                        X[3:6] = 0
-                        static_position = X[6:].copy()
-
-                    else:
-                        static_array.append(0.5)
-                else:
-                    self._static_counter = 0
-                    static_since = None
-                    static_array.append(0)
-            gravity.append(current_gravity_vector.copy())
             X, P = self.kf_predict(X, P)
-            if self.is_static():
+            if lying_still[i]:
                 X[3:6] = 0
                 X[6:] = static_position
-            X, P, K, IM, IS = self.kf_update(X, P, (observation - current_gravity_vector) * 9.81)
-            if self.is_static():
+            X, P, K, IM, IS = self.kf_update(X, P, observation)
+            if lying_still[i]:
                 X[3:6] = 0
                 X[6:] = static_position
-            states.append(X)
+            states[i, :] = X
+
+        return states, static_array, gravity
+
+    def _extension_filter(self, accelerations, lying_still, states):
+        ckalman.static_position_filter(
+            accelerations, lying_still, self.transition_matrix, self.transition_covariance,
+            self.observation_matrix, self.observation_covariance, self._fixed_gain(),
+            np.array(self.X, 'float'), np.array(self.P, 'float'), states)
+
+    def log_likelihood(self, observations, transition_covariance=None, observation_covariance=None,
+                       chunk_size=4096):
+        """The innovation log likelihood of a recording of accelerometer values, in g.
+
+        The gravity vector is removed as in :py:meth:`filter`. The clamping of velocity
+        and position while lying still does not change the innovations, since only the
+        accelerations are observed, so it is not applied. The static counter is not updated.
+
+        See :py:meth:`KalmanFilter.log_likelihood`.
 
-        return np.array(states), np.array(static_array), np.array(gravity)
+        """
+        observations = np.asarray(observations, 'float')
+        static_array, gravity, static_counter = detect_static_periods(
+            observations, self.static_threshold, self.f * self.static_time, self._static_counter)
+        return super(StaticDetectingPositionKalmanFilter, self).log_likelihood(
+            (observations - gravity) * 9.81, transition_covariance, observation_covariance, chunk_size)
 
     def is_static(self):
         return self._static_counter > (self.f * self.static_time)
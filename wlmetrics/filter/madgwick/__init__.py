@@ -23,7 +23,7 @@ import numpy as np
 
 from wlmetrics.quaternion import Quaternion
 
-__all__ = ['MadgwickAHRSFilter']
+__all__ = ['MadgwickAHRSFilter', 'MultiStreamMadgwickAHRSFilter']
 
 try:
     from . import madgwick
@@ -34,30 +34,97 @@ except Exception as e:
 class MadgwickAHRSFilter(object):
     """Python """
 
-    def __init__(self, frequency):
-        """Constructor for MadgwickAHRSFilter"""
+    def __init__(self, frequency, beta=0.1):
+        """Constructor for MadgwickAHRSFilter
+
+        :param frequency: The sampling frequency of the data.
+        :type frequency: float
+        :param beta: The algorithm gain.
+        :type beta: float
+
+        """
         self.frequency = frequency
+        self.beta = beta
         self.quaternion = Quaternion([1, 0, 0, 0])
 
     def update_filter(self, a, g, m=None):
         if m is None:
-            self.quaternion = madgwick.magdwick_AHRS_update_IMU(
-                a[0], a[1], a[2], g[0], g[1], g[2],
-                self.frequency, *self.quaternion.to_array())
+            self.quaternion = Quaternion(madgwick.magdwick_AHRS_update_IMU(
+                g[0], g[1], g[2], a[0], a[1], a[2],
+                self.frequency, self.beta, *self.quaternion))
         else:
-            self.quaternion = madgwick.magdwick_AHRS_update(
-                a[0], a[1], a[2], g[0], g[1], g[2], m[0], m[1], m[2],
-                self.frequency, *self.quaternion.to_array())
+            self.quaternion = Quaternion(madgwick.magdwick_AHRS_update(
+                g[0], g[1], g[2], a[0], a[1], a[2], m[0], m[1], m[2],
+                self.frequency, self.beta, *self.quaternion))
+
+    def filter(self, observations, out=None):
+        """Run the filter over a whole recording.
+
+        The update loop is run in the C extension, with the GIL released.
+
+        :param observations: A (N, 6) or (N, 9) array with accelerometer,
+            gyroscope and (optionally) magnetometer values on each row.
+        :type observations: :py:class:`numpy.ndarray`
+        :param out: Optional contiguous (N, 4) float64 array to write the result to.
+        :type out: :py:class:`numpy.ndarray`
+        :return: A (N, 4) array with the quaternion after each sample.
+        :rtype: :py:class:`numpy.ndarray`
 
-    def filter(self, observations):
-        states = []
-        for observation in observations:
-            if len(observation) == 9:
-                self.update_filter(observation[:3], observation[3:6], observation[6:])
-            elif len(observation) == 6:
-                self.update_filter(observation[:3], observation[3:6])
-            states.append(self.quaternion.to_array())
+        """
+        observations = np.ascontiguousarray(observations, 'float')
+        states = madgwick.magdwick_AHRS_filter(
+            observations, self.frequency, self.beta, tuple(self.quaternion), out)
+        if len(states):
+            self.quaternion = Quaternion(states[-1, :])
+        return states
 
-        return np.array(states)
 
+class MultiStreamMadgwickAHRSFilter(object):
+    """Madgwick filter running several independent streams at once.
 
+    All streams are advanced together at each time step, with the streams
+    laid out next to each other in memory so the update is vectorised
+    across them. The results are identical to running one
+    :py:class:`MadgwickAHRSFilter` per stream.
+
+    """
+
+    def __init__(self, frequency, n_streams, beta=0.1):
+        """Constructor for MultiStreamMadgwickAHRSFilter
+
+        :param frequency: The sampling frequency of the data.
+        :type frequency: float
+        :param n_streams: The number of streams to filter.
+        :type n_streams: int
+        :param beta: The algorithm gain.
+        :type beta: float
+
+        """
+        self.frequency = frequency
+        self.beta = beta
+        self._quaternions = np.zeros((4, n_streams), 'float32')
+        self._quaternions[0, :] = 1.0
+
+    @property
+    def quaternions(self):
+        """The current quaternions, as a (M, 4) array."""
+        return self._quaternions.T
+
+    def filter(self, observations, out=None):
+        """Run the filter over M recordings of equal length.
+
+        :param observations: A (M, N, 6) or (M, N, 9) array with accelerometer,
+            gyroscope and (optionally) magnetometer values for each stream.
+        :type observations: :py:class:`numpy.ndarray`
+        :param out: Optional contiguous (M, N, 4) float64 array to write the result to.
+        :type out: :py:class:`numpy.ndarray`
+        :return: A (M, N, 4) array with the quaternions after each sample.
+        :rtype: :py:class:`numpy.ndarray`
+
+        """
+        observations = np.ascontiguousarray(observations, 'float')
+        if observations.ndim != 3 or observations.shape[0] != self._quaternions.shape[1]:
+            raise ValueError("Observations must be a (M, N, 6) or (M, N, 9) array "
+                             "with M = {0}.".format(self._quaternions.shape[1]))
+        return madgwick.magdwick_AHRS_filter_streams(
+            observations, self.frequency, self.beta, self._quaternions, out)
@@ -10,6 +10,10 @@
 // 02/10/2011	SOH Madgwick	Optimised for reduced CPU load
 // 19/02/2012	SOH Madgwick	Magnetometer measurement is normalised
 // 21/06/2015   hbldh           Adapted for use as Python C extension methods
+// 18/10/2026   hbldh           32 bit safe invSqrt, fixed quaternion pointer in IMU fallback
+// 18/10/2026   hbldh           Gain beta passed per call instead of global volatile
+// 18/10/2026   hbldh           Multi-stream versions working on arrays of quaternions
+// 19/10/2026   hbldh           Portable restrict qualifier
 //
 //=====================================================================================================
 
@@ -18,22 +22,12 @@
 
 #include "MadgwickAHRS.h"
 #include <math.h>
-
-//---------------------------------------------------------------------------------------------------
-// Definitions
-
-
-#define betaDef		0.1f		// 2 * proportional gain
-
-//---------------------------------------------------------------------------------------------------
-// Variable definitions
-
-volatile float beta = betaDef;								// 2 * proportional gain (Kp)
+#include <stdint.h>
 
 //---------------------------------------------------------------------------------------------------
 // Function declarations
 
-float invSqrt(float x);
+static float invSqrt(float x);
 
 //====================================================================================================
 // Functions
@@ -41,7 +35,7 @@ float invSqrt(float x);
 //---------------------------------------------------------------------------------------------------
 // AHRS algorithm update
 
-void MadgwickAHRSupdate(float gx, float gy, float gz, float ax, float ay, float az, float mx, float my, float mz, float sampleFreq, float *q) {
+void MadgwickAHRSupdate(float gx, float gy, float gz, float ax, float ay, float az, float mx, float my, float mz, float sampleFreq, float beta, float *q) {
 	float recipNorm;
 	float s0, s1, s2, s3;
 	float qDot1, qDot2, qDot3, qDot4;
@@ -50,7 +44,7 @@ void MadgwickAHRSupdate(float gx, float gy, float gz, float ax, float ay, float
 
 	// Use IMU algorithm if magnetometer measurement invalid (avoids NaN in magnetometer normalisation)
 	if((mx == 0.0f) && (my == 0.0f) && (mz == 0.0f)) {
-		MadgwickAHRSupdateIMU(gx, gy, gz, ax, ay, az, sampleFreq, &q);
+		MadgwickAHRSupdateIMU(gx, gy, gz, ax, ay, az, sampleFreq, beta, q);
 		return;
 	}
 
@@ -140,7 +134,7 @@ void MadgwickAHRSupdate(float gx, float gy, float gz, float ax, float ay, float
 //---------------------------------------------------------------------------------------------------
 // IMU algorithm update
 
-void MadgwickAHRSupdateIMU(float gx, float gy, float gz, float ax, float ay, float az, float sampleFreq, float *q) {
+void MadgwickAHRSupdateIMU(float gx, float gy, float gz, float ax, float ay, float az, float sampleFreq, float beta, float *q) {
 	float recipNorm;
 	float s0, s1, s2, s3;
 	float qDot1, qDot2, qDot3, qDot4;
@@ -208,18 +202,221 @@ void MadgwickAHRSupdateIMU(float gx, float gy, float gz, float ax, float ay, flo
 	q[3] *= recipNorm;
 }
 
+//---------------------------------------------------------------------------------------------------
+// IMU algorithm update of n independent streams
+//
+// The quaternions and measurements are stored as one array per component, with one element per
+// stream, so that the loop over the streams can be vectorised. The branch on a valid accelerometer
+// measurement is replaced by a feedback gain that is zero for invalid measurements.
+
+void MadgwickAHRSupdateIMUArray(int n, const float * MADGWICK_RESTRICT gx, const float * MADGWICK_RESTRICT gy, const float * MADGWICK_RESTRICT gz, const float * MADGWICK_RESTRICT ax, const float * MADGWICK_RESTRICT ay, const float * MADGWICK_RESTRICT az, float sampleFreq, float beta, float * MADGWICK_RESTRICT q0, float * MADGWICK_RESTRICT q1, float * MADGWICK_RESTRICT q2, float * MADGWICK_RESTRICT q3) {
+	int k;
+	float recipNorm;
+	float s0, s1, s2, s3;
+	float qDot1, qDot2, qDot3, qDot4;
+	float _ax, _ay, _az, _q0, _q1, _q2, _q3;
+	float _2q0, _2q1, _2q2, _2q3, _4q0, _4q1, _4q2 ,_8q1, _8q2, q0q0, q1q1, q2q2, q3q3;
+	float feedback;
+
+	for(k = 0; k < n; k++) {
+		_q0 = q0[k];
+		_q1 = q1[k];
+		_q2 = q2[k];
+		_q3 = q3[k];
+
+		// Rate of change of quaternion from gyroscope
+		qDot1 = 0.5f * (-_q1 * gx[k] - _q2 * gy[k] - _q3 * gz[k]);
+		qDot2 = 0.5f * (_q0 * gx[k] + _q2 * gz[k] - _q3 * gy[k]);
+		qDot3 = 0.5f * (_q0 * gy[k] - _q1 * gz[k] + _q3 * gx[k]);
+		qDot4 = 0.5f * (_q0 * gz[k] + _q1 * gy[k] - _q2 * gx[k]);
+
+		// Feedback is only applied if accelerometer measurement valid
+		feedback = beta * (float) ((ax[k] != 0.0f) | (ay[k] != 0.0f) | (az[k] != 0.0f));
+
+		// Normalise accelerometer measurement
+		recipNorm = invSqrt(ax[k] * ax[k] + ay[k] * ay[k] + az[k] * az[k]);
+		_ax = ax[k] * recipNorm;
+		_ay = ay[k] * recipNorm;
+		_az = az[k] * recipNorm;
+
+		// Auxiliary variables to avoid repeated arithmetic
+		_2q0 = 2.0f * _q0;
+		_2q1 = 2.0f * _q1;
+		_2q2 = 2.0f * _q2;
+		_2q3 = 2.0f * _q3;
+		_4q0 = 4.0f * _q0;
+		_4q1 = 4.0f * _q1;
+		_4q2 = 4.0f * _q2;
+		_8q1 = 8.0f * _q1;
+		_8q2 = 8.0f * _q2;
+		q0q0 = _q0 * _q0;
+		q1q1 = _q1 * _q1;
+		q2q2 = _q2 * _q2;
+		q3q3 = _q3 * _q3;
+
+		// Gradient decent algorithm corrective step
+		s0 = _4q0 * q2q2 + _2q2 * _ax + _4q0 * q1q1 - _2q1 * _ay;
+		s1 = _4q1 * q3q3 - _2q3 * _ax + 4.0f * q0q0 * _q1 - _2q0 * _ay - _4q1 + _8q1 * q1q1 + _8q1 * q2q2 + _4q1 * _az;
+		s2 = 4.0f * q0q0 * _q2 + _2q0 * _ax + _4q2 * q3q3 - _2q3 * _ay - _4q2 + _8q2 * q1q1 + _8q2 * q2q2 + _4q2 * _az;
+		s3 = 4.0f * q1q1 * _q3 - _2q1 * _ax + 4.0f * q2q2 * _q3 - _2q2 * _ay;
+		recipNorm = invSqrt(s0 * s0 + s1 * s1 + s2 * s2 + s3 * s3); // normalise step magnitude
+		s0 *= recipNorm;
+		s1 *= recipNorm;
+		s2 *= recipNorm;
+		s3 *= recipNorm;
+
+		// Apply feedback step
+		qDot1 -= feedback * s0;
+		qDot2 -= feedback * s1;
+		qDot3 -= feedback * s2;
+		qDot4 -= feedback * s3;
+
+		// Integrate rate of change of quaternion to yield quaternion
+		_q0 += qDot1 * (1.0f / sampleFreq);
+		_q1 += qDot2 * (1.0f / sampleFreq);
+		_q2 += qDot3 * (1.0f / sampleFreq);
+		_q3 += qDot4 * (1.0f / sampleFreq);
+
+		// Normalise quaternion
+		recipNorm = invSqrt(_q0 * _q0 + _q1 * _q1 + _q2 * _q2 + _q3 * _q3);
+		q0[k] = _q0 * recipNorm;
+		q1[k] = _q1 * recipNorm;
+		q2[k] = _q2 * recipNorm;
+		q3[k] = _q3 * recipNorm;
+	}
+}
+
+//---------------------------------------------------------------------------------------------------
+// AHRS algorithm update of n independent streams
+//
+// Streams with an invalid magnetometer measurement get the IMU algorithm step, as in
+// MadgwickAHRSupdate, by blending the two corrective steps with a 0/1 weight.
+
+void MadgwickAHRSupdateArray(int n, const float * MADGWICK_RESTRICT gx, const float * MADGWICK_RESTRICT gy, const float * MADGWICK_RESTRICT gz, const float * MADGWICK_RESTRICT ax, const float * MADGWICK_RESTRICT ay, const float * MADGWICK_RESTRICT az, const float * MADGWICK_RESTRICT mx, const float * MADGWICK_RESTRICT my, const float * MADGWICK_RESTRICT mz, float sampleFreq, float beta, float * MADGWICK_RESTRICT q0, float * MADGWICK_RESTRICT q1, float * MADGWICK_RESTRICT q2, float * MADGWICK_RESTRICT q3) {
+	int k;
+	float recipNorm;
+	float s0, s1, s2, s3, t0, t1, t2, t3;
+	float qDot1, qDot2, qDot3, qDot4;
+	float hx, hy;
+	float _ax, _ay, _az, _mx, _my, _mz, _q0, _q1, _q2, _q3;
+	float _2q0mx, _2q0my, _2q0mz, _2q1mx, _2bx, _2bz, _4bx, _4bz, _2q0, _2q1, _2q2, _2q3, _2q0q2, _2q2q3, q0q0, q0q1, q0q2, q0q3, q1q1, q1q2, q1q3, q2q2, q2q3, q3q3;
+	float _4q0, _4q1, _4q2 ,_8q1, _8q2;
+	float feedback, magnetometer;
+
+	for(k = 0; k < n; k++) {
+		_q0 = q0[k];
+		_q1 = q1[k];
+		_q2 = q2[k];
+		_q3 = q3[k];
+
+		// Rate of change of quaternion from gyroscope
+		qDot1 = 0.5f * (-_q1 * gx[k] - _q2 * gy[k] - _q3 * gz[k]);
+		qDot2 = 0.5f * (_q0 * gx[k] + _q2 * gz[k] - _q3 * gy[k]);
+		qDot3 = 0.5f * (_q0 * gy[k] - _q1 * gz[k] + _q3 * gx[k]);
+		qDot4 = 0.5f * (_q0 * gz[k] + _q1 * gy[k] - _q2 * gx[k]);
+
+		// Feedback is only applied if accelerometer measurement valid, magnetometer is only used if valid
+		feedback = beta * (float) ((ax[k] != 0.0f) | (ay[k] != 0.0f) | (az[k] != 0.0f));
+		magnetometer = (float) ((mx[k] != 0.0f) | (my[k] != 0.0f) | (mz[k] != 0.0f));
+
+		// Normalise accelerometer measurement
+		recipNorm = invSqrt(ax[k] * ax[k] + ay[k] * ay[k] + az[k] * az[k]);
+		_ax = ax[k] * recipNorm;
+		_ay = ay[k] * recipNorm;
+		_az = az[k] * recipNorm;
+
+		// Normalise magnetometer measurement
+		recipNorm = invSqrt(mx[k] * mx[k] + my[k] * my[k] + mz[k] * mz[k]);
+		_mx = mx[k] * recipNorm;
+		_my = my[k] * recipNorm;
+		_mz = mz[k] * recipNorm;
+
+		// Auxiliary variables to avoid repeated arithmetic
+		_2q0mx = 2.0f * _q0 * _mx;
+		_2q0my = 2.0f * _q0 * _my;
+		_2q0mz = 2.0f * _q0 * _mz;
+		_2q1mx = 2.0f * _q1 * _mx;
+		_2q0 = 2.0f * _q0;
+		_2q1 = 2.0f * _q1;
+		_2q2 = 2.0f * _q2;
+		_2q3 = 2.0f * _q3;
+		_2q0q2 = 2.0f * _q0 * _q2;
+		_2q2q3 = 2.0f * _q2 * _q3;
+		_4q0 = 4.0f * _q0;
+		_4q1 = 4.0f * _q1;
+		_4q2 = 4.0f * _q2;
+		_8q1 = 8.0f * _q1;
+		_8q2 = 8.0f * _q2;
+		q0q0 = _q0 * _q0;
+		q0q1 = _q0 * _q1;
+		q0q2 = _q0 * _q2;
+		q0q3 = _q0 * _q3;
+		q1q1 = _q1 * _q1;
+		q1q2 = _q1 * _q2;
+		q1q3 = _q1 * _q3;
+		q2q2 = _q2 * _q2;
+		q2q3 = _q2 * _q3;
+		q3q3 = _q3 * _q3;
+
+		// Reference direction of Earth's magnetic field
+		hx = _mx * q0q0 - _2q0my * _q3 + _2q0mz * _q2 + _mx * q1q1 + _2q1 * _my * _q2 + _2q1 * _mz * _q3 - _mx * q2q2 - _mx * q3q3;
+		hy = _2q0mx * _q3 + _my * q0q0 - _2q0mz * _q1 + _2q1mx * _q2 - _my * q1q1 + _my * q2q2 + _2q2 * _mz * _q3 - _my * q3q3;
+		_2bx = sqrt(hx * hx + hy * hy);
+		_2bz = -_2q0mx * _q2 + _2q0my * _q1 + _mz * q0q0 + _2q1mx * _q3 - _mz * q1q1 + _2q2 * _my * _q3 - _mz * q2q2 + _mz * q3q3;
+		_4bx = 2.0f * _2bx;
+		_4bz = 2.0f * _2bz;
+
+		// Gradient decent algorithm corrective step, with and without magnetometer
+		s0 = -_2q2 * (2.0f * q1q3 - _2q0q2 - _ax) + _2q1 * (2.0f * q0q1 + _2q2q3 - _ay) - _2bz * _q2 * (_2bx * (0.5f - q2q2 - q3q3) + _2bz * (q1q3 - q0q2) - _mx) + (-_2bx * _q3 + _2bz * _q1) * (_2bx * (q1q2 - q0q3) + _2bz * (q0q1 + q2q3) - _my) + _2bx * _q2 * (_2bx * (q0q2 + q1q3) + _2bz * (0.5f - q1q1 - q2q2) - _mz);
+		s1 = _2q3 * (2.0f * q1q3 - _2q0q2 - _ax) + _2q0 * (2.0f * q0q1 + _2q2q3 - _ay) - 4.0f * _q1 * (1 - 2.0f * q1q1 - 2.0f * q2q2 - _az) + _2bz * _q3 * (_2bx * (0.5f - q2q2 - q3q3) + _2bz * (q1q3 - q0q2) - _mx) + (_2bx * _q2 + _2bz * _q0) * (_2bx * (q1q2 - q0q3) + _2bz * (q0q1 + q2q3) - _my) + (_2bx * _q3 - _4bz * _q1) * (_2bx * (q0q2 + q1q3) + _2bz * (0.5f - q1q1 - q2q2) - _mz);
+		s2 = -_2q0 * (2.0f * q1q3 - _2q0q2 - _ax) + _2q3 * (2.0f * q0q1 + _2q2q3 - _ay) - 4.0f * _q2 * (1 - 2.0f * q1q1 - 2.0f * q2q2 - _az) + (-_4bx * _q2 - _2bz * _q0) * (_2bx * (0.5f - q2q2 - q3q3) + _2bz * (q1q3 - q0q2) - _mx) + (_2bx * _q1 + _2bz * _q3) * (_2bx * (q1q2 - q0q3) + _2bz * (q0q1 + q2q3) - _my) + (_2bx * _q0 - _4bz * _q2) * (_2bx * (q0q2 + q1q3) + _2bz * (0.5f - q1q1 - q2q2) - _mz);
+		s3 = _2q1 * (2.0f * q1q3 - _2q0q2 - _ax) + _2q2 * (2.0f * q0q1 + _2q2q3 - _ay) + (-_4bx * _q3 + _2bz * _q1) * (_2bx * (0.5f - q2q2 - q3q3) + _2bz * (q1q3 - q0q2) - _mx) + (-_2bx * _q0 + _2bz * _q2) * (_2bx * (q1q2 - q0q3) + _2bz * (q0q1 + q2q3) - _my) + _2bx * _q1 * (_2bx * (q0q2 + q1q3) + _2bz * (0.5f - q1q1 - q2q2) - _mz);
+		t0 = _4q0 * q2q2 + _2q2 * _ax + _4q0 * q1q1 - _2q1 * _ay;
+		t1 = _4q1 * q3q3 - _2q3 * _ax + 4.0f * q0q0 * _q1 - _2q0 * _ay - _4q1 + _8q1 * q1q1 + _8q1 * q2q2 + _4q1 * _az;
+		t2 = 4.0f * q0q0 * _q2 + _2q0 * _ax + _4q2 * q3q3 - _2q3 * _ay - _4q2 + _8q2 * q1q1 + _8q2 * q2q2 + _4q2 * _az;
+		t3 = 4.0f * q1q1 * _q3 - _2q1 * _ax + 4.0f * q2q2 * _q3 - _2q2 * _ay;
+		s0 = magnetometer * s0 + (1.0f - magnetometer) * t0;
+		s1 = magnetometer * s1 + (1.0f - magnetometer) * t1;
+		s2 = magnetometer * s2 + (1.0f - magnetometer) * t2;
+		s3 = magnetometer * s3 + (1.0f - magnetometer) * t3;
+		recipNorm = invSqrt(s0 * s0 + s1 * s1 + s2 * s2 + s3 * s3); // normalise step magnitude
+		s0 *= recipNorm;
+		s1 *= recipNorm;
+		s2 *= recipNorm;
+		s3 *= recipNorm;
+
+		// Apply feedback step
+		qDot1 -= feedback * s0;
+		qDot2 -= feedback * s1;
+		qDot3 -= feedback * s2;
+		qDot4 -= feedback * s3;
+
+		// Integrate rate of change of quaternion to yield quaternion
+		_q0 += qDot1 * (1.0f / sampleFreq);
+		_q1 += qDot2 * (1.0f / sampleFreq);
+		_q2 += qDot3 * (1.0f / sampleFreq);
+		_q3 += qDot4 * (1.0f / sampleFreq);
+
+		// Normalise quaternion
+		recipNorm = invSqrt(_q0 * _q0 + _q1 * _q1 + _q2 * _q2 + _q3 * _q3);
+		q0[k] = _q0 * recipNorm;
+		q1[k] = _q1 * recipNorm;
+		q2[k] = _q2 * recipNorm;
+		q3[k] = _q3 * recipNorm;
+	}
+}
+
 //---------------------------------------------------------------------------------------------------
 // Fast inverse square-root
 // See: http://en.wikipedia.org/wiki/Fast_inverse_square_root
 
-float invSqrt(float x) {
+static float invSqrt(float x) {
 	float halfx = 0.5f * x;
-	float y = x;
-	long i = *(long*)&y;
-	i = 0x5f3759df - (i>>1);
-	y = *(float*)&i;
-	y = y * (1.5f - (halfx * y * y));
-	return y;
+	union { float f; int32_t i; } y;
+	y.f = x;
+	y.i = 0x5f3759df - (y.i >> 1);
+	y.f = y.f * (1.5f - (halfx * y.f * y.f));
+	return y.f;
 }
 
 //====================================================================================================
@@ -13,17 +13,22 @@
 #ifndef MadgwickAHRS_h
 #define MadgwickAHRS_h
 
-//----------------------------------------------------------------------------------------------------
-// Variable declaration
-
-extern volatile float beta;				// algorithm gain
-//extern volatile float q0, q1, q2, q3;	// quaternion of sensor frame relative to auxiliary frame
+// Restrict qualifier of the array pointers, which MSVC only has as __restrict.
+#if defined(_MSC_VER)
+#define MADGWICK_RESTRICT __restrict
+#elif defined(__STDC_VERSION__) && __STDC_VERSION__ >= 199901L
+#define MADGWICK_RESTRICT restrict
+#else
+#define MADGWICK_RESTRICT
+#endif
 
 //---------------------------------------------------------------------------------------------------
 // Function declarations
 
-void MadgwickAHRSupdate(float gx, float gy, float gz, float ax, float ay, float az, float mx, float my, float mz, float sampleFreq, float *q);
-void MadgwickAHRSupdateIMU(float gx, float gy, float gz, float ax, float ay, float az, float sampleFreq, float *q);
+void MadgwickAHRSupdate(float gx, float gy, float gz, float ax, float ay, float az, float mx, float my, float mz, float sampleFreq, float beta, float *q);
+void MadgwickAHRSupdateIMU(float gx, float gy, float gz, float ax, float ay, float az, float sampleFreq, float beta, float *q);
+void MadgwickAHRSupdateArray(int n, const float * MADGWICK_RESTRICT gx, const float * MADGWICK_RESTRICT gy, const float * MADGWICK_RESTRICT gz, const float * MADGWICK_RESTRICT ax, const float * MADGWICK_RESTRICT ay, const float * MADGWICK_RESTRICT az, const float * MADGWICK_RESTRICT mx, const float * MADGWICK_RESTRICT my, const float * MADGWICK_RESTRICT mz, float sampleFreq, float beta, float * MADGWICK_RESTRICT q0, float * MADGWICK_RESTRICT q1, float * MADGWICK_RESTRICT q2, float * MADGWICK_RESTRICT q3);
+void MadgwickAHRSupdateIMUArray(int n, const float * MADGWICK_RESTRICT gx, const float * MADGWICK_RESTRICT gy, const float * MADGWICK_RESTRICT gz, const float * MADGWICK_RESTRICT ax, const float * MADGWICK_RESTRICT ay, const float * MADGWICK_RESTRICT az, float sampleFreq, float beta, float * MADGWICK_RESTRICT q0, float * MADGWICK_RESTRICT q1, float * MADGWICK_RESTRICT q2, float * MADGWICK_RESTRICT q3);
 
 #endif
 //=====================================================================================================
@@ -9,12 +9,19 @@
  */
 
 #include <Python.h>
+#define NPY_NO_DEPRECATED_API NPY_1_7_API_VERSION
+#include <numpy/arrayobject.h>
+#include <string.h>
 #include "MadgwickAHRS.h"
+#include "filter_arrays.h"
+
+/* Number of time steps transposed at a time in the multi-stream filter. */
+#define STREAMS_BLOCK 64
 
 static char Magdwick_AHRS_update_docs[] =
       "AHRS algorithm update\n\n"
       "Definition:\n"
-      "  magdwick_AHRS_update(gx, gy, gz, ax, ay, az, mx, my, mz)\n\n"
+      "  magdwick_AHRS_update(gx, gy, gz, ax, ay, az, mx, my, mz, freq, beta, q0, q1, q2, q3)\n\n"
       "Parameters::\n\n"
       "  gx\n"
       "    Gyroscope X axis value.\n\n"
@@ -44,20 +51,21 @@ static PyObject *Magdwick_AHRS_update_func(PyObject *self, PyObject *args)
     float ax, ay, az;
     float mx, my, mz;
     float freq;
+    float beta;
     float q[4];
 
     /* Parse the input.*/
-    if (!PyArg_ParseTuple(args, "ffffffffffffff", &gx, &gy, &gz, &ax, &ay, &az, &mx, &my, &mz, &freq, &q[0], &q[1], &q[2], &q[3]))
+    if (!PyArg_ParseTuple(args, "fffffffffffffff", &gx, &gy, &gz, &ax, &ay, &az, &mx, &my, &mz, &freq, &beta, &q[0], &q[1], &q[2], &q[3]))
         return NULL;
 
-    MadgwickAHRSupdate(gx, gy, gz, ax, ay, az, mx, my, mz, freq, q);
+    MadgwickAHRSupdate(gx, gy, gz, ax, ay, az, mx, my, mz, freq, beta, q);
     return Py_BuildValue("(ffff)", q[0], q[1], q[2], q[3]);
 }
 
 static char Magdwick_AHRS_update_IMU_docs[] =
       "IMU algorithm update\n\n"
       "Definition:\n"
-      "  magdwick_AHRS_update_IMU(gx, gy, gz, ax, ay, az)\n\n"
+      "  magdwick_AHRS_update_IMU(gx, gy, gz, ax, ay, az, freq, beta, q0, q1, q2, q3)\n\n"
       "Parameters::\n\n"
       "  gx\n"
       "    Gyroscope X axis value.\n\n"
@@ -80,24 +88,230 @@ static PyObject *Magdwick_AHRS_update_IMU_func(PyObject *self, PyObject *args)
     float gx, gy, gz;
     float ax, ay, az;
     float freq;
+    float beta;
     float q[4];
 
     /* Parse the input.*/
-    if (!PyArg_ParseTuple(args, "fffffffffff", &gx, &gy, &gz, &ax, &ay, &az, &freq, &q[0], &q[1], &q[2], &q[3]))
+    if (!PyArg_ParseTuple(args, "ffffffffffff", &gx, &gy, &gz, &ax, &ay, &az, &freq, &beta, &q[0], &q[1], &q[2], &q[3]))
         return NULL;
 
-    MadgwickAHRSupdateIMU(gx, gy, gz, ax, ay, az, freq, q);
+    MadgwickAHRSupdateIMU(gx, gy, gz, ax, ay, az, freq, beta, q);
     return Py_BuildValue("(ffff)", q[0], q[1], q[2], q[3]);
 }
 
+static char Magdwick_AHRS_filter_docs[] =
+      "Batch AHRS/IMU algorithm update\n\n"
+      "Definition:\n"
+      "  magdwick_AHRS_filter(observations, freq, beta, q, out=None)\n\n"
+      "Parameters::\n\n"
+      "  observations\n"
+      "    A (N, 6) or (N, 9) array with accelerometer, gyroscope and\n"
+      "    (optionally) magnetometer values on each row.\n\n"
+      "  freq\n"
+      "    Sampling frequency.\n\n"
+      "  beta\n"
+      "    Algorithm gain.\n\n"
+      "  q\n"
+      "    The initial quaternion, as a 4-tuple.\n\n"
+      "  out\n"
+      "    Optional contiguous (N, 4) float64 array to write the result to.\n\n"
+      "Return::\n\n"
+      "  numpy.ndarray\n"
+      "    A (N, 4) array with the quaternion after each update.\n\n";
+
+static PyObject *Magdwick_AHRS_filter_func(PyObject *self, PyObject *args)
+{
+    PyObject *obs_obj, *out_obj = NULL;
+    PyArrayObject *obs, *out;
+    float freq;
+    float beta;
+    float q[4];
+    npy_intp n, k, i;
+    npy_intp dims[2];
+    const double *row;
+    double *q_out;
+
+    /* Parse the input.*/
+    if (!PyArg_ParseTuple(args, "Off(ffff)|O", &obs_obj, &freq, &beta, &q[0], &q[1], &q[2], &q[3], &out_obj))
+        return NULL;
+
+    obs = (PyArrayObject *) PyArray_FROM_OTF(obs_obj, NPY_DOUBLE, NPY_ARRAY_IN_ARRAY);
+    if (obs == NULL)
+        return NULL;
+    if (PyArray_NDIM(obs) != 2 || (PyArray_DIM(obs, 1) != 6 && PyArray_DIM(obs, 1) != 9)) {
+        PyErr_SetString(PyExc_ValueError, "Observations must be a (N, 6) or (N, 9) array.");
+        Py_DECREF(obs);
+        return NULL;
+    }
+    n = PyArray_DIM(obs, 0);
+    k = PyArray_DIM(obs, 1);
+
+    dims[0] = n;
+    dims[1] = 4;
+    out = output_array(out_obj, 2, dims);
+    if (out == NULL) {
+        Py_DECREF(obs);
+        return NULL;
+    }
+
+    row = (const double *) PyArray_DATA(obs);
+    q_out = (double *) PyArray_DATA(out);
+
+    Py_BEGIN_ALLOW_THREADS
+    for (i = 0; i < n; i++, row += k, q_out += 4) {
+        if (k == 9)
+            MadgwickAHRSupdate(row[3], row[4], row[5], row[0], row[1], row[2],
+                               row[6], row[7], row[8], freq, beta, q);
+        else
+            MadgwickAHRSupdateIMU(row[3], row[4], row[5], row[0], row[1], row[2], freq, beta, q);
+        q_out[0] = q[0];
+        q_out[1] = q[1];
+        q_out[2] = q[2];
+        q_out[3] = q[3];
+    }
+    Py_END_ALLOW_THREADS
+
+    Py_DECREF(obs);
+    return (PyObject *) out;
+}
+
+static char Magdwick_AHRS_filter_streams_docs[] =
+      "Batch AHRS/IMU algorithm update of several streams at once\n\n"
+      "Definition:\n"
+      "  magdwick_AHRS_filter_streams(observations, freq, beta, q, out=None)\n\n"
+      "Parameters::\n\n"
+      "  observations\n"
+      "    A (M, N, 6) or (M, N, 9) array with accelerometer, gyroscope and\n"
+      "    (optionally) magnetometer values of M streams.\n\n"
+      "  freq\n"
+      "    Sampling frequency.\n\n"
+      "  beta\n"
+      "    Algorithm gain.\n\n"
+      "  q\n"
+      "    A contiguous (4, M) float32 array with the quaternions of the M\n"
+      "    streams. It is updated in place.\n\n"
+      "  out\n"
+      "    Optional contiguous (M, N, 4) float64 array to write the result to.\n\n"
+      "Return::\n\n"
+      "  numpy.ndarray\n"
+      "    A (M, N, 4) array with the quaternions after each update.\n\n";
+
+static PyObject *Magdwick_AHRS_filter_streams_func(PyObject *self, PyObject *args)
+{
+    PyObject *obs_obj, *out_obj = NULL;
+    PyArrayObject *obs, *q, *out;
+    float freq;
+    float beta;
+    npy_intp n, k, m, i, i0, nb, j, c;
+    npy_intp dims[3];
+    const double *obs_data;
+    float *block, *step, *q_block, *q_data;
+    double *q_out;
+
+    /* Parse the input.*/
+    if (!PyArg_ParseTuple(args, "OffO!|O", &obs_obj, &freq, &beta, &PyArray_Type, &q, &out_obj))
+        return NULL;
+
+    obs = (PyArrayObject *) PyArray_FROM_OTF(obs_obj, NPY_DOUBLE, NPY_ARRAY_IN_ARRAY);
+    if (obs == NULL)
+        return NULL;
+    if (PyArray_NDIM(obs) != 3 || (PyArray_DIM(obs, 2) != 6 && PyArray_DIM(obs, 2) != 9)) {
+        PyErr_SetString(PyExc_ValueError, "Observations must be a (M, N, 6) or (M, N, 9) array.");
+        Py_DECREF(obs);
+        return NULL;
+    }
+    m = PyArray_DIM(obs, 0);
+    n = PyArray_DIM(obs, 1);
+    k = PyArray_DIM(obs, 2);
+    if (PyArray_TYPE(q) != NPY_FLOAT || !PyArray_IS_C_CONTIGUOUS(q) || !PyArray_ISWRITEABLE(q) ||
+            PyArray_NDIM(q) != 2 || PyArray_DIM(q, 0) != 4 || PyArray_DIM(q, 1) != m || m > INT_MAX) {
+        PyErr_SetString(PyExc_ValueError, "Quaternions must be a writeable, contiguous (4, M) float32 array.");
+        Py_DECREF(obs);
+        return NULL;
+    }
+
+    dims[0] = m;
+    dims[1] = n;
+    dims[2] = 4;
+    out = output_array(out_obj, 3, dims);
+    if (out == NULL) {
+        Py_DECREF(obs);
+        return NULL;
+    }
+    /* A block of time steps of all streams, one row per measurement component and time step. */
+    block = (float *) PyMem_Malloc(STREAMS_BLOCK * (k + 4) * m * sizeof(float));
+    if (block == NULL) {
+        Py_DECREF(out);
+        Py_DECREF(obs);
+        return PyErr_NoMemory();
+    }
+
+    obs_data = (const double *) PyArray_DATA(obs);
+    q_data = (float *) PyArray_DATA(q);
+    q_out = (double *) PyArray_DATA(out);
+    q_block = block + STREAMS_BLOCK * k * m;
+
+    Py_BEGIN_ALLOW_THREADS
+    for (i0 = 0; i0 < n; i0 += STREAMS_BLOCK) {
+        nb = (n - i0 < STREAMS_BLOCK) ? n - i0 : STREAMS_BLOCK;
+        /* Transpose the block of each stream into the per component layout. */
+        for (j = 0; j < m; j++)
+            for (i = 0; i < nb; i++)
+                for (c = 0; c < k; c++)
+                    block[(i * k + c) * m + j] = (float) obs_data[(j * n + i0 + i) * k + c];
+        for (i = 0; i < nb; i++) {
+            step = block + i * k * m;
+            if (k == 9)
+                MadgwickAHRSupdateArray((int) m, step + 3 * m, step + 4 * m, step + 5 * m,
+                                        step, step + m, step + 2 * m,
+                                        step + 6 * m, step + 7 * m, step + 8 * m, freq, beta,
+                                        q_data, q_data + m, q_data + 2 * m, q_data + 3 * m);
+            else
+                MadgwickAHRSupdateIMUArray((int) m, step + 3 * m, step + 4 * m, step + 5 * m,
+                                           step, step + m, step + 2 * m, freq, beta,
+                                           q_data, q_data + m, q_data + 2 * m, q_data + 3 * m);
+            memcpy(q_block + i * 4 * m, q_data, 4 * m * sizeof(float));
+        }
+        for (j = 0; j < m; j++)
+            for (i = 0; i < nb; i++)
+                for (c = 0; c < 4; c++)
+                    q_out[(j * n + i0 + i) * 4 + c] = q_block[(i * 4 + c) * m + j];
+    }
+    Py_END_ALLOW_THREADS
+
+    PyMem_Free(block);
+    Py_DECREF(obs);
+    return (PyObject *) out;
+}
+
 static PyMethodDef madgwickMethods[] = {
     {"magdwick_AHRS_update", Magdwick_AHRS_update_func, METH_VARARGS, Magdwick_AHRS_update_docs},
     {"magdwick_AHRS_update_IMU", Magdwick_AHRS_update_IMU_func, METH_VARARGS, Magdwick_AHRS_update_IMU_docs},
+    {"magdwick_AHRS_filter", Magdwick_AHRS_filter_func, METH_VARARGS, Magdwick_AHRS_filter_docs},
+    {"magdwick_AHRS_filter_streams", Magdwick_AHRS_filter_streams_func, METH_VARARGS, Magdwick_AHRS_filter_streams_docs},
      {NULL, NULL, 0, NULL} /* Sentinel */
 };
 
+static char madgwick_docs[] = "Python C extension of Madgwick's Sensor Fusion algorithm.";
+
+#if PY_MAJOR_VERSION >= 3
+
+static struct PyModuleDef madgwickModule = {
+    PyModuleDef_HEAD_INIT, "madgwick", madgwick_docs, -1, madgwickMethods
+};
+
+PyMODINIT_FUNC PyInit_madgwick(void)
+{
+    import_array();
+    return PyModule_Create(&madgwickModule);
+}
+
+#else
+
 PyMODINIT_FUNC initmadgwick(void)
 {
-    char * docstring = "Python C extension of Madgwick's Sensor Fusion algorithm.";
-    (void) Py_InitModule3("madgwick", madgwickMethods, docstring);
+    (void) Py_InitModule3("madgwick", madgwickMethods, madgwick_docs);
+    import_array();
 }
+
+#endif
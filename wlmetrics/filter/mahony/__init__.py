@@ -1,12 +1,12 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """
-:mod:`madgwick`
+:mod:`mahony`
 ==================
 
-.. module:: madgwick
+.. module:: mahony
    :platform: Unix, Windows
-   :synopsis: 
+   :synopsis:
 
 .. moduleauthor:: hbldh <henrik.blidh@nedomkull.com>
 
@@ -19,8 +19,11 @@ from __future__ import print_function
 from __future__ import unicode_literals
 from __future__ import absolute_import
 
+import numpy as np
 
-__all__ = ['MahoneyAHRSFilter']
+from wlmetrics.quaternion import Quaternion
+
+__all__ = ['MahonyAHRSFilter']
 
 try:
     from . import mahony as mahony
@@ -29,10 +32,61 @@ except Exception as e:
 
 
 class MahonyAHRSFilter(object):
-    """Python wrapper class of Mahony filter methods."""
+    """Python wrapper class of Mahony filter methods.
+
+    The integral feedback terms are kept in :py:attr:`integral_feedback`,
+    owned by the instance, so several filters can run side by side.
+
+    """
+
+    def __init__(self, frequency, kp=0.5, ki=0.0):
+        """Constructor for MahonyAHRSFilter
+
+        :param frequency: The sampling frequency of the data.
+        :type frequency: float
+        :param kp: The proportional gain.
+        :type kp: float
+        :param ki: The integral gain.
+        :type ki: float
 
-    def __init__(self, frequency):
-        """Constructor for MahonyAHRSFilter"""
+        """
         self.frequency = frequency
-        self.quaternion = (1, 0, 0, 0)
+        self.kp = kp
+        self.ki = ki
+        self.quaternion = Quaternion([1, 0, 0, 0])
+        self.integral_feedback = np.zeros((3, ), 'float')
+
+    def update_filter(self, a, g, m=None):
+        state = tuple(self.quaternion) + tuple(self.integral_feedback)
+        if m is None:
+            q, integral_feedback = mahony.Mahony_AHRS_update_IMU(
+                g[0], g[1], g[2], a[0], a[1], a[2],
+                self.frequency, 2 * self.kp, 2 * self.ki, *state)
+        else:
+            q, integral_feedback = mahony.Mahony_AHRS_update(
+                g[0], g[1], g[2], a[0], a[1], a[2], m[0], m[1], m[2],
+                self.frequency, 2 * self.kp, 2 * self.ki, *state)
+        self.quaternion = Quaternion(q)
+        self.integral_feedback[:] = integral_feedback
+
+    def filter(self, observations, out=None):
+        """Run the filter over a whole recording.
+
+        The update loop is run in the C extension, with the GIL released.
+
+        :param observations: A (N, 6) or (N, 9) array with accelerometer,
+            gyroscope and (optionally) magnetometer values on each row.
+        :type observations: :py:class:`numpy.ndarray`
+        :param out: Optional contiguous (N, 4) float64 array to write the result to.
+        :type out: :py:class:`numpy.ndarray`
+        :return: A (N, 4) array with the quaternion after each sample.
+        :rtype: :py:class:`numpy.ndarray`
 
+        """
+        observations = np.ascontiguousarray(observations, 'float')
+        states = mahony.Mahony_AHRS_filter(
+            observations, self.frequency, 2 * self.kp, 2 * self.ki,
+            tuple(self.quaternion), self.integral_feedback, out)
+        if len(states):
+            self.quaternion = Quaternion(states[-1, :])
+        return states
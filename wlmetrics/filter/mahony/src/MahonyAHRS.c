@@ -8,6 +8,8 @@
 // Date			Author			Notes
 // 29/09/2011	SOH Madgwick    Initial release
 // 02/10/2011	SOH Madgwick	Optimised for reduced CPU load
+// 18/10/2026   hbldh           Integral feedback state passed in by the caller
+// 18/10/2026   hbldh           Gains twoKp and twoKi passed per call instead of global volatiles
 //
 //=====================================================================================================
 
@@ -16,19 +18,7 @@
 
 #include "MahonyAHRS.h"
 #include <math.h>
-
-//---------------------------------------------------------------------------------------------------
-// Definitions
-
-#define twoKpDef	(2.0f * 0.5f)	// 2 * proportional gain
-#define twoKiDef	(2.0f * 0.0f)	// 2 * integral gain
-
-//---------------------------------------------------------------------------------------------------
-// Variable definitions
-
-volatile float twoKp = twoKpDef;											// 2 * proportional gain (Kp)
-volatile float twoKi = twoKiDef;											// 2 * integral gain (Ki)
-volatile float integralFBx = 0.0f,  integralFBy = 0.0f, integralFBz = 0.0f;	// integral error terms scaled by Ki
+#include <stdint.h>
 
 //---------------------------------------------------------------------------------------------------
 // Function declarations
@@ -41,7 +31,7 @@ float invSqrt(float x);
 //---------------------------------------------------------------------------------------------------
 // AHRS algorithm update
 
-void MahonyAHRSupdate(float gx, float gy, float gz, float ax, float ay, float az, float mx, float my, float mz, float sampleFreq, float *q) {
+void MahonyAHRSupdate(float gx, float gy, float gz, float ax, float ay, float az, float mx, float my, float mz, float sampleFreq, float twoKp, float twoKi, float *q, float *integralFB) {
 	float recipNorm;
     float q0q0, q0q1, q0q2, q0q3, q1q1, q1q2, q1q3, q2q2, q2q3, q3q3;  
 	float hx, hy, bx, bz;
@@ -51,7 +41,7 @@ void MahonyAHRSupdate(float gx, float gy, float gz, float ax, float ay, float az
 
 	// Use IMU algorithm if magnetometer measurement invalid (avoids NaN in magnetometer normalisation)
 	if((mx == 0.0f) && (my == 0.0f) && (mz == 0.0f)) {
-		MahonyAHRSupdateIMU(gx, gy, gz, ax, ay, az, sampleFreq, q);
+		MahonyAHRSupdateIMU(gx, gy, gz, ax, ay, az, sampleFreq, twoKp, twoKi, q, integralFB);
 		return;
 	}
 
@@ -103,17 +93,17 @@ void MahonyAHRSupdate(float gx, float gy, float gz, float ax, float ay, float az
 
 		// Compute and apply integral feedback if enabled
 		if(twoKi > 0.0f) {
-			integralFBx += twoKi * halfex * (1.0f / sampleFreq);	// integral error scaled by Ki
-			integralFBy += twoKi * halfey * (1.0f / sampleFreq);
-			integralFBz += twoKi * halfez * (1.0f / sampleFreq);
-			gx += integralFBx;	// apply integral feedback
-			gy += integralFBy;
-			gz += integralFBz;
+			integralFB[0] += twoKi * halfex * (1.0f / sampleFreq);	// integral error scaled by Ki
+			integralFB[1] += twoKi * halfey * (1.0f / sampleFreq);
+			integralFB[2] += twoKi * halfez * (1.0f / sampleFreq);
+			gx += integralFB[0];	// apply integral feedback
+			gy += integralFB[1];
+			gz += integralFB[2];
 		}
 		else {
-			integralFBx = 0.0f;	// prevent integral windup
-			integralFBy = 0.0f;
-			integralFBz = 0.0f;
+			integralFB[0] = 0.0f;	// prevent integral windup
+			integralFB[1] = 0.0f;
+			integralFB[2] = 0.0f;
 		}
 
 		// Apply proportional feedback
@@ -145,7 +135,7 @@ void MahonyAHRSupdate(float gx, float gy, float gz, float ax, float ay, float az
 //---------------------------------------------------------------------------------------------------
 // IMU algorithm update
 
-void MahonyAHRSupdateIMU(float gx, float gy, float gz, float ax, float ay, float az, float sampleFreq, float *q) {
+void MahonyAHRSupdateIMU(float gx, float gy, float gz, float ax, float ay, float az, float sampleFreq, float twoKp, float twoKi, float *q, float *integralFB) {
 	float recipNorm;
 	float halfvx, halfvy, halfvz;
 	float halfex, halfey, halfez;
@@ -172,17 +162,17 @@ void MahonyAHRSupdateIMU(float gx, float gy, float gz, float ax, float ay, float
 
 		// Compute and apply integral feedback if enabled
 		if(twoKi > 0.0f) {
-			integralFBx += twoKi * halfex * (1.0f / sampleFreq);	// integral error scaled by Ki
-			integralFBy += twoKi * halfey * (1.0f / sampleFreq);
-			integralFBz += twoKi * halfez * (1.0f / sampleFreq);
-			gx += integralFBx;	// apply integral feedback
-			gy += integralFBy;
-			gz += integralFBz;
+			integralFB[0] += twoKi * halfex * (1.0f / sampleFreq);	// integral error scaled by Ki
+			integralFB[1] += twoKi * halfey * (1.0f / sampleFreq);
+			integralFB[2] += twoKi * halfez * (1.0f / sampleFreq);
+			gx += integralFB[0];	// apply integral feedback
+			gy += integralFB[1];
+			gz += integralFB[2];
 		}
 		else {
-			integralFBx = 0.0f;	// prevent integral windup
-			integralFBy = 0.0f;
-			integralFBz = 0.0f;
+			integralFB[0] = 0.0f;	// prevent integral windup
+			integralFB[1] = 0.0f;
+			integralFB[2] = 0.0f;
 		}
 
 		// Apply proportional feedback
@@ -217,12 +207,11 @@ void MahonyAHRSupdateIMU(float gx, float gy, float gz, float ax, float ay, float
 
 float invSqrt(float x) {
 	float halfx = 0.5f * x;
-	float y = x;
-	long i = *(long*)&y;
-	i = 0x5f3759df - (i>>1);
-	y = *(float*)&i;
-	y = y * (1.5f - (halfx * y * y));
-	return y;
+	union { float f; int32_t i; } y;
+	y.f = x;
+	y.i = 0x5f3759df - (y.i >> 1);
+	y.f = y.f * (1.5f - (halfx * y.f * y.f));
+	return y.f;
 }
 
 //====================================================================================================
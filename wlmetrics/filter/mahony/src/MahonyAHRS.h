@@ -13,18 +13,11 @@
 #ifndef MahonyAHRS_h
 #define MahonyAHRS_h
 
-//----------------------------------------------------------------------------------------------------
-// Variable declaration
-
-extern volatile float twoKp;			// 2 * proportional gain (Kp)
-extern volatile float twoKi;			// 2 * integral gain (Ki)
-extern volatile float q0, q1, q2, q3;	// quaternion of sensor frame relative to auxiliary frame
-
 //---------------------------------------------------------------------------------------------------
 // Function declarations
 
-void MahonyAHRSupdate(float gx, float gy, float gz, float ax, float ay, float az, float mx, float my, float mz, float sampleFreq, float *q);
-void MahonyAHRSupdateIMU(float gx, float gy, float gz, float ax, float ay, float az, float sampleFreq, float *q);
+void MahonyAHRSupdate(float gx, float gy, float gz, float ax, float ay, float az, float mx, float my, float mz, float sampleFreq, float twoKp, float twoKi, float *q, float *integralFB);
+void MahonyAHRSupdateIMU(float gx, float gy, float gz, float ax, float ay, float az, float sampleFreq, float twoKp, float twoKi, float *q, float *integralFB);
 
 #endif
 //=====================================================================================================
@@ -9,12 +9,15 @@
  */
 
 #include <Python.h>
+#define NPY_NO_DEPRECATED_API NPY_1_7_API_VERSION
+#include <numpy/arrayobject.h>
 #include "MahonyAHRS.h"
+#include "filter_arrays.h"
 
 static char Mahony_AHRS_update_docs[] =
       "AHRS algorithm update\n\n"
       "Definition:\n"
-      "  Mahony_AHRS_update(gx, gy, gz, ax, ay, az, mx, my, mz)\n\n"
+      "  Mahony_AHRS_update(gx, gy, gz, ax, ay, az, mx, my, mz, freq, twoKp, twoKi, q0, q1, q2, q3, ix, iy, iz)\n\n"
       "Parameters::\n\n"
       "  gx\n"
       "    Gyroscope X axis value.\n\n"
@@ -34,9 +37,13 @@ static char Mahony_AHRS_update_docs[] =
       "    Magnetometer Y axis value.\n\n"
       "  gz\n"
       "    Magnetometer Z axis value.\n\n"
+      "  twoKp, twoKi\n"
+      "    Two times the proportional and integral gains.\n\n"
+      "  ix, iy, iz\n"
+      "    Integral feedback terms.\n\n"
       "Return::\n\n"
       "  tuple\n"
-      "    The updated quaternion.\n\n";
+      "    The updated quaternion and the updated integral feedback terms.\n\n";
 
 static PyObject *Mahony_AHRS_update_func(PyObject *self, PyObject *args)
 {
@@ -44,20 +51,23 @@ static PyObject *Mahony_AHRS_update_func(PyObject *self, PyObject *args)
     float ax, ay, az;
     float mx, my, mz;
     float freq;
+    float twoKp, twoKi;
     float q[4];
+    float integralFB[3];
 
     /* Parse the input.*/
-    if (!PyArg_ParseTuple(args, "ffffffffffffff", &gx, &gy, &gz, &ax, &ay, &az, &mx, &my, &mz, &freq, &q[0], &q[1], &q[2], &q[3]))
+    if (!PyArg_ParseTuple(args, "fffffffffffffffffff", &gx, &gy, &gz, &ax, &ay, &az, &mx, &my, &mz, &freq, &twoKp, &twoKi,
+                          &q[0], &q[1], &q[2], &q[3], &integralFB[0], &integralFB[1], &integralFB[2]))
         return NULL;
 
-    MahonyAHRSupdate(gx, gy, gz, ax, ay, az, mx, my, mz, freq, q);
-    return Py_BuildValue("(ffff)", q[0], q[1], q[2], q[3]);
+    MahonyAHRSupdate(gx, gy, gz, ax, ay, az, mx, my, mz, freq, twoKp, twoKi, q, integralFB);
+    return Py_BuildValue("(ffff)(fff)", q[0], q[1], q[2], q[3], integralFB[0], integralFB[1], integralFB[2]);
 }
 
 static char Mahony_AHRS_update_IMU_docs[] =
       "IMU algorithm update\n\n"
       "Definition:\n"
-      "  Mahony_AHRS_update_IMU(gx, gy, gz, ax, ay, az)\n\n"
+      "  Mahony_AHRS_update_IMU(gx, gy, gz, ax, ay, az, freq, twoKp, twoKi, q0, q1, q2, q3, ix, iy, iz)\n\n"
       "Parameters::\n\n"
       "  gx\n"
       "    Gyroscope X axis value.\n\n"
@@ -71,33 +81,154 @@ static char Mahony_AHRS_update_IMU_docs[] =
       "    Accelerometer Y axis value.\n\n"
       "  az\n"
       "    Accelerometer Z axis value.\n\n"
+      "  twoKp, twoKi\n"
+      "    Two times the proportional and integral gains.\n\n"
+      "  ix, iy, iz\n"
+      "    Integral feedback terms.\n\n"
       "Return::\n\n"
       "  tuple\n"
-      "    The updated quaternion.\n\n";
+      "    The updated quaternion and the updated integral feedback terms.\n\n";
 
 static PyObject *Mahony_AHRS_update_IMU_func(PyObject *self, PyObject *args)
 {
     float gx, gy, gz;
     float ax, ay, az;
     float freq;
+    float twoKp, twoKi;
     float q[4];
+    float integralFB[3];
 
     /* Parse the input.*/
-    if (!PyArg_ParseTuple(args, "fffffffffff", &gx, &gy, &gz, &ax, &ay, &az, &freq, &q[0], &q[1], &q[2], &q[3]))
+    if (!PyArg_ParseTuple(args, "ffffffffffffffff", &gx, &gy, &gz, &ax, &ay, &az, &freq, &twoKp, &twoKi,
+                          &q[0], &q[1], &q[2], &q[3], &integralFB[0], &integralFB[1], &integralFB[2]))
         return NULL;
 
-    MahonyAHRSupdateIMU(gx, gy, gz, ax, ay, az, freq, q);
-    return Py_BuildValue("(ffff)", q[0], q[1], q[2], q[3]);
+    MahonyAHRSupdateIMU(gx, gy, gz, ax, ay, az, freq, twoKp, twoKi, q, integralFB);
+    return Py_BuildValue("(ffff)(fff)", q[0], q[1], q[2], q[3], integralFB[0], integralFB[1], integralFB[2]);
+}
+
+static char Mahony_AHRS_filter_docs[] =
+      "Batch AHRS/IMU algorithm update\n\n"
+      "Definition:\n"
+      "  Mahony_AHRS_filter(observations, freq, twoKp, twoKi, q, integral_feedback, out=None)\n\n"
+      "Parameters::\n\n"
+      "  observations\n"
+      "    A (N, 6) or (N, 9) array with accelerometer, gyroscope and\n"
+      "    (optionally) magnetometer values on each row.\n\n"
+      "  freq\n"
+      "    Sampling frequency.\n\n"
+      "  twoKp, twoKi\n"
+      "    Two times the proportional and integral gains.\n\n"
+      "  q\n"
+      "    The initial quaternion, as a 4-tuple.\n\n"
+      "  integral_feedback\n"
+      "    A contiguous float64 array of length 3 with the integral feedback\n"
+      "    terms. It is updated in place.\n\n"
+      "  out\n"
+      "    Optional contiguous (N, 4) float64 array to write the result to.\n\n"
+      "Return::\n\n"
+      "  numpy.ndarray\n"
+      "    A (N, 4) array with the quaternion after each update.\n\n";
+
+static PyObject *Mahony_AHRS_filter_func(PyObject *self, PyObject *args)
+{
+    PyObject *obs_obj, *out_obj = NULL;
+    PyArrayObject *obs, *out, *ifb;
+    float freq;
+    float twoKp, twoKi;
+    float q[4];
+    float integralFB[3];
+    double *ifb_data;
+    npy_intp n, k, i;
+    npy_intp dims[2];
+    const double *row;
+    double *q_out;
+
+    /* Parse the input.*/
+    if (!PyArg_ParseTuple(args, "Offf(ffff)O!|O", &obs_obj, &freq, &twoKp, &twoKi, &q[0], &q[1], &q[2], &q[3],
+                          &PyArray_Type, &ifb, &out_obj))
+        return NULL;
+
+    if (PyArray_TYPE(ifb) != NPY_DOUBLE || PyArray_SIZE(ifb) != 3 ||
+            !PyArray_IS_C_CONTIGUOUS(ifb) || !PyArray_ISWRITEABLE(ifb)) {
+        PyErr_SetString(PyExc_ValueError, "Integral feedback must be a writeable, contiguous float64 array of length 3.");
+        return NULL;
+    }
+
+    obs = (PyArrayObject *) PyArray_FROM_OTF(obs_obj, NPY_DOUBLE, NPY_ARRAY_IN_ARRAY);
+    if (obs == NULL)
+        return NULL;
+    if (PyArray_NDIM(obs) != 2 || (PyArray_DIM(obs, 1) != 6 && PyArray_DIM(obs, 1) != 9)) {
+        PyErr_SetString(PyExc_ValueError, "Observations must be a (N, 6) or (N, 9) array.");
+        Py_DECREF(obs);
+        return NULL;
+    }
+    n = PyArray_DIM(obs, 0);
+    k = PyArray_DIM(obs, 1);
+
+    dims[0] = n;
+    dims[1] = 4;
+    out = output_array(out_obj, 2, dims);
+    if (out == NULL) {
+        Py_DECREF(obs);
+        return NULL;
+    }
+
+    row = (const double *) PyArray_DATA(obs);
+    q_out = (double *) PyArray_DATA(out);
+    ifb_data = (double *) PyArray_DATA(ifb);
+
+    Py_BEGIN_ALLOW_THREADS
+    integralFB[0] = ifb_data[0];
+    integralFB[1] = ifb_data[1];
+    integralFB[2] = ifb_data[2];
+    for (i = 0; i < n; i++, row += k, q_out += 4) {
+        if (k == 9)
+            MahonyAHRSupdate(row[3], row[4], row[5], row[0], row[1], row[2],
+                             row[6], row[7], row[8], freq, twoKp, twoKi, q, integralFB);
+        else
+            MahonyAHRSupdateIMU(row[3], row[4], row[5], row[0], row[1], row[2], freq, twoKp, twoKi, q, integralFB);
+        q_out[0] = q[0];
+        q_out[1] = q[1];
+        q_out[2] = q[2];
+        q_out[3] = q[3];
+    }
+    ifb_data[0] = integralFB[0];
+    ifb_data[1] = integralFB[1];
+    ifb_data[2] = integralFB[2];
+    Py_END_ALLOW_THREADS
+
+    Py_DECREF(obs);
+    return (PyObject *) out;
 }
 
 static PyMethodDef mahonyMethods[] = {
     {"Mahony_AHRS_update", Mahony_AHRS_update_func, METH_VARARGS, Mahony_AHRS_update_docs},
     {"Mahony_AHRS_update_IMU", Mahony_AHRS_update_IMU_func, METH_VARARGS, Mahony_AHRS_update_IMU_docs},
+    {"Mahony_AHRS_filter", Mahony_AHRS_filter_func, METH_VARARGS, Mahony_AHRS_filter_docs},
      {NULL, NULL, 0, NULL} /* Sentinel */
 };
 
+static char mahony_docs[] = "Python C extension of Mahony's AHRS Filter";
+
+#if PY_MAJOR_VERSION >= 3
+
+static struct PyModuleDef mahonyModule = {
+    PyModuleDef_HEAD_INIT, "mahony", mahony_docs, -1, mahonyMethods
+};
+
+PyMODINIT_FUNC PyInit_mahony(void)
+{
+    import_array();
+    return PyModule_Create(&mahonyModule);
+}
+
+#else
+
 PyMODINIT_FUNC initmahony(void)
 {
-    char * docstring = "Python C extension of Mahony's AHRS Filter";
-    (void) Py_InitModule3("mahony", mahonyMethods, docstring);
+    (void) Py_InitModule3("mahony", mahonyMethods, mahony_docs);
+    import_array();
 }
+
+#endif
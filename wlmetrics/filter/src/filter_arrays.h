@@ -0,0 +1,46 @@
+/**
+ **************************************************************************************
+ * @file    filter_arrays.h
+ * @author  hbldh
+ * @version 0.1
+ * @date    2026-10-19
+ * @brief   Array helpers shared by the AHRS filter C extensions.
+ *
+ * Include after numpy/arrayobject.h.
+ **************************************************************************************
+ */
+
+#ifndef filter_arrays_h
+#define filter_arrays_h
+
+/* The output array, out_obj if it is given and not None, otherwise a new float64 array.
+   A given array must be a writeable, contiguous float64 array of the given shape.
+   Returns a new reference, or NULL with an exception set. */
+static PyArrayObject *output_array(PyObject *out_obj, int ndim, const npy_intp *dims)
+{
+    PyArrayObject *out;
+    int i;
+
+    if (out_obj == NULL || out_obj == Py_None)
+        return (PyArrayObject *) PyArray_SimpleNew(ndim, (npy_intp *) dims, NPY_DOUBLE);
+    if (!PyArray_Check(out_obj)) {
+        PyErr_SetString(PyExc_TypeError, "Output must be a numpy array.");
+        return NULL;
+    }
+    out = (PyArrayObject *) out_obj;
+    if (PyArray_TYPE(out) != NPY_DOUBLE || !PyArray_IS_C_CONTIGUOUS(out) || !PyArray_ISWRITEABLE(out) ||
+            PyArray_NDIM(out) != ndim) {
+        PyErr_SetString(PyExc_ValueError, "Output must be a writeable, contiguous float64 array.");
+        return NULL;
+    }
+    for (i = 0; i < ndim; i++) {
+        if (PyArray_DIM(out, i) != dims[i]) {
+            PyErr_SetString(PyExc_ValueError, "Output has the wrong shape.");
+            return NULL;
+        }
+    }
+    Py_INCREF(out);
+    return out;
+}
+
+#endif
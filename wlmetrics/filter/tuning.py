@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`tuning`
+==================
+
+.. module:: tuning
+   :platform: Unix, Windows
+   :synopsis: Gain sweeps of the AHRS filters over recordings.
+
+.. moduleauthor:: hbldh <henrik.blidh@nedomkull.com>
+
+Created on 2026-10-18, 13:40
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import multiprocessing
+from multiprocessing.sharedctypes import RawArray
+
+import numpy as np
+
+from wlmetrics.filter.madgwick import MadgwickAHRSFilter
+from wlmetrics.filter.kalman import detect_static_periods
+
+__all__ = ['gain_sweep', 'static_ranges', 'static_drift']
+
+# Shared input of the worker processes, set by :py:func:`_init_worker`.
+_shared = {}
+
+
+def static_ranges(accelerometer, frequency, static_threshold=0.1, static_time=0.25):
+    """Find the periods where the sensor is lying still.
+
+    These are the samples flagged as lying still by
+    :py:func:`wlmetrics.filter.kalman.detect_static_periods`, the detection
+    used by :py:class:`wlmetrics.filter.kalman.StaticDetectingPositionKalmanFilter`,
+    with the same defaults: samples within ``static_threshold`` of 1 g, after
+    ``static_time`` seconds of such samples in a row.
+
+    :param accelerometer: A (N, 3) array of accelerometer values, in g.
+    :type accelerometer: :py:class:`numpy.ndarray`
+    :param frequency: The sampling frequency of the data.
+    :type frequency: float
+    :param static_threshold: Maximal deviation from 1 g of a static sample.
+    :type static_threshold: float
+    :param static_time: Seconds of static samples before the sensor is lying still.
+    :type static_time: float
+    :return: A (K, 2) array with start and stop index of the static periods.
+    :rtype: :py:class:`numpy.ndarray`
+
+    """
+    static_array, _, _ = detect_static_periods(accelerometer, static_threshold, frequency * static_time)
+    edges = np.diff(np.concatenate([[0], (static_array == 1).astype('int8'), [0]]))
+    return np.column_stack([np.where(edges == 1)[0], np.where(edges == -1)[0]])
+
+
+def static_drift(quaternions, ranges, frequency):
+    """Orientation drift during static periods.
+
+    :param quaternions: A (N, 4) array of filter output.
+    :type quaternions: :py:class:`numpy.ndarray`
+    :param ranges: A (K, 2) array of static periods, from :py:func:`static_ranges`.
+    :type ranges: :py:class:`numpy.ndarray`
+    :param frequency: The sampling frequency of the data.
+    :type frequency: float
+    :return: The total rotation during the static periods divided by
+        their total duration, in rad/s. NaN if there are no static periods.
+    :rtype: float
+
+    """
+    if len(ranges) == 0:
+        return np.nan
+    q_start = quaternions[ranges[:, 0], :]
+    q_stop = quaternions[ranges[:, 1] - 1, :]
+    dots = np.clip(np.abs(np.sum(q_start * q_stop, axis=1)), 0.0, 1.0)
+    angles = 2 * np.arccos(dots)
+    return np.sum(angles) / (np.sum(ranges[:, 1] - ranges[:, 0]) / frequency)
+
+
+def _observations(recording, gyroscope_scale, use_magnetometer):
+    columns = [recording.accelerometer, recording.gyroscope * gyroscope_scale]
+    if use_magnetometer:
+        columns.append(recording.magnetometer)
+    return np.hstack(columns)
+
+
+def _frequency(timestamps):
+    return 1 / np.median(np.diff(timestamps))
+
+
+def _init_worker(buffer, n_columns, offsets, frequencies, filter_class, gains,
+                 static_threshold, static_time):
+    _shared['observations'] = np.frombuffer(buffer, 'float').reshape(-1, n_columns)
+    _shared['offsets'] = offsets
+    _shared['frequencies'] = frequencies
+    _shared['filter_class'] = filter_class
+    _shared['gains'] = gains
+    _shared['static_threshold'] = static_threshold
+    _shared['static_time'] = static_time
+
+
+def _run_job(job):
+    i, j = job
+    observations = _shared['observations'][_shared['offsets'][i]:_shared['offsets'][i + 1], :]
+    frequency = _shared['frequencies'][i]
+    ranges = static_ranges(observations[:, :3], frequency,
+                           _shared['static_threshold'], _shared['static_time'])
+    f = _shared['filter_class'](frequency, **_shared['gains'][j])
+    return i, j, static_drift(f.filter(observations), ranges, frequency)
+
+
+def gain_sweep(recordings, gains, filter_class=MadgwickAHRSFilter, processes=None,
+               gyroscope_scale=1.0, use_magnetometer=False,
+               static_threshold=0.1, static_time=0.25):
+    """Score an AHRS filter on a set of recordings for a grid of gains.
+
+    The observations of all recordings are put in one array in shared memory,
+    inherited by the worker processes, and each (recording, gain) job is run
+    in a process pool. A job is scored by the orientation drift during the
+    static periods of the recording, see :py:func:`static_drift`; lower is better.
+
+    :param recordings: Recordings to score the filter on, as file paths or
+        :py:class:`wlmetrics.container.BerryIMUDataContainer` objects.
+    :type recordings: list
+    :param gains: The gains to try, as dicts of keyword arguments to the filter
+        constructor, e.g. ``[{'beta': 0.05}, {'beta': 0.1}]`` or
+        ``[{'kp': 0.5, 'ki': 0.01}]``.
+    :type gains: list
+    :param filter_class: The filter to tune, :py:class:`MadgwickAHRSFilter`
+        or :py:class:`wlmetrics.filter.mahony.MahonyAHRSFilter`.
+    :param processes: Number of worker processes. Defaults to the number of CPUs.
+    :type processes: int
+    :param gyroscope_scale: Factor converting the stored gyroscope values to rad/s.
+    :type gyroscope_scale: float
+    :param use_magnetometer: If the magnetometer should be used in the filter.
+    :type use_magnetometer: bool
+    :return: A (len(recordings), len(gains)) array of drift scores, in rad/s.
+    :rtype: :py:class:`numpy.ndarray`
+
+    """
+    observations = []
+    frequencies = []
+    for recording in recordings:
+        if not hasattr(recording, 'accelerometer'):
+            from wlmetrics.container import BerryIMUDataContainer
+            recording = BerryIMUDataContainer.load(recording)
+        observations.append(_observations(recording, gyroscope_scale, use_magnetometer))
+        frequencies.append(_frequency(recording.timestamps))
+
+    n_columns = 9 if use_magnetometer else 6
+    offsets = np.cumsum([0] + [len(o) for o in observations])
+    buffer = RawArray('d', int(offsets[-1]) * n_columns)
+    shared_observations = np.frombuffer(buffer, 'float').reshape(-1, n_columns)
+    for o, start, stop in zip(observations, offsets[:-1], offsets[1:]):
+        shared_observations[start:stop, :] = o
+    del observations
+
+    init_args = (buffer, n_columns, offsets, frequencies, filter_class, list(gains),
+                 static_threshold, static_time)
+    jobs = [(i, j) for i in range(len(frequencies)) for j in range(len(gains))]
+    scores = np.empty((len(frequencies), len(gains)), 'float')
+    processes = processes or multiprocessing.cpu_count()
+    if processes == 1:
+        _init_worker(*init_args)
+        results = map(_run_job, jobs)
+    else:
+        pool = multiprocessing.Pool(processes, initializer=_init_worker, initargs=init_args)
+        try:
+            results = pool.map(_run_job, jobs, chunksize=max(1, len(jobs) // (4 * processes)))
+        finally:
+            pool.close()
+            pool.join()
+    for i, j, score in results:
+        scores[i, j] = score
+    return scores
@@ -0,0 +1,414 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`orientation`
+==================
+
+.. module:: orientation
+   :platform: Unix, Windows
+   :synopsis: Vectorised operations on streams of orientation quaternions.
+
+.. moduleauthor:: hbldh <henrik.blidh@nedomkull.com>
+
+Created on 2026-10-18, 19:10
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import time
+
+import numpy as np
+
+from wlmetrics.quaternion import Quaternion, QuaternionArray
+
+__all__ = ['to_rotation_matrices', 'from_rotation_matrices', 'to_euler_angles', 'from_euler_angles',
+           'to_rotation_vectors', 'from_rotation_vectors', 'rotate_vectors',
+           'slerp', 'nlerp', 'resample']
+
+# Below this cosine of the pitch angle, roll and yaw are regarded as gimbal locked.
+_GIMBAL_LOCK_TOLERANCE = 1e-9
+
+# Above this cosine of the angle between two quaternions, slerp is done as nlerp.
+_SLERP_LINEAR_THRESHOLD = 1 - 1e-10
+
+
+def _as_array(quaternions):
+    if isinstance(quaternions, QuaternionArray):
+        return quaternions.to_array()
+    quaternions = np.asarray(quaternions, 'float')
+    if quaternions.ndim != 2 or quaternions.shape[1] != 4:
+        raise ValueError("Quaternions must be a (N, 4) array.")
+    return quaternions
+
+
+def _normalized(quaternions):
+    q = _as_array(quaternions)
+    return q / np.sqrt(np.sum(q ** 2, axis=1))[:, np.newaxis]
+
+
+def _canonical(q):
+    # Of q and -q, which are the same rotation, choose the one with non-negative w.
+    q[q[:, 0] < 0, :] *= -1
+    return q
+
+
+def to_rotation_matrices(quaternions):
+    """Rotation matrices of orientation quaternions.
+
+    The matrix of ``q`` rotates a vector ``v`` as ``q * v * q.conjugate()``, i.e. from
+    the sensor frame to the world frame for the output of the AHRS filters.
+    The quaternions need not be normalised.
+
+    :param quaternions: A (N, 4) array or :py:class:`wlmetrics.quaternion.QuaternionArray`.
+    :return: A (N, 3, 3) array of rotation matrices.
+    :rtype: :py:class:`numpy.ndarray`
+
+    """
+    q = _as_array(quaternions)
+    w, x, y, z = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+    s = 2 / np.sum(q ** 2, axis=1)
+    wx, wy, wz = s * w * x, s * w * y, s * w * z
+    xx, xy, xz = s * x * x, s * x * y, s * x * z
+    yy, yz, zz = s * y * y, s * y * z, s * z * z
+
+    matrices = np.empty((len(q), 3, 3), 'float')
+    matrices[:, 0, 0] = 1 - (yy + zz)
+    matrices[:, 0, 1] = xy - wz
+    matrices[:, 0, 2] = xz + wy
+    matrices[:, 1, 0] = xy + wz
+    matrices[:, 1, 1] = 1 - (xx + zz)
+    matrices[:, 1, 2] = yz - wx
+    matrices[:, 2, 0] = xz - wy
+    matrices[:, 2, 1] = yz + wx
+    matrices[:, 2, 2] = 1 - (xx + yy)
+    return matrices
+
+
+def from_rotation_matrices(matrices):
+    """Orientation quaternions of rotation matrices.
+
+    Shepperd's method is used, picking for each matrix the largest of the four
+    quaternion elements to compute first, which keeps the result accurate for all
+    rotation angles.
+
+    :param matrices: A (N, 3, 3) array of rotation matrices.
+    :type matrices: :py:class:`numpy.ndarray`
+    :return: A (N, 4) array of unit quaternions, with non-negative real part.
+    :rtype: :py:class:`numpy.ndarray`
+
+    """
+    m = np.asarray(matrices, 'float')
+    if m.ndim != 3 or m.shape[1:] != (3, 3):
+        raise ValueError("Matrices must be a (N, 3, 3) array.")
+    m00, m01, m02 = m[:, 0, 0], m[:, 0, 1], m[:, 0, 2]
+    m10, m11, m12 = m[:, 1, 0], m[:, 1, 1], m[:, 1, 2]
+    m20, m21, m22 = m[:, 2, 0], m[:, 2, 1], m[:, 2, 2]
+    largest = np.argmax(np.column_stack([m00 + m11 + m22, m00, m11, m22]), axis=1)
+
+    q = np.empty((len(m), 4), 'float')
+    cases = [
+        (0, lambda i: 1 + m00[i] + m11[i] + m22[i],
+         lambda i: (m21[i] - m12[i], m02[i] - m20[i], m10[i] - m01[i])),
+        (1, lambda i: 1 + m00[i] - m11[i] - m22[i],
+         lambda i: (m21[i] - m12[i], m01[i] + m10[i], m02[i] + m20[i])),
+        (2, lambda i: 1 - m00[i] + m11[i] - m22[i],
+         lambda i: (m02[i] - m20[i], m01[i] + m10[i], m12[i] + m21[i])),
+        (3, lambda i: 1 - m00[i] - m11[i] + m22[i],
+         lambda i: (m10[i] - m01[i], m02[i] + m20[i], m12[i] + m21[i])),
+    ]
+    for element, diagonal, others in cases:
+        i = largest == element
+        s = 2 * np.sqrt(diagonal(i))
+        q[i, element] = s / 4
+        columns = [c for c in range(4) if c != element]
+        for column, value in zip(columns, others(i)):
+            q[i, column] = value / s
+    return _canonical(q)
+
+
+def to_euler_angles(quaternions):
+    """Euler angles of orientation quaternions.
+
+    The angles are roll, pitch and yaw, rotations around the x, y and z axes applied
+    in that order (the z-y-x, or aerospace, convention). Pitch is in [-pi/2, pi/2]
+    and roll and yaw in (-pi, pi].
+
+    At gimbal lock, when the pitch is +-pi/2, only the sum or difference of roll and
+    yaw is defined. Roll is then set to zero and the rotation given by the yaw.
+
+    :param quaternions: A (N, 4) array or :py:class:`wlmetrics.quaternion.QuaternionArray`.
+    :return: A (N, 3) array of roll, pitch and yaw angles, in radians.
+    :rtype: :py:class:`numpy.ndarray`
+
+    """
+    q = _normalized(quaternions)
+    w, x, y, z = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+    yaw_cos = 1 - 2 * (y * y + z * z)
+    yaw_sin = 2 * (w * z + x * y)
+
+    angles = np.empty((len(q), 3), 'float')
+    angles[:, 0] = np.arctan2(2 * (w * x + y * z), 1 - 2 * (x * x + y * y))
+    # The pitch cosine from the first column of the rotation matrix, which keeps
+    # the pitch accurate close to +-pi/2, where the arcsine is not.
+    pitch_cos = np.hypot(yaw_cos, yaw_sin)
+    angles[:, 1] = np.arctan2(2 * (w * y - x * z), pitch_cos)
+    angles[:, 2] = np.arctan2(yaw_sin, yaw_cos)
+
+    locked = pitch_cos < _GIMBAL_LOCK_TOLERANCE
+    if locked.any():
+        yaw = 2 * np.arctan2(z[locked], w[locked])
+        angles[locked, 0] = 0.0
+        angles[locked, 2] = np.arctan2(np.sin(yaw), np.cos(yaw))
+    return angles
+
+
+def from_euler_angles(angles):
+    """Orientation quaternions of Euler angles.
+
+    The inverse of :py:func:`to_euler_angles`.
+
+    :param angles: A (N, 3) array of roll, pitch and yaw angles, in radians.
+    :type angles: :py:class:`numpy.ndarray`
+    :return: A (N, 4) array of unit quaternions.
+    :rtype: :py:class:`numpy.ndarray`
+
+    """
+    angles = np.asarray(angles, 'float')
+    if angles.ndim != 2 or angles.shape[1] != 3:
+        raise ValueError("Angles must be a (N, 3) array.")
+    cr, cp, cy = [np.cos(angles[:, i] / 2) for i in range(3)]
+    sr, sp, sy = [np.sin(angles[:, i] / 2) for i in range(3)]
+
+    q = np.empty((len(angles), 4), 'float')
+    q[:, 0] = cr * cp * cy + sr * sp * sy
+    q[:, 1] = sr * cp * cy - cr * sp * sy
+    q[:, 2] = cr * sp * cy + sr * cp * sy
+    q[:, 3] = cr * cp * sy - sr * sp * cy
+    return q
+
+
+def to_rotation_vectors(quaternions):
+    """Axis-angle representations of orientation quaternions, as rotation vectors.
+
+    A rotation vector is the unit rotation axis times the rotation angle, with
+    the angle in [0, pi].
+
+    :param quaternions: A (N, 4) array or :py:class:`wlmetrics.quaternion.QuaternionArray`.
+    :return: A (N, 3) array of rotation vectors, in radians.
+    :rtype: :py:class:`numpy.ndarray`
+
+    """
+    q = _canonical(_normalized(quaternions))
+    sines = np.sqrt(np.sum(q[:, 1:] ** 2, axis=1))
+    angles = 2 * np.arctan2(sines, q[:, 0])
+    # angle / sin(angle / 2) tends to 2 for small angles.
+    scale = np.full((len(q), ), 2.0)
+    np.divide(angles, sines, out=scale, where=sines > 1e-8)
+    return q[:, 1:] * scale[:, np.newaxis]
+
+
+def from_rotation_vectors(vectors):
+    """Orientation quaternions of rotation vectors.
+
+    The inverse of :py:func:`to_rotation_vectors`.
+
+    :param vectors: A (N, 3) array of rotation vectors, in radians.
+    :type vectors: :py:class:`numpy.ndarray`
+    :return: A (N, 4) array of unit quaternions.
+    :rtype: :py:class:`numpy.ndarray`
+
+    """
+    vectors = np.asarray(vectors, 'float')
+    if vectors.ndim != 2 or vectors.shape[1] != 3:
+        raise ValueError("Rotation vectors must be a (N, 3) array.")
+    half_angles = np.sqrt(np.sum(vectors ** 2, axis=1)) / 2
+    q = np.empty((len(vectors), 4), 'float')
+    q[:, 0] = np.cos(half_angles)
+    # sin(angle / 2) / angle, well defined at zero.
+    q[:, 1:] = vectors * (0.5 * np.sinc(half_angles / np.pi))[:, np.newaxis]
+    return q
+
+
+def rotate_vectors(quaternions, vectors, gravity=None, inverse=False, out=None):
+    """Rotate one vector per sample by the orientation of that sample.
+
+    With the output of e.g. :py:meth:`wlmetrics.filter.madgwick.MadgwickAHRSFilter.filter`
+    and the accelerometer values of the recording, this gives the accelerations in the
+    world frame, and with ``gravity`` set, with gravity removed. The rotation matrix
+    form is used, which is cheaper than two quaternion products per sample.
+
+    :param quaternions: A (N, 4) array or :py:class:`wlmetrics.quaternion.QuaternionArray`.
+    :param vectors: A (N, 3) array of sensor frame vectors.
+    :type vectors: :py:class:`numpy.ndarray`
+    :param gravity: Gravity to subtract from the world frame vectors, either as its
+        magnitude along the world z axis, e.g. 1 for accelerometer values in g,
+        or as a 3-vector. Not subtracted if None.
+    :type gravity: float or :py:class:`numpy.ndarray`
+    :param inverse: Rotate from the world frame to the sensor frame instead.
+        Gravity is then subtracted before rotating.
+    :type inverse: bool
+    :param out: Optional (N, 3) array to write the result to.
+    :type out: :py:class:`numpy.ndarray`
+    :return: A (N, 3) array of rotated vectors.
+    :rtype: :py:class:`numpy.ndarray`
+
+    """
+    matrices = to_rotation_matrices(quaternions)
+    vectors = np.asarray(vectors, 'float')
+    if vectors.shape != (len(matrices), 3):
+        raise ValueError("Vectors must be a (N, 3) array, with N the number of quaternions.")
+    if gravity is not None and np.ndim(gravity) == 0:
+        gravity = np.array([0.0, 0.0, gravity])
+
+    if inverse:
+        if gravity is not None:
+            vectors = vectors - gravity
+        return np.einsum('nji,nj->ni', matrices, vectors, out=out)
+
+    out = np.einsum('nij,nj->ni', matrices, vectors, out=out)
+    if gravity is not None:
+        out -= gravity
+    return out
+
+
+def _interpolation_input(q0, q1, t):
+    q0 = _as_array(q0)
+    q1 = _as_array(q1)
+    t = np.asarray(t, 'float')
+    if q0.shape != q1.shape or t.shape != (len(q0), ):
+        raise ValueError("q0 and q1 must be (N, 4) arrays, and t a (N, ) array.")
+    # Interpolate along the shorter arc.
+    dots = np.sum(q0 * q1, axis=1)
+    q1 = np.where((dots < 0)[:, np.newaxis], -q1, q1)
+    return q0, q1, t[:, np.newaxis], np.abs(dots)
+
+
+def nlerp(q0, q1, t):
+    """Normalised linear interpolation between pairs of unit quaternions.
+
+    Cheaper than :py:func:`slerp`, and close to it for nearby quaternions, e.g.
+    consecutive samples of an orientation stream, but not at constant angular rate.
+
+    :param q0: A (N, 4) array of start quaternions.
+    :param q1: A (N, 4) array of end quaternions.
+    :param t: A (N, ) array of interpolation parameters in [0, 1].
+    :type t: :py:class:`numpy.ndarray`
+    :return: A (N, 4) array of unit quaternions.
+    :rtype: :py:class:`numpy.ndarray`
+
+    """
+    q0, q1, t, dots = _interpolation_input(q0, q1, t)
+    q = (1 - t) * q0 + t * q1
+    return q / np.sqrt(np.sum(q ** 2, axis=1))[:, np.newaxis]
+
+
+def slerp(q0, q1, t):
+    """Spherical linear interpolation between pairs of unit quaternions.
+
+    The interpolation follows the shorter arc, at constant angular rate.
+    Nearly equal pairs are interpolated with :py:func:`nlerp`.
+
+    :param q0: A (N, 4) array of start quaternions.
+    :param q1: A (N, 4) array of end quaternions.
+    :param t: A (N, ) array of interpolation parameters in [0, 1].
+    :type t: :py:class:`numpy.ndarray`
+    :return: A (N, 4) array of unit quaternions.
+    :rtype: :py:class:`numpy.ndarray`
+
+    """
+    q0, q1, t, dots = _interpolation_input(q0, q1, t)
+    angles = np.arccos(np.minimum(dots, 1.0))[:, np.newaxis]
+    sines = np.sin(angles)
+    linear = (dots > _SLERP_LINEAR_THRESHOLD)[:, np.newaxis]
+    sines[linear] = 1.0
+    w0 = np.where(linear, 1 - t, np.sin((1 - t) * angles) / sines)
+    w1 = np.where(linear, t, np.sin(t * angles) / sines)
+    q = w0 * q0 + w1 * q1
+    return q / np.sqrt(np.sum(q ** 2, axis=1))[:, np.newaxis]
+
+
+def resample(timestamps, quaternions, new_timestamps, method='slerp'):
+    """Resample an orientation stream onto new timestamps.
+
+    Each new timestamp is bracketed by two samples with :py:func:`numpy.searchsorted`,
+    and all of them are interpolated in one pass. New timestamps outside the
+    recording get the first or last orientation.
+
+    :param timestamps: The (N, ) increasing timestamps of the stream, e.g.
+        :py:attr:`wlmetrics.container.BerryIMUDataContainer.timestamps`.
+    :type timestamps: :py:class:`numpy.ndarray`
+    :param quaternions: A (N, 4) array or :py:class:`wlmetrics.quaternion.QuaternionArray`.
+    :param new_timestamps: The (M, ) timestamps to resample to.
+    :type new_timestamps: :py:class:`numpy.ndarray`
+    :param method: ``'slerp'`` or ``'nlerp'``.
+    :type method: str
+    :return: A (M, 4) array of unit quaternions.
+    :rtype: :py:class:`numpy.ndarray`
+
+    """
+    interpolate = {'slerp': slerp, 'nlerp': nlerp}.get(method)
+    if interpolate is None:
+        raise ValueError("Unknown interpolation method {0}.".format(method))
+    timestamps = np.asarray(timestamps, 'float')
+    new_timestamps = np.asarray(new_timestamps, 'float')
+    q = _as_array(quaternions)
+    if len(q) != len(timestamps):
+        raise ValueError("There must be one timestamp per quaternion.")
+    if len(q) == 1:
+        return np.tile(q / np.sqrt(np.sum(q ** 2)), (len(new_timestamps), 1))
+
+    index = np.clip(np.searchsorted(timestamps, new_timestamps, side='right') - 1, 0, len(timestamps) - 2)
+    durations = timestamps[index + 1] - timestamps[index]
+    t = np.zeros((len(new_timestamps), ), 'float')
+    np.divide(new_timestamps - timestamps[index], durations, out=t, where=durations > 0)
+    return interpolate(q[index], q[index + 1], np.clip(t, 0.0, 1.0))
+
+
+def main():
+    import math
+
+    n = 20000
+    q = np.random.randn(n, 4)
+    q /= np.sqrt(np.sum(q ** 2, axis=1))[:, np.newaxis]
+    quaternions = [Quaternion(row) for row in q]
+
+    def loop_matrices():
+        return [np.array([[1 - 2 * (p.y ** 2 + p.z ** 2), 2 * (p.x * p.y - p.w * p.z), 2 * (p.x * p.z + p.w * p.y)],
+                          [2 * (p.x * p.y + p.w * p.z), 1 - 2 * (p.x ** 2 + p.z ** 2), 2 * (p.y * p.z - p.w * p.x)],
+                          [2 * (p.x * p.z - p.w * p.y), 2 * (p.y * p.z + p.w * p.x), 1 - 2 * (p.x ** 2 + p.y ** 2)]])
+                for p in quaternions]
+
+    def loop_euler_angles():
+        return [(math.atan2(2 * (p.w * p.x + p.y * p.z), 1 - 2 * (p.x ** 2 + p.y ** 2)),
+                 math.asin(max(-1.0, min(1.0, 2 * (p.w * p.y - p.x * p.z)))),
+                 math.atan2(2 * (p.w * p.z + p.x * p.y), 1 - 2 * (p.y ** 2 + p.z ** 2)))
+                for p in quaternions]
+
+    def loop_rotation_vectors():
+        vectors = []
+        for p in quaternions:
+            sine = math.sqrt(p.x ** 2 + p.y ** 2 + p.z ** 2)
+            angle = 2 * math.atan2(sine, p.w)
+            vectors.append(p.imag * (angle / sine))
+        return vectors
+
+    for name, loop, vectorised in [
+            ("Rotation matrices", loop_matrices, lambda: to_rotation_matrices(q)),
+            ("Euler angles", loop_euler_angles, lambda: to_euler_angles(q)),
+            ("Rotation vectors", loop_rotation_vectors, lambda: to_rotation_vectors(q))]:
+        t = time.time()
+        loop()
+        t_loop = time.time() - t
+        t = time.time()
+        vectorised()
+        t_vectorised = time.time() - t
+        print("{0}: Quaternion loop {1:.4f} s, vectorised {2:.4f} s, N = {3}".format(
+            name, t_loop, t_vectorised, n))
+
+
+if __name__ == '__main__':
+    main()
@@ -19,117 +19,160 @@ from __future__ import print_function
 from __future__ import unicode_literals
 from __future__ import absolute_import
 
+import math
+
 import numpy as np
 
 
 class Quaternion(object):
-    """A simple quaternion class."""
-    
+    """A simple quaternion class.
+
+    The elements are kept as plain floats in slots, so that creating and
+    operating on single quaternions, e.g. once per sample in a filter, is cheap.
+    Use :py:class:`QuaternionArray` for many quaternions.
+
+    """
+
+    __slots__ = ('w', 'x', 'y', 'z')
+
     def __init__(self, values):
         """Constructor for Quaternion"""
         if len(values) != 4:
             raise ValueError("Quaternion init vector must be of length 4.")
-        self._elements = np.array(values, 'float')
+        w, x, y, z = values
+        self.w = float(w)
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
 
     @classmethod
     def i(cls):
-        return cls([0, 1, 0, 0])
+        return cls((0, 1, 0, 0))
 
     @classmethod
     def j(cls):
-        return cls([0, 0, 1, 0])
+        return cls((0, 0, 1, 0))
 
     @classmethod
     def k(cls):
-        return cls([0, 0, 0, 1])
+        return cls((0, 0, 0, 1))
 
     def __repr__(self):
-        return "{0} + {1}i + {2}j + {3}k".format(*self._elements)
+        return "{0} + {1}i + {2}j + {3}k".format(self.w, self.x, self.y, self.z)
 
     def __str__(self):
         return repr(self)
 
     def __iter__(self):
-        for value in self._elements:
-            yield value
+        return iter((self.w, self.x, self.y, self.z))
 
     def __getitem__(self, item):
-        return self._elements[item]
+        values = (self.w, self.x, self.y, self.z)
+        if isinstance(item, slice):
+            return np.array(values[item])
+        return values[item]
 
     def __add__(self, other):
-        if isinstance(other, Quaternion):
-            return Quaternion(self.to_array() + other.to_array())
+        if isinstance(other, QuaternionArray):
+            return NotImplemented
+        elif isinstance(other, Quaternion):
+            return Quaternion((self.w + other.w, self.x + other.x, self.y + other.y, self.z + other.z))
         elif isinstance(other, (int, float)):
-            return self + Quaternion([other, 0, 0, 0])
+            return Quaternion((self.w + other, self.x, self.y, self.z))
         else:
             raise NotImplementedError("Cannot add Quaternion with type {0}".format(type(other)))
 
     def __iadd__(self, other):
         if isinstance(other, Quaternion):
-            self._elements += other.to_array()
+            self.w += other.w
+            self.x += other.x
+            self.y += other.y
+            self.z += other.z
         elif isinstance(other, (int, float)):
-            self._elements += Quaternion([other, 0, 0, 0]).to_array()
+            self.w += other
         else:
             raise NotImplementedError("Cannot add Quaternion with type {0}".format(type(other)))
+        return self
 
     def __sub__(self, other):
-        if isinstance(other, Quaternion):
-            return Quaternion(self.to_array() - other.to_array())
+        if isinstance(other, QuaternionArray):
+            return NotImplemented
+        elif isinstance(other, Quaternion):
+            return Quaternion((self.w - other.w, self.x - other.x, self.y - other.y, self.z - other.z))
         elif isinstance(other, (int, float)):
-            return Quaternion(self._elements - other)
+            return Quaternion((self.w - other, self.x, self.y, self.z))
         else:
             raise NotImplementedError("Cannot subtract Quaternion with type {0}".format(type(other)))
 
     def __isub__(self, other):
         if isinstance(other, Quaternion):
-            self._elements -= other.to_array()
+            self.w -= other.w
+            self.x -= other.x
+            self.y -= other.y
+            self.z -= other.z
         elif isinstance(other, (int, float)):
-            self._elements -= Quaternion([other, 0, 0, 0]).to_array()
+            self.w -= other
         else:
             raise NotImplementedError("Cannot add Quaternion with type {0}".format(type(other)))
+        return self
+
+    def _product(self, other):
+        w1, x1, y1, z1 = self.w, self.x, self.y, self.z
+        w2, x2, y2, z2 = other.w, other.x, other.y, other.z
+        return (w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+                w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+                w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+                w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2)
 
     def __mul__(self, other):
-        if isinstance(other, Quaternion):
-            return Quaternion([self.w * other.w - (self.x * other.x) - (self.y * other.y) - (self.z * other.z),
-                               self.w * other.x + self.x * other.w + self.y * other.z - (self.z * other.y),
-                               self.w * other.y - (self.x * other.z) + self.y * other.w + self.z * other.x,
-                               self.w * other.z + self.x * other.y - (self.y * other.x) + self.z * other.w])
+        if isinstance(other, QuaternionArray):
+            return NotImplemented
+        elif isinstance(other, Quaternion):
+            return Quaternion(self._product(other))
         elif isinstance(other, (int, float)):
-            return Quaternion(self._elements * other)
+            return Quaternion((self.w * other, self.x * other, self.y * other, self.z * other))
         else:
             raise NotImplementedError("Cannot multiply Quaternion with type {0}".format(type(other)))
 
     def __imul__(self, other):
         if isinstance(other, Quaternion):
-            self._elements[:] = [self.w * other.w - (self.x * other.x) - (self.y * other.y) - (self.z * other.z),
-                                 self.w * other.x + self.x * other.w + self.y * other.z - (self.z * other.y),
-                                 self.w * other.y - (self.x * other.z) + self.y * other.w + self.z * other.x,
-                                 self.w * other.z + self.x * other.y - (self.y * other.x) + self.z * other.w]
+            self.w, self.x, self.y, self.z = self._product(other)
         elif isinstance(other, (int, float)):
-            self._elements *= other
+            self.w *= other
+            self.x *= other
+            self.y *= other
+            self.z *= other
         else:
             raise NotImplementedError("Cannot multiply Quaternion with type {0}".format(type(other)))
+        return self
 
     def __rmul__(self, other):
         # Catch only int and float rmultiplications.
         if isinstance(other, (int, float)):
-            return Quaternion(self._elements * other)
+            return self * other
+        return NotImplemented
 
     def __truediv__(self, other):
-        if isinstance(other, Quaternion):
+        if isinstance(other, QuaternionArray):
+            return NotImplemented
+        elif isinstance(other, Quaternion):
             return self * other.inverse()
         elif isinstance(other, (int, float)):
-            return Quaternion(self._elements / other)
+            return Quaternion((self.w / other, self.x / other, self.y / other, self.z / other))
         else:
             raise NotImplementedError("Cannot multiply Quaternion with type {0}".format(type(other)))
 
     def __itruediv__(self, other):
         if isinstance(other, Quaternion):
-            self._elements[:] = (self * other.inverse()).to_array()
+            self.w, self.x, self.y, self.z = self._product(other.inverse())
         elif isinstance(other, (int, float)):
-            self._elements /= other
+            self.w /= other
+            self.x /= other
+            self.y /= other
+            self.z /= other
         else:
             raise NotImplementedError("Cannot multiply Quaternion with type {0}".format(type(other)))
+        return self
 
     def __floordiv__(self, other):
         raise NotImplementedError("Floor Division not implemented for Quaternions.")
@@ -137,46 +180,203 @@ class Quaternion(object):
     def __div__(self, other):
         return self.__truediv__(other)
 
+    def __idiv__(self, other):
+        return self.__itruediv__(other)
+
     def __neg__(self):
-        return self * -1
+        return Quaternion((-self.w, -self.x, -self.y, -self.z))
+
+    @property
+    def real(self):
+        return self.w
+
+    @property
+    def imag(self):
+        return np.array([self.x, self.y, self.z])
+
+    def to_array(self):
+        return np.array([self.w, self.x, self.y, self.z])
+
+    def conjugate(self):
+        return Quaternion((self.w, -self.x, -self.y, -self.z))
+
+    def inverse(self):
+        return self.conjugate() / (self.w * self.w + self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def norm(self):
+        return math.sqrt(self.w * self.w + self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def normalize(self):
+        norm = self.norm()
+        self.w /= norm
+        self.x /= norm
+        self.y /= norm
+        self.z /= norm
+
+
+def _multiply(q1, q2):
+    """Hamilton products of the quaternions on the last axis of two broadcastable arrays."""
+    w1, x1, y1, z1 = q1[..., 0], q1[..., 1], q1[..., 2], q1[..., 3]
+    w2, x2, y2, z2 = q2[..., 0], q2[..., 1], q2[..., 2], q2[..., 3]
+    out = np.empty(np.broadcast(q1, q2).shape, 'float')
+    out[..., 0] = w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2
+    out[..., 1] = w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2
+    out[..., 2] = w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2
+    out[..., 3] = w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2
+    return out
+
+
+class QuaternionArray(object):
+    """An array of quaternions, backed by one contiguous (N, 4) float array.
+
+    The operators work on all quaternions at once, and broadcast a single
+    :py:class:`Quaternion` against all of them, e.g. ``q_ref * qs``.
+
+    """
+
+    def __init__(self, values):
+        """Constructor for QuaternionArray
+
+        :param values: A (N, 4) array, e.g. the output of
+            :py:meth:`wlmetrics.filter.madgwick.MadgwickAHRSFilter.filter`.
+        :type values: :py:class:`numpy.ndarray`
+
+        """
+        self._elements = np.array(values, 'float', order='C', ndmin=2)
+        if self._elements.ndim != 2 or self._elements.shape[1] != 4:
+            raise ValueError("QuaternionArray init array must be of shape (N, 4).")
+
+    def __repr__(self):
+        return "QuaternionArray({0})".format(self._elements)
+
+    def __str__(self):
+        return repr(self)
+
+    def __len__(self):
+        return len(self._elements)
+
+    def __iter__(self):
+        for row in self._elements:
+            yield Quaternion(row)
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            return Quaternion(self._elements[item])
+        return QuaternionArray(self._elements[item])
+
+    @staticmethod
+    def _operand(other):
+        if isinstance(other, QuaternionArray):
+            return other._elements
+        elif isinstance(other, Quaternion):
+            return other.to_array()
+        return None
+
+    def __add__(self, other):
+        elements = self._operand(other)
+        if elements is not None:
+            return QuaternionArray(self._elements + elements)
+        elif isinstance(other, (int, float)):
+            return self + Quaternion([other, 0, 0, 0])
+        else:
+            raise NotImplementedError("Cannot add QuaternionArray with type {0}".format(type(other)))
+
+    def __radd__(self, other):
+        return self + other
+
+    def __sub__(self, other):
+        elements = self._operand(other)
+        if elements is not None:
+            return QuaternionArray(self._elements - elements)
+        elif isinstance(other, (int, float)):
+            return self - Quaternion([other, 0, 0, 0])
+        else:
+            raise NotImplementedError("Cannot subtract QuaternionArray with type {0}".format(type(other)))
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __mul__(self, other):
+        elements = self._operand(other)
+        if elements is not None:
+            return QuaternionArray(_multiply(self._elements, elements))
+        elif isinstance(other, (int, float)):
+            return QuaternionArray(self._elements * other)
+        else:
+            raise NotImplementedError("Cannot multiply QuaternionArray with type {0}".format(type(other)))
+
+    def __rmul__(self, other):
+        if isinstance(other, Quaternion):
+            return QuaternionArray(_multiply(other.to_array(), self._elements))
+        elif isinstance(other, (int, float)):
+            return QuaternionArray(self._elements * other)
+        return NotImplemented
+
+    def __truediv__(self, other):
+        if isinstance(other, (Quaternion, QuaternionArray)):
+            return self * other.inverse()
+        elif isinstance(other, (int, float)):
+            return QuaternionArray(self._elements / other)
+        else:
+            raise NotImplementedError("Cannot divide QuaternionArray with type {0}".format(type(other)))
+
+    def __rtruediv__(self, other):
+        if isinstance(other, (Quaternion, int, float)):
+            return other * self.inverse()
+        return NotImplemented
+
+    def __div__(self, other):
+        return self.__truediv__(other)
+
+    def __rdiv__(self, other):
+        return self.__rtruediv__(other)
+
+    def __neg__(self):
+        return QuaternionArray(-self._elements)
+
+    @property
+    def shape(self):
+        return self._elements.shape
 
     @property
     def w(self):
-        return self._elements[0]
+        return self._elements[:, 0]
 
     @property
     def x(self):
-        return self._elements[1]
+        return self._elements[:, 1]
 
     @property
     def y(self):
-        return self._elements[2]
+        return self._elements[:, 2]
 
     @property
     def z(self):
-        return self._elements[3]
+        return self._elements[:, 3]
 
     @property
     def real(self):
-        return self._elements[0]
+        return self._elements[:, 0]
 
     @property
     def imag(self):
-        return self._elements[1:]
+        return self._elements[:, 1:]
 
     def to_array(self):
         return self._elements.copy()
 
     def conjugate(self):
-        return Quaternion([self.w, -self.x, -self.y, -self.z])
+        elements = -self._elements
+        elements[:, 0] *= -1
+        return QuaternionArray(elements)
 
     def inverse(self):
-        return self.conjugate() / (self.norm() ** 2)
+        conjugate = self.conjugate()
+        conjugate._elements /= np.sum(self._elements ** 2, axis=1)[:, np.newaxis]
+        return conjugate
 
     def norm(self):
-        return np.linalg.norm(self._elements)
+        return np.sqrt(np.sum(self._elements ** 2, axis=1))
 
     def normalize(self):
-        self._elements /= self.norm()
-
-
+        self._elements /= self.norm()[:, np.newaxis]
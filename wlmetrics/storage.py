@@ -0,0 +1,755 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`storage`
+==================
+
+.. module:: storage
+   :platform: Unix, Windows
+   :synopsis: Binary storage format for recordings.
+
+.. moduleauthor:: hbldh <henrik.blidh@nedomkull.com>
+
+Created on 2026-10-18, 20:10
+
+The binary format consists of
+
+* an 8 byte magic string, ``WLMETRIC``,
+* the format version and the length of the header, as little-endian uint32,
+* a JSON header with the recording metadata and a ``channels`` entry giving
+  dtype, shape and offset of each channel,
+* the channels as raw little-endian C ordered blocks, each starting at a
+  multiple of 64 bytes. The data section starts at the first such boundary
+  after the header, and the channel offsets are relative to it.
+
+Reading it can memory-map the file, which makes the channels zero-copy
+:py:class:`numpy.ndarray` views into the file.
+
+Channels can also be stored encoded, see :py:func:`write_binary`. Integer
+values, and timestamps with microsecond resolution, are then stored as
+integers of the smallest dtype holding them, optionally delta and zigzag
+coded, and the channels can be compressed in chunks with :py:mod:`zlib` or
+:py:mod:`lzma`. The encoding is lossless, and encoded channels are decoded
+into memory on reading.
+
+Recordings can also be written while they are captured, with a
+:py:class:`ChunkedWriter`. The chunked format has the same prefix and JSON
+header, with another magic string, ``WLMCHUNK``, followed by
+
+* chunks of samples, each a ``CHNK`` tag and the number of samples as
+  little-endian uint32, followed by the samples of each channel in turn,
+* on close, a JSON index of the chunk offsets and a trailer with the offset of
+  the index and the magic string ``WLMINDEX``.
+
+Files without the index, e.g. of a capture that crashed, are read by walking
+the chunks up to the last complete one.
+
+JSON recordings can be read lazily with :py:func:`read_json`, which indexes
+the byte ranges of the channels in the file and only decodes a channel
+when asked to.
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import os
+import json
+import time
+import zlib
+import struct
+import functools
+
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
+import numpy as np
+
+__all__ = ['BINARY_EXTENSION', 'CHUNKED_EXTENSION', 'CHANNELS', 'CHANNEL_DTYPES',
+           'is_binary', 'write_binary', 'read_binary', 'is_chunked', 'ChunkedWriter', 'read_chunked',
+           'read_json', 'read_layout', 'count_samples', 'read_recording', 'convert_json_to_binary']
+
+MAGIC = b'WLMETRIC'
+FORMAT_VERSION = 2
+BINARY_EXTENSION = '.wlmb'
+CHUNKED_MAGIC = b'WLMCHUNK'
+CHUNKED_EXTENSION = '.wlmc'
+CHANNELS = ('timestamps', 'accelerometer', 'gyroscope', 'magnetometer', 'pressure', 'temperature')
+# Sample dtypes of the channels, as accepted by :py:class:`numpy.dtype`.
+CHANNEL_DTYPES = {
+    'timestamps': 'float',
+    'accelerometer': ('float', 3),
+    'gyroscope': ('float', 3),
+    'magnetometer': ('float', 3),
+    'pressure': 'float',
+    'temperature': 'float',
+}
+
+_PREFIX = struct.Struct(str('<8sII'))
+_ALIGNMENT = 64
+# Scales tried for storing floating point channels as integers, the latter
+# for timestamps in seconds with microsecond resolution.
+_INTEGER_SCALES = (1, 10 ** 6)
+
+_CHUNK_TAG = b'CHNK'
+_CHUNK_PREFIX = struct.Struct(str('<4sI'))
+_INDEX_MAGIC = b'WLMINDEX'
+_INDEX_TRAILER = struct.Struct(str('<Q8s'))
+
+# Change of nesting depth caused by each byte of a JSON document.
+_JSON_DEPTH = np.zeros((256, ), 'int8')
+_JSON_DEPTH[[ord('{'), ord('[')]] = 1
+_JSON_DEPTH[[ord('}'), ord(']')]] = -1
+_JSON_WHITESPACE = b' \t\r\n'
+
+
+def _aligned(n):
+    return -(-n // _ALIGNMENT) * _ALIGNMENT
+
+
+def _magic(file_path):
+    with open(os.path.abspath(file_path), 'rb') as f:
+        return f.read(len(MAGIC))
+
+
+def is_binary(file_path):
+    """Check if a file is in the binary format.
+
+    :param file_path: Path to the file.
+    :type file_path: str
+    :return: If the file starts with the magic string of the binary format.
+    :rtype: bool
+
+    """
+    return _magic(file_path) == MAGIC
+
+
+def is_chunked(file_path):
+    """Check if a file is in the chunked format.
+
+    :param file_path: Path to the file.
+    :type file_path: str
+    :return: If the file starts with the magic string of the chunked format.
+    :rtype: bool
+
+    """
+    return _magic(file_path) == CHUNKED_MAGIC
+
+
+def _smallest_dtype(values, unsigned=False):
+    for dtype in (('uint8', 'uint16', 'uint32', 'uint64') if unsigned else ('int8', 'int16', 'int32', 'int64')):
+        info = np.iinfo(dtype)
+        if values.size == 0 or (values.min() >= info.min and values.max() <= info.max):
+            return np.dtype(dtype).newbyteorder('<')
+
+
+def _compress(data, compression):
+    if compression is None:
+        return data
+    if compression == 'zlib':
+        return zlib.compress(data, 6)
+    if compression == 'lzma':
+        if lzma is None:
+            raise ValueError("lzma compression is not available.")
+        return lzma.compress(data)
+    raise ValueError("Unknown compression {0}.".format(compression))
+
+
+def _decompress(data, compression):
+    if compression is None:
+        return data
+    if compression == 'zlib':
+        return zlib.decompress(data)
+    if lzma is None:
+        raise ValueError("lzma compression is not available.")
+    return lzma.decompress(data)
+
+
+def _encode(array):
+    """Store a channel as integers in as small a dtype as possible, if it
+    can be done without loss.
+
+    :return: The array to store and the encoding.
+    :rtype: tuple
+
+    """
+    encoding = {'dtype': array.dtype.str, 'scale': None, 'delta': False}
+    integers = None
+    if array.size == 0 or array.dtype.kind in 'biu':
+        integers = array.astype('int64')
+        encoding['scale'] = 1
+    elif array.dtype.kind == 'f' and np.all(np.isfinite(array)):
+        for scale in _INTEGER_SCALES:
+            if np.max(np.abs(array)) * scale >= 2 ** 53:
+                break
+            scaled = np.round(array * scale)
+            if np.array_equal(scaled / scale, array):
+                integers = scaled.astype('int64')
+                encoding['scale'] = scale
+                break
+    if integers is None:
+        return array, encoding
+
+    # Delta coding from the first sample, kept in the encoding, with the
+    # zigzag mapping of small signed deltas to small unsigned integers, where
+    # it gives a smaller dtype or smaller values.
+    dtype = _smallest_dtype(integers)
+    if integers.size == 0:
+        return integers.astype(dtype), encoding
+    deltas = integers - integers[:1]
+    deltas[1:] = np.diff(integers, axis=0)
+    zigzag = ((deltas << 1) ^ (deltas >> 63)).view('uint64')
+    delta_dtype = _smallest_dtype(zigzag, unsigned=True)
+    if delta_dtype.itemsize < dtype.itemsize or (
+            delta_dtype.itemsize == dtype.itemsize and np.mean(zigzag) < np.mean(np.abs(integers))):
+        encoding['delta'] = True
+        encoding['initial'] = integers[0].tolist()
+        return zigzag.astype(delta_dtype), encoding
+    return integers.astype(dtype), encoding
+
+
+def _decode(values, encoding):
+    if encoding['delta']:
+        values = values.astype('int64')
+        values = np.cumsum((values >> 1) ^ -(values & 1), axis=0) + np.array(encoding['initial'], 'int64')
+    if encoding['scale'] is not None and encoding['scale'] != 1:
+        values = values / encoding['scale']
+    return values.astype(np.dtype(str(encoding['dtype'])))
+
+
+def write_binary(file_path, header, channels, encode=False, compression=None, chunk_size=65536):
+    """Write a recording in the binary format.
+
+    :param file_path: Path to the file to write.
+    :type file_path: str
+    :param header: JSON serialisable metadata of the recording.
+    :type header: dict
+    :param channels: The channels to store, as arrays. Channels that are None are left out.
+    :type channels: dict
+    :param encode: If channels with integer values, and timestamps with
+        microsecond resolution, should be stored as integers of the smallest
+        dtype holding them, delta and zigzag coded when that is smaller.
+    :type encode: bool
+    :param compression: ``'zlib'`` or ``'lzma'`` to compress the channels,
+        in chunks of ``chunk_size`` samples. Defaults to no compression.
+    :type compression: str
+    :param chunk_size: Number of samples per compressed chunk.
+    :type chunk_size: int
+
+    """
+    blocks = []
+    channel_headers = {}
+    offset = 0
+    for name in sorted(channels):
+        if channels[name] is None:
+            continue
+        array = np.asarray(channels[name])
+        array = np.ascontiguousarray(array, array.dtype.newbyteorder('<'))
+        channel_headers[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        if encode or compression is not None:
+            encoding = {'dtype': array.dtype.str, 'scale': None, 'delta': False}
+            if encode:
+                array, encoding = _encode(array)
+            encoding['stored_dtype'] = array.dtype.str
+            encoding['compression'] = compression
+            chunks = [_compress(array[i:i + chunk_size].tobytes(), compression)
+                      for i in range(0, max(len(array), 1), chunk_size)]
+            encoding['chunks'] = [len(chunk) for chunk in chunks]
+            channel_headers[name]['encoding'] = encoding
+            data = b''.join(chunks)
+        else:
+            data = array.tobytes()
+        blocks.append((offset, data))
+        offset = _aligned(offset + len(data))
+
+    header = dict(header, channels=channel_headers)
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _aligned(_PREFIX.size + len(header_bytes))
+
+    with open(os.path.abspath(file_path), 'wb') as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for offset, data in blocks:
+            f.write(b'\0' * (data_start + offset - f.tell()))
+            f.write(data)
+
+
+def _read_prefix(f, file_path, magic):
+    file_magic, format_version, header_length = _PREFIX.unpack(f.read(_PREFIX.size))
+    if file_magic != magic:
+        raise ValueError("{0} is not a wlmetrics {1} file.".format(
+            file_path, 'binary' if magic == MAGIC else 'chunked'))
+    if format_version > FORMAT_VERSION:
+        raise ValueError("Unsupported binary format version {0}.".format(format_version))
+    return json.loads(f.read(header_length).decode('utf-8')), header_length
+
+
+def read_binary(file_path, mmap=True, channels=None):
+    """Read a recording in the binary format.
+
+    :param file_path: Path to the file to read.
+    :type file_path: str
+    :param mmap: If the file should be memory-mapped, so that the channels are
+        read-only views into the file, read from disk on access. Otherwise the
+        requested channels are read into memory, as are encoded channels.
+    :type mmap: bool
+    :param channels: Names of the channels to read. Defaults to all.
+    :type channels: list
+    :return: The header, without the channel entry, and a dict of channel arrays.
+    :rtype: tuple
+
+    """
+    file_path = os.path.abspath(file_path)
+    with open(file_path, 'rb') as f:
+        header, header_length = _read_prefix(f, file_path, MAGIC)
+        data_start = _aligned(_PREFIX.size + header_length)
+        channel_headers = header.pop('channels')
+        names = [name for name in channel_headers if channels is None or name in channels]
+
+        data = {}
+        if mmap and names:
+            buffer = np.memmap(file_path, dtype='uint8', mode='r')
+        for name in names:
+            dtype = np.dtype(str(channel_headers[name]['dtype']))
+            shape = tuple(channel_headers[name]['shape'])
+            offset = data_start + channel_headers[name]['offset']
+            count = int(np.prod(shape))
+            encoding = channel_headers[name].get('encoding')
+            if encoding is not None:
+                f.seek(offset)
+                values = b''.join(_decompress(f.read(n), encoding['compression']) for n in encoding['chunks'])
+                values = np.frombuffer(values, np.dtype(str(encoding['stored_dtype'])), count)
+                array = _decode(values.reshape(shape), encoding)
+            elif mmap:
+                array = buffer[offset:offset + count * dtype.itemsize].view(dtype)
+            else:
+                f.seek(offset)
+                array = np.fromfile(f, dtype, count)
+            data[name] = array.reshape(shape)
+
+    return header, data
+
+
+class ChunkedWriter(object):
+    """Append-only writer of recordings in the chunked format.
+
+    Samples are collected in preallocated buffers of ``chunk_size`` samples,
+    and each full buffer is appended to the file as a chunk, so the memory use
+    does not grow with the length of the recording. The samples buffered so
+    far are also written every ``flush_interval`` seconds, and by
+    :py:meth:`flush`. The index of the chunks is written on :py:meth:`close`.
+
+    .. code-block:: python
+
+        with ChunkedWriter('rec.wlmc', header, {'timestamps': 'float',
+                                                'accelerometer': ('float', 3)}) as writer:
+            for t, acc in capture():
+                writer.append(timestamps=t, accelerometer=acc)
+
+    :param file_path: Path to the file to write.
+    :type file_path: str
+    :param header: JSON serialisable metadata of the recording.
+    :type header: dict
+    :param channels: The sample dtype of each channel, e.g. ``('float', 3)``
+        for three values per sample. See :py:data:`CHANNEL_DTYPES`.
+    :type channels: dict
+    :param chunk_size: Number of samples per chunk.
+    :type chunk_size: int
+    :param flush_interval: Seconds between writes of the buffered samples,
+        or None to only write full chunks.
+    :type flush_interval: float
+
+    """
+
+    def __init__(self, file_path, header, channels, chunk_size=1024, flush_interval=1.0):
+        self.file_path = os.path.abspath(file_path)
+        self.chunk_size = int(chunk_size)
+        self.flush_interval = flush_interval
+        self.n_samples = 0
+
+        self._names = sorted(channels)
+        self._buffers = {}
+        layout = []
+        for name in self._names:
+            dtype = np.dtype(channels[name])
+            self._buffers[name] = np.empty((self.chunk_size, ) + dtype.shape, dtype.base.newbyteorder('<'))
+            layout.append({'name': name, 'dtype': self._buffers[name].dtype.str, 'shape': list(dtype.shape)})
+        self._count = 0
+        self._chunks = []
+
+        header_bytes = json.dumps(dict(header, channels=layout)).encode('utf-8')
+        self._file = open(self.file_path, 'wb')
+        self._file.write(_PREFIX.pack(CHUNKED_MAGIC, FORMAT_VERSION, len(header_bytes)))
+        self._file.write(header_bytes)
+        self._file.flush()
+        self._last_flush = time.time()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def append(self, **samples):
+        """Append one or more samples.
+
+        :param samples: A value for each channel, either a single sample or
+            an array with one sample per row.
+
+        """
+        if sorted(samples) != self._names:
+            raise ValueError("Samples must be given for the channels {0}.".format(', '.join(self._names)))
+        values = {}
+        n = None
+        for name in self._names:
+            sample_shape = self._buffers[name].shape[1:]
+            value = np.asarray(samples[name])
+            if value.shape == sample_shape:
+                value = value[np.newaxis]
+            if value.shape[1:] != sample_shape or (n is not None and len(value) != n):
+                raise ValueError("Channel {0} must have samples of shape {1}, as many as the other channels.".format(
+                    name, sample_shape))
+            n = len(value)
+            values[name] = value
+
+        i = 0
+        while i < n:
+            k = min(n - i, self.chunk_size - self._count)
+            for name in self._names:
+                self._buffers[name][self._count:self._count + k] = values[name][i:i + k]
+            self._count += k
+            i += k
+            if self._count == self.chunk_size:
+                self._write_chunk()
+        self.n_samples += n
+
+        if self.flush_interval is not None and time.time() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _write_chunk(self):
+        if self._count == 0:
+            return
+        self._chunks.append([self._file.tell(), self._count])
+        self._file.write(_CHUNK_PREFIX.pack(_CHUNK_TAG, self._count))
+        for name in self._names:
+            self._file.write(self._buffers[name][:self._count].tobytes())
+        self._file.flush()
+        self._count = 0
+
+    def flush(self):
+        """Write the buffered samples as a chunk, and sync the file to disk."""
+        self._write_chunk()
+        os.fsync(self._file.fileno())
+        self._last_flush = time.time()
+
+    def close(self):
+        """Write the buffered samples and the chunk index, and close the file."""
+        if self.closed:
+            return
+        self._write_chunk()
+        index_offset = self._file.tell()
+        self._file.write(json.dumps({'chunks': self._chunks}).encode('utf-8'))
+        self._file.write(_INDEX_TRAILER.pack(index_offset, _INDEX_MAGIC))
+        self._file.close()
+
+
+def _chunk_index(f, data_start, chunk_bytes):
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    if size - data_start >= _INDEX_TRAILER.size:
+        f.seek(size - _INDEX_TRAILER.size)
+        index_offset, magic = _INDEX_TRAILER.unpack(f.read(_INDEX_TRAILER.size))
+        if magic == _INDEX_MAGIC and data_start <= index_offset < size:
+            f.seek(index_offset)
+            return json.loads(f.read(size - _INDEX_TRAILER.size - index_offset).decode('utf-8'))['chunks']
+
+    # No index; walk the chunks up to the last complete one.
+    chunks = []
+    offset = data_start
+    while offset + _CHUNK_PREFIX.size <= size:
+        f.seek(offset)
+        tag, n = _CHUNK_PREFIX.unpack(f.read(_CHUNK_PREFIX.size))
+        if tag != _CHUNK_TAG or offset + _CHUNK_PREFIX.size + n * chunk_bytes > size:
+            break
+        chunks.append([offset, n])
+        offset += _CHUNK_PREFIX.size + n * chunk_bytes
+    return chunks
+
+
+def _read_chunked_index(file_path):
+    with open(file_path, 'rb') as f:
+        header, header_length = _read_prefix(f, file_path, CHUNKED_MAGIC)
+        layout = header.pop('channels')
+        sample_bytes = 0
+        for channel in layout:
+            channel['dtype'] = np.dtype(str(channel['dtype']))
+            channel['shape'] = tuple(channel['shape'])
+            channel['bytes'] = channel['dtype'].itemsize * int(np.prod(channel['shape']))
+            channel['offset'] = sample_bytes
+            sample_bytes += channel['bytes']
+        chunks = _chunk_index(f, _PREFIX.size + header_length, sample_bytes)
+    return header, layout, chunks
+
+
+def read_chunked(file_path, channels=None):
+    """Read a recording in the chunked format.
+
+    Files still being written, or left without an index by a crashed capture,
+    are read up to their last complete chunk.
+
+    :param file_path: Path to the file to read.
+    :type file_path: str
+    :param channels: Names of the channels to read. Defaults to all.
+    :type channels: list
+    :return: The header, without the channel entry, and a dict of channel arrays.
+    :rtype: tuple
+
+    """
+    file_path = os.path.abspath(file_path)
+    header, layout, chunks = _read_chunked_index(file_path)
+
+    layout = [channel for channel in layout if channels is None or channel['name'] in channels]
+    n_samples = sum(n for _, n in chunks)
+    data = {}
+    for channel in layout:
+        data[channel['name']] = np.empty((n_samples, ) + channel['shape'], channel['dtype'])
+    if n_samples == 0:
+        return header, data
+
+    buffer = np.memmap(file_path, dtype='uint8', mode='r')
+    i = 0
+    for offset, n in chunks:
+        start = offset + _CHUNK_PREFIX.size
+        for channel in layout:
+            channel_start = start + n * channel['offset']
+            block = buffer[channel_start:channel_start + n * channel['bytes']]
+            data[channel['name']][i:i + n] = block.view(channel['dtype']).reshape((n, ) + channel['shape'])
+        i += n
+    return header, data
+
+
+def _skip_whitespace(raw, i):
+    while raw[i:i + 1] in _JSON_WHITESPACE:
+        i += 1
+    return i
+
+
+def _json_index(raw):
+    """Index the top level keys and the ``data`` channels of a JSON document.
+
+    Strings are located from the unescaped quotes, and the nesting depth at
+    the brackets outside of strings from a cumulative sum. The end of a value
+    is then its matching bracket, so the numeric arrays of the channels are
+    never decoded.
+
+    :return: The byte range of the ``data`` value, or None if the document has
+        no ``data`` entry, and a dict of the byte ranges of the channel values.
+    :rtype: tuple
+
+    """
+    chars = np.frombuffer(raw, 'uint8')
+    quotes = np.flatnonzero(chars == ord('"'))
+    escaped = []
+    for q in quotes[chars[quotes - 1] == ord('\\')]:
+        n = 1
+        while chars[q - n - 1] == ord('\\'):
+            n += 1
+        if n % 2 == 1:
+            escaped.append(q)
+    quotes = np.setdiff1d(quotes, escaped)
+
+    def outside_strings(positions):
+        return positions[np.searchsorted(quotes, positions) % 2 == 0]
+
+    brackets = outside_strings(np.flatnonzero(
+        (chars == ord('{')) | (chars == ord('[')) | (chars == ord('}')) | (chars == ord(']'))))
+    # Nesting depth after each bracket.
+    levels = _JSON_DEPTH[chars[brackets]].cumsum(dtype='int32')
+
+    def depth(positions):
+        i = np.searchsorted(brackets, positions, 'right') - 1
+        return np.where(i >= 0, levels[i], 0)
+
+    def keys(level, start, stop):
+        for q0, q1 in zip(quotes[0::2], quotes[1::2]):
+            if start < q0 < stop and depth(q0) == level:
+                colon = _skip_whitespace(raw, q1 + 1)
+                if raw[colon:colon + 1] == b':':
+                    yield json.loads(raw[q0:q1 + 1].decode('utf-8')), _skip_whitespace(raw, int(colon) + 1)
+
+    for key, value_start in keys(1, 0, len(raw)):
+        if key == 'data':
+            break
+    else:
+        return None, {}
+    if raw[value_start:value_start + 1] != b'{':
+        return (value_start, value_start + len(b'null')), {}
+
+    def closing(position):
+        i = np.searchsorted(brackets, position)
+        return int(brackets[i + np.argmax(levels[i:] == depth(position) - 1)]) + 1
+
+    value_stop = closing(value_start)
+    index = {}
+    for key, channel_start in keys(2, value_start, value_stop):
+        if raw[channel_start:channel_start + 1] in (b'[', b'{'):
+            index[key] = (channel_start, closing(channel_start))
+        elif raw[channel_start:channel_start + 1] == b'"':
+            index[key] = (channel_start, int(quotes[np.searchsorted(quotes, channel_start) + 1]) + 1)
+        else:
+            channel_stop = channel_start
+            while raw[channel_stop:channel_stop + 1] not in b',}':
+                channel_stop += 1
+            index[key] = (channel_start, channel_stop)
+    return (value_start, value_stop), index
+
+
+def _decode_json_channel(text):
+    return np.array(json.loads(text.decode('utf-8')))
+
+
+def read_json(file_path):
+    """Read a recording saved as JSON, without decoding its channels.
+
+    The document is indexed in one pass with :py:mod:`numpy`, the header is
+    decoded with the ``data`` entry left out, and each channel is returned as a
+    function decoding only its own byte range of the file. Jobs needing one
+    channel from many recordings thereby skip parsing the other channels.
+
+    :param file_path: Path to the JSON file.
+    :type file_path: str
+    :return: The header, and a dict of functions without arguments returning
+        the channel arrays. Channels stored as null are left out.
+    :rtype: tuple
+
+    """
+    with open(os.path.abspath(file_path), 'rb') as f:
+        raw = f.read()
+    data_range, index = _json_index(raw)
+    if data_range is None:
+        header = json.loads(raw.decode('utf-8'))
+    else:
+        header = json.loads((raw[:data_range[0]] + b'null' + raw[data_range[1]:]).decode('utf-8'))
+        header.pop('data')
+    # Each decoder holds a copy of only its own byte range, so the file
+    # contents are released when this returns.
+    decoders = {}
+    for name, (start, stop) in index.items():
+        text = raw[start:stop]
+        if text.strip() != b'null':
+            decoders[name] = functools.partial(_decode_json_channel, text)
+    return header, decoders
+
+
+def read_layout(file_path):
+    """Read the header and the channel shapes of a recording in the binary or
+    chunked format, without reading any of its channels.
+
+    The shapes of a chunked file are those of its complete chunks, as read by
+    :py:func:`read_chunked`.
+
+    :param file_path: Path to the file to read.
+    :type file_path: str
+    :return: The header, without the channel entry, and a dict of the shape
+        of each channel.
+    :rtype: tuple
+
+    """
+    file_path = os.path.abspath(file_path)
+    if is_chunked(file_path):
+        header, layout, chunks = _read_chunked_index(file_path)
+        n_samples = sum(n for _, n in chunks)
+        return header, {channel['name']: (n_samples, ) + channel['shape'] for channel in layout}
+    with open(file_path, 'rb') as f:
+        header, _ = _read_prefix(f, file_path, MAGIC)
+    return header, {name: tuple(channel['shape']) for name, channel in header.pop('channels').items()}
+
+
+def count_samples(file_path):
+    """The number of samples of a recording in any of the formats, without
+    decoding any of its channels.
+
+    The count is the length of the timestamps channel, taken from the header
+    of binary files and the chunk index of chunked files. For JSON files, the
+    values in the byte range of the timestamps are counted.
+
+    :param file_path: Path to the file to read.
+    :type file_path: str
+    :return: The number of samples, or None if the recording has no timestamps.
+    :rtype: int
+
+    """
+    if is_binary(file_path) or is_chunked(file_path):
+        shape = read_layout(file_path)[1].get('timestamps')
+        return shape[0] if shape is not None else None
+    with open(os.path.abspath(file_path), 'rb') as f:
+        raw = f.read()
+    _, index = _json_index(raw)
+    if 'timestamps' not in index:
+        return None
+    values = raw[slice(*index['timestamps'])].strip()
+    if not values.startswith(b'['):
+        return None
+    values = values[1:-1].strip()
+    return values.count(b',') + 1 if values else 0
+
+
+def read_recording(file_path, channels=None):
+    """Read a recording in any of the formats, as JSON, binary or chunked.
+
+    :param file_path: Path to the file to read.
+    :type file_path: str
+    :param channels: Names of the channels to read. Defaults to all.
+    :type channels: list
+    :return: The header and a dict of channel arrays, leaving out channels
+        not in the recording.
+    :rtype: tuple
+
+    """
+    if is_binary(file_path):
+        return read_binary(file_path, mmap=False, channels=channels)
+    if is_chunked(file_path):
+        return read_chunked(file_path, channels=channels)
+    header, decoders = read_json(file_path)
+    data = {}
+    for name in decoders:
+        if channels is None or name in channels:
+            data[name] = decoders[name]()
+    return header, data
+
+
+def convert_json_to_binary(json_path, binary_path=None, encode=False, compression=None):
+    """Convert a recording saved as JSON to the binary format.
+
+    :param json_path: Path to the JSON file.
+    :type json_path: str
+    :param binary_path: Path to the binary file to write. Defaults to the JSON path
+        with the extension replaced by :py:data:`BINARY_EXTENSION`.
+    :type binary_path: str
+    :param encode: If channels should be stored encoded, see :py:func:`write_binary`.
+    :type encode: bool
+    :param compression: Compression of the channels, see :py:func:`write_binary`.
+    :type compression: str
+    :return: The path of the binary file.
+    :rtype: str
+
+    """
+    if binary_path is None:
+        binary_path = os.path.splitext(json_path)[0] + BINARY_EXTENSION
+    with open(os.path.abspath(json_path), 'rt') as f:
+        doc = json.load(f)
+    data = doc.pop('data', None) or {}
+    channels = {}
+    for name in CHANNELS:
+        if data.get(name) is not None:
+            channels[name] = np.array(data[name], 'float')
+    write_binary(binary_path, doc, channels, encode=encode, compression=compression)
+    return binary_path